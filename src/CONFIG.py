@@ -33,6 +33,31 @@ CONFIG = {
     "randomise_starting_locations": False,
     # Presentation Mode
     "presentation_mode": False,
+    # Headless Mode -
+    # If enabled, games with only AI players are played without printing the board, clearing the screen, pausing
+    # between turns or writing anything to the console. Logs and results are still recorded
+    # Always enabled for the matches of a batch
+    "headless_mode": False,
+    # Batch Processes -
+    # Number of processes used to play matches in parallel when run with --batch
+    # Each match searches in its own process, so the MiniMax search processes are not used in batch mode
+    # None = all of the CPU cores
+    "batch_processes": None,
+    # Batch Seed -
+    # Seed for the random numbers of a batch, so that a batch can be repeated. Each match is seeded from this and its
+    # match number
+    # None = a different random seed every batch
+    "batch_seed": None,
+    # Game Record File -
+    # File that a compact record of every game is appended to, holding the seed, the layout, and every roll and move
+    # See game_record.read_game_records to read it back. Set to temp/games.rec by --batch and --record, so that it is
+    # kept with the rest of the results in games/<timestamp>
+    # None = games are not recorded
+    "game_record_file": None,
+    # Replay Snapshot Interval -
+    # Number of turns between the snapshots a replay keeps of a recorded game, see replay.replay_engine
+    # Lower values use more memory, but jumping to a turn replays fewer moves
+    "replay_snapshot_interval": 10,
     # MINIMAX CONFIGURATION ---------------------------------------------------
     # Minimax Depth -
     # Depth to which the minimax algorithm will search
@@ -46,6 +71,14 @@ CONFIG = {
     # If enabled, logs the score calculation for each move in the MiniMax algorithm
     # This is useful for debugging, but will fill up the log file very quickly
     "log_minimax_score_calculation": False,
+    # Log MiniMax Trace -
+    # If enabled, logs every node the MiniMax algorithm visits, at the TRACE level
+    # Nothing is formatted or written for each node unless this is enabled, as it slows the search down considerably
+    "log_minimax_trace": False,
+    # MiniMax Deadline Check Interval -
+    # Number of nodes the MiniMax algorithm visits between checks of the time limit
+    # Higher values spend less time reading the clock, but can overrun the time limit by a little more
+    "minimax_deadline_check_interval": 64,
     # Epsilon Pruning Level -
     # If enabled, the MiniMax algorithm will use epsilon pruning to speed up the search
     # Epsilon pruning evaluates similar moves before appending them to the tree, to avoid unnecessary calculations
@@ -56,6 +89,53 @@ CONFIG = {
     # Recommended Level is 1
     # See README.md for more information
     "epsilon_pruning_level": 0,
+    # MiniMax Search Processes -
+    # Number of worker processes used to search the top level moves of the MiniMax algorithm in parallel
+    # The pool of processes is created once and reused for every search
+    # The MCTS player uses the same pool, growing a tree in each process
+    # None = half of the CPU cores, 1 = search in the main process without a pool
+    "minimax_search_processes": None,
+    # MiniMax Transposition Table Size -
+    # Number of positions the MiniMax algorithm remembers, so that a position reached by different move orders is
+    # only searched once. Each worker process keeps its own table
+    # 0 = Disabled
+    "minimax_transposition_table_size": 2**18,
+    # MiniMax Transposition Table Replacement -
+    # What to do when a new position is stored in a slot that already holds another position
+    # 'depth' = keep the stored position if it was searched deeper during the current search
+    # 'always' = always replace the stored position
+    "minimax_transposition_table_replacement": "depth",
+    # MiniMax Move Ordering -
+    # If enabled, the MiniMax algorithm searches the moves most likely to cause a cutoff first, so that alpha-beta
+    # pruning cuts off earlier. Top level moves are first sorted by the board they lead to, and moves further down the
+    # tree are sorted by the killer moves at their depth and the history heuristic
+    # If disabled, moves are searched in the order of move_sort_order
+    "minimax_move_ordering": True,
+    # MiniMax Killer Moves -
+    # Number of killer moves (recent moves that caused a cutoff) remembered at each depth of the search
+    "minimax_killer_moves": 2,
+    # MiniMax Placement Candidates -
+    # Number of locations the MiniMax player evaluates when placing its starting settlements. The locations are
+    # picked by the pips on the tiles around them, weighted by how rare each resource is on the board
+    # Faster, but the best location is not always among the candidates, so the player may choose differently
+    # None = evaluate every location
+    "minimax_placement_candidates": None,
+    # MCTS CONFIGURATION ------------------------------------------------------
+    # MCTS Time Limit -
+    # Time in seconds that the MCTS player searches for before making each move
+    "mcts_time_limit": 5,
+    # MCTS Playouts -
+    # Number of playouts that the MCTS player makes before each move, if it is reached before the time limit
+    # With more than one search process, the playouts are shared between the processes
+    # None = no limit, only the time limit is used
+    "mcts_playouts": None,
+    # MCTS Exploration -
+    # The UCT exploration constant. Higher values try more moves, lower values focus on the moves that look best
+    "mcts_exploration": 1.4,
+    # MCTS Rollout Turns -
+    # Number of rounds of turns that each playout is played for before the victory points are compared, if no
+    # player has won before then
+    "mcts_rollout_turns": 8,
     # AI CONFIGURATION --------------------------------------------------------
     # Maximum Moves per Turn -
     # Set the maximum number of moves that can be made in a single turn, per player type
@@ -4,16 +4,21 @@ Controls the setup and running of games
 Collects Stats and Produces Graphs
 
 Usage:
-python3 -m src [--no-menu]
+python3 -m src [--no-menu] [--batch] [--record]
 
 Options:
 --no-menu    Skips the menu and starts the game immediately with the default settings and players
+--batch      Plays the matches in parallel across a pool of processes, with no per-match logs, graphs or pauses
+             Only AI players can be used in batch mode, and the games are always recorded
+--record     Records every game to temp/games.rec, which is kept with the rest of the results, see game_record
 
 © 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
 """
 import shutil
 import signal
 
+from match_farm import run_matches
+
 from matplotlib.ticker import MaxNLocator
 
 from game import *
@@ -153,7 +158,12 @@ if __name__ == "__main__":
                                 wt = True
 
                                 # Choose the type of AI to add
-                                potential_player = ["human", "random", "minimax"]
+                                potential_player = [
+                                    "human",
+                                    "random",
+                                    "minimax",
+                                    "mcts",
+                                ]
                                 print("Please choose the number of a player to add:")
                                 for i, ai in enumerate(potential_player):
                                     print(str(i + 1) + ". " + ai)
@@ -213,6 +223,8 @@ if __name__ == "__main__":
                                                 print("Invalid input")
                                                 continue
 
+                                elif player_choice == 4:
+                                    ai = ai_mcts
                                 else:
                                     raise ValueError
 
@@ -466,6 +478,12 @@ if __name__ == "__main__":
     else:
         players_list = [players]
 
+    # Games are recorded in batch mode, or when asked for, unless a record file has been set in CONFIG
+    if CONFIG["game_record_file"] is None and (
+        "--batch" in sys.argv or "--record" in sys.argv
+    ):
+        CONFIG["game_record_file"] = os.path.join("temp", "games.rec")
+
     for players_set in players_list:
 
         # Setup Logging
@@ -473,16 +491,23 @@ if __name__ == "__main__":
         if not os.path.exists("temp"):
             os.makedirs("temp")
         for file in os.listdir("temp"):
-            if file.startswith("match_"):
+            if file.startswith(("match_", "worker_")):
                 shutil.rmtree(f"temp/{file}")
+        if CONFIG["game_record_file"] is not None and os.path.exists(
+            CONFIG["game_record_file"]
+        ):
+            os.remove(CONFIG["game_record_file"])
 
         print("Clearing logs...")
         for file in os.listdir("logs/players"):
             os.remove(os.path.join("logs/players", file))
 
-        for player in players_set:
-            if isinstance(player, ai_player):
-                player.make_log_file()
+        batch_mode = "--batch" in sys.argv
+
+        if not batch_mode:
+            for player in players_set:
+                if isinstance(player, ai_player):
+                    player.make_log_file()
 
         # Setup Game
 
@@ -494,8 +519,33 @@ if __name__ == "__main__":
 
         players = players_set
 
+        # Run Matches in Parallel
+        # Results are streamed back as each match finishes, then put back in match order for the summary
+        if batch_mode:
+            for match_result in run_matches(
+                players, CONFIG["number_of_matches"], CONFIG["batch_seed"]
+            ):
+                match_number = str(match_result["match_number"])
+                results_list[match_number] = match_result["results"]
+                match_turns[match_number] = match_result["player_num_turns"]
+                player_turn_times[match_number] = match_result["turn_time_total"]
+                times.append(match_result["duration"])
+                print(
+                    "Match "
+                    + match_number
+                    + " of "
+                    + str(CONFIG["number_of_matches"])
+                    + " Results: "
+                    + str(match_result["results"])
+                )
+            results_list = {
+                key: results_list[key] for key in sorted(results_list, key=int)
+            }
+            match_turns = {key: match_turns[key] for key in results_list}
+            player_turn_times = {key: player_turn_times[key] for key in results_list}
+
         # Create Match
-        for i in range(CONFIG["number_of_matches"]):
+        for i in range(0 if batch_mode else CONFIG["number_of_matches"]):
             players = copy.deepcopy(players)
             match = game(players, [i + 1, CONFIG["number_of_matches"]])
             match_queue.append(match)
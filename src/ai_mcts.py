@@ -0,0 +1,409 @@
+"""
+MCTS AI player
+Chooses each move with Monte Carlo Tree Search, using UCT to select moves and playing out the rest of the game with
+random moves to score them
+Dice are rolled as the tree is walked, so every playout samples different rolls and the tree averages over them
+Inherits the placement, robber, discard and trade decisions of the minimax player, which evaluate the board directly
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+from ai_minimax import *
+from playout import playout_engine
+
+
+class mcts_node:
+    """
+    Node of the search tree, reached by playing a move from its parent
+    The tree is open loop - a node stands for the moves made to reach it rather than a single position, as the dice
+    rolled on the way are sampled again in each playout
+    """
+
+    __slots__ = ("move", "player", "children", "visits", "reward")
+
+    def __init__(self, move=None, player=None):
+        """
+        Initialises a node
+        :param move: The move that reaches this node, None for the root
+        :param player: The number of the player that makes the move
+        """
+        self.move = move
+        self.player = player
+        # Children are keyed by the string of their move
+        self.children = {}
+        self.visits = 0
+        # The total reward of the playouts through this node, for the player that made the move
+        self.reward = 0.0
+
+    def select_child(self, moves, exploration):
+        """
+        Selects the child with the highest UCT score, from the children for the moves that can be made now
+        :param moves: The moves that can be made from the current position, all of which have children
+        :param exploration: The exploration constant
+        :return: The selected child
+        """
+        log_visits = math.log(self.visits)
+        best_child, best_score = None, -math.inf
+        for move in moves:
+            child = self.children[str(move)]
+            score = child.reward / child.visits + exploration * math.sqrt(
+                log_visits / child.visits
+            )
+            if score > best_score:
+                best_child, best_score = child, score
+        return best_child
+
+
+def mcts_from_interface(
+    player_, interface_blob, current_player_number, deadline, playouts, seed
+) -> tuple:
+    """
+    Grows a search tree in a worker process, for root parallel search
+    :param player_: The MCTS player running the search
+    :param interface_blob: The pickled search interface
+    :param current_player_number: The number of the player to move
+    :param deadline: The time.monotonic_ns value to stop at, or None for no limit
+    :param playouts: The number of playouts to stop at, or None for no limit
+    :param seed: The seed for the worker's dice and random moves
+    :return: The visits and rewards of the top level moves, and the stats of the search
+    """
+    player_.search_stats = search_stats()
+    interface = pickle.loads(interface_blob)
+    root = player_.grow_tree(
+        interface,
+        interface.get_player(current_player_number),
+        deadline,
+        playouts,
+        random.Random(seed),
+    )
+    return player_.summarise_root(root), player_.search_stats
+
+
+class ai_mcts(ai_minimax):
+    """
+    Monte Carlo Tree Search AI player
+    Every call to turn_actions searches from the current position and makes the move that was visited most
+    """
+
+    def __init__(
+        self,
+        number,
+        colour,
+        time_limit=CONFIG["mcts_time_limit"],
+        playouts=CONFIG["mcts_playouts"],
+        exploration=CONFIG["mcts_exploration"],
+        rollout_turns=CONFIG["mcts_rollout_turns"],
+    ) -> None:
+        """
+        Constructor for the MCTS AI player
+        :param number: The player number
+        :param colour: The player colour
+        :param time_limit: The time limit for each search in seconds, defaults to CONFIG["mcts_time_limit"]
+        :param playouts: The number of playouts for each search, or None for no limit, defaults to
+        CONFIG["mcts_playouts"]
+        :param exploration: The UCT exploration constant, defaults to CONFIG["mcts_exploration"]
+        :param rollout_turns: The number of rounds of turns each playout is played for, defaults to
+        CONFIG["mcts_rollout_turns"]
+        """
+        super().__init__(
+            number=number,
+            colour=colour,
+            time_limit=time_limit,
+            max_depth=0,
+            wishful_thinking=False,
+            strategy="mcts",
+        )
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.log(
+            "MCTS player created with time limit of "
+            + str(time_limit)
+            + " seconds, "
+            + str(playouts)
+            + " playouts, exploration constant "
+            + str(exploration)
+            + " and playouts of "
+            + str(rollout_turns)
+            + " rounds"
+        )
+
+    # Simulation ----------------------------------------------------------------
+
+    def simulate_move(self, engine, current_player, move, moves_this_turn) -> tuple:
+        """
+        Makes a move in a simulated game
+        Ending the turn passes the dice to the next player
+        :param engine: The playout engine of the search interface
+        :param current_player: The player making the move
+        :param move: The move, in the format generated by get_move_combinations
+        :param moves_this_turn: The number of moves the player has made this turn
+        :return: The player to move next, the number of moves they have made this turn, and the winner or None
+        """
+        if move[0] == "end turn":
+            return engine.end_turn(current_player), 0, None
+        winner = engine.make_move(current_player, move)
+        return current_player, moves_this_turn + 1, winner
+
+    def rollout(self, engine, current_player, moves_this_turn):
+        """
+        Plays out a simulated game with the playout engine, until a player wins or the number of rounds runs out
+        :param engine: The playout engine of the search interface
+        :param current_player: The player to move
+        :param moves_this_turn: The number of moves the player has made this turn
+        :return: The winner, or None if no player won
+        """
+        winner, _ = engine.play(
+            current_player,
+            moves_this_turn,
+            self.rollout_turns * len(engine.interface.get_players_list()),
+        )
+        return winner
+
+    def playout_rewards(self, interface, winner) -> dict:
+        """
+        Scores the end of a playout for every player, between 0 and 1
+        The winner scores 1 and the other players 0. If no one won, players are scored by how far their victory points
+        are ahead of or behind the best of the other players
+        :param interface: The search interface
+        :param winner: The winner of the playout, or None
+        :return: A dict of player number to reward
+        """
+        players = interface.get_players_list()
+        if winner is not None:
+            return {player_.number: float(player_ is winner) for player_ in players}
+        points = {
+            player_.number: player_.calculateVictoryPoints(interface)
+            for player_ in players
+        }
+        target = CONFIG["target_score"]
+        rewards = {}
+        for number, score in points.items():
+            best_other = max(
+                other_score for other, other_score in points.items() if other != number
+            )
+            rewards[number] = min(
+                1.0, max(0.0, 0.5 + (score - best_other) / (2 * target))
+            )
+        return rewards
+
+    # Search --------------------------------------------------------------------
+
+    def grow_tree(
+        self, interface, current_player, deadline, playouts, rng=random
+    ) -> mcts_node:
+        """
+        Grows a search tree from a position until the deadline or the number of playouts is reached
+        Each playout restores the position, walks down the tree with UCT, adds one new node and then plays out the
+        rest of the game with random moves
+        :param interface: The search interface, which is left in the position of the last playout
+        :param current_player: The player to move, from the search interface
+        :param deadline: The time.monotonic_ns value to stop at, or None for no limit
+        :param playouts: The number of playouts to stop at, or None for no limit
+        :param rng: The random number generator for the tree's moves and the playouts, defaults to the random module
+        :return: The root of the tree
+        """
+        stats = self.search_stats
+        root_state = SearchState.from_interface(interface)
+        root_number = current_player.number
+        engine = playout_engine(interface, rng=rng)
+        limit = engine.max_moves_per_turn
+        root = mcts_node()
+
+        # At least one playout is always made, so that there is a move to choose
+        while root.visits == 0 or (
+            (playouts is None or root.visits < playouts)
+            and (deadline is None or time.monotonic_ns() < deadline)
+        ):
+            start = time.perf_counter_ns()
+            root_state.apply_to(interface)
+            engine.shuffle_deck()
+            stats.clone_time += time.perf_counter_ns() - start
+
+            node = root
+            player_ = interface.get_player(root_number)
+            moves_this_turn = 0
+            path = []
+            winner = None
+            while True:
+                if moves_this_turn >= limit:
+                    moves = [["end turn"]]
+                else:
+                    start = time.perf_counter_ns()
+                    moves = self.get_move_combinations(interface, player_) or [
+                        ["end turn"]
+                    ]
+                    stats.move_generation_time += time.perf_counter_ns() - start
+
+                # Add a node for a move that has not been tried from here yet, or select one with UCT
+                untried = [move for move in moves if str(move) not in node.children]
+                if untried:
+                    move = rng.choice(untried)
+                    child = mcts_node(move, player_.number)
+                    node.children[str(move)] = child
+                    stats.count_node(len(path) + 1)
+                    stats.expanded_nodes += 1
+                    stats.children += len(moves)
+                else:
+                    child = node.select_child(moves, self.exploration)
+
+                start = time.perf_counter_ns()
+                player_, moves_this_turn, winner = self.simulate_move(
+                    engine, player_, child.move, moves_this_turn
+                )
+                stats.move_application_time += time.perf_counter_ns() - start
+                node = child
+                path.append(node)
+                if untried or winner is not None:
+                    break
+
+            start = time.perf_counter_ns()
+            if winner is None:
+                winner = self.rollout(engine, player_, moves_this_turn)
+            rewards = self.playout_rewards(interface, winner)
+            stats.evaluation_time += time.perf_counter_ns() - start
+
+            for node in path:
+                node.visits += 1
+                node.reward += rewards[node.player]
+            root.visits += 1
+            stats.leaf_evaluations += 1
+            stats.completed_depth = max(stats.completed_depth, len(path))
+
+        return root
+
+    def summarise_root(self, root) -> dict:
+        """
+        Gets the visits and rewards of the top level moves of a tree
+        :param root: The root of the tree
+        :return: A dict of move string to [move, visits, total reward]
+        """
+        return {
+            key: [child.move, child.visits, child.reward]
+            for key, child in root.children.items()
+        }
+
+    def parallel_search(self, interface, current_player, deadline, seed) -> dict:
+        """
+        Grows a tree in every process of the search pool from the same position, and adds their top level moves together
+        :param interface: The search interface
+        :param current_player: The player to move, from the search interface
+        :param deadline: The time.monotonic_ns value to stop at
+        :param seed: The seed of the search, which the seed of each process is taken from
+        :return: A dict of move string to [move, visits, total reward]
+        """
+        executor, _ = get_search_pool()
+        processes = get_search_processes()
+        playouts = None
+        if self.playouts is not None:
+            playouts = max(1, math.ceil(self.playouts / processes))
+
+        start = time.perf_counter_ns()
+        interface_blob = pickle.dumps(interface, -1)
+        self.search_stats.clone_time += time.perf_counter_ns() - start
+
+        # Every process plays out different games, with a seed taken from the search seed
+        seeds = random.Random(seed)
+        futures = [
+            executor.submit(
+                mcts_from_interface,
+                self,
+                interface_blob,
+                current_player.number,
+                deadline,
+                playouts,
+                seeds.getrandbits(64),
+            )
+            for _ in range(processes)
+        ]
+        # The trees are added together in the order they were submitted, so that the moves and totals are the same
+        # whichever process finishes first
+        summary = {}
+        for future in futures:
+            worker_summary, worker_stats = future.result()
+            self.search_stats.merge(worker_stats)
+            for key, (move, visits, reward) in worker_summary.items():
+                if key in summary:
+                    summary[key][1] += visits
+                    summary[key][2] += reward
+                else:
+                    summary[key] = [move, visits, reward]
+        return summary
+
+    # noinspection DuplicatedCode
+    def turn_actions(self, interface) -> search_stats:
+        """
+        Searches from the current position and makes the move that was visited most
+        The stats of the search are also kept in self.search_stats, as the turn can end with an endOfTurnException
+        :param interface: The interface object
+        :return: The stats of the search
+        """
+        print(self, " is thinking...")
+        self.log(
+            "\n\n$!\n\nBeginning MCTS search on turn " + str(interface.turn_number)
+        )
+
+        stats = search_stats()
+        self.search_stats = stats
+        search_start = time.perf_counter_ns()
+
+        search_interface = copy.deepcopy(interface)
+        stats.clone_time += time.perf_counter_ns() - search_start
+        search_interface.set_minimax(True)
+        search_player = search_interface.get_player(self.number)
+
+        moves = self.get_move_combinations(search_interface, search_player)
+        if not moves or moves == [["end turn"]]:
+            print("Only one move available, ending turn")
+            raise endOfTurnException
+        stats.searches = 1
+
+        # Each search takes a single number from the player's stream, so the rest of the player's decisions do not
+        # depend on how many playouts fitted in the time limit
+        seed = interface.get_player_random(self).getrandbits(64)
+        deadline = time.monotonic_ns() + int(self.time_limit * 1_000_000_000)
+        if get_search_processes() > 1:
+            summary = self.parallel_search(
+                search_interface, search_player, deadline, seed
+            )
+        else:
+            root = self.grow_tree(
+                search_interface,
+                search_player,
+                deadline,
+                self.playouts,
+                random.Random(seed),
+            )
+            summary = self.summarise_root(root)
+        stats.total_time = time.perf_counter_ns() - search_start
+
+        # Choose the move visited most, breaking ties by the average reward
+        best_move, visits, reward = max(
+            summary.values(), key=lambda item: (item[1], item[2] / item[1])
+        )
+        self.log(
+            "Top level moves: "
+            + str(
+                {
+                    key: (visits_, round(reward_ / visits_, 3))
+                    for key, (_, visits_, reward_) in summary.items()
+                }
+            )
+        )
+        self.log("Search stats: " + str(stats))
+        self.log(
+            "Best move: "
+            + str(best_move)
+            + " with "
+            + str(visits)
+            + " visits and average reward "
+            + str(round(reward / visits, 3))
+        )
+        print("\nSelected move: ", best_move, "\n")
+        self.entire_game_moves.append(
+            f"Turn {interface.turn_number}, VP {self.calculateVictoryPoints(interface)} - {best_move}"
+        )
+
+        self.make_move(interface, best_move)
+
+        return stats
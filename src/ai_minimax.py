@@ -4,21 +4,24 @@ Contains the logic for the minimax AI player to play the game
 
 © 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
 """
-import concurrent
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import math
 import multiprocessing
-from datetime import datetime, timedelta
+from multiprocessing import shared_memory
 from typing import Any
 
 from longest_road import *
 
 from ai_player import *
 from heuristic_modifiers import *
+from search_state import SearchState
+from search_stats import search_stats
+from transposition_table import *
 
 import time
 
 import copy
+import pickle
 
 
 # Minimax timeout exception, to be raised if the minimax algorithm takes too long
@@ -27,6 +30,132 @@ class MiniMaxTimeoutException(Exception):
     pass
 
 
+# Parallel Search ------------------------------------------------------------
+
+# The pool of worker processes, created the first time it is needed and reused by every search after that
+# The shared alpha is the best score found at the top level of the current search, and is read by the workers
+_search_pool = None
+_search_pool_alpha = None
+
+# Set in each worker process - the shared alpha, and the player, interface and move ordering of the most recent search
+_worker_alpha = None
+_worker_search = [None, None, None, None]
+
+# Transposition tables, one for each minimax player configuration in this process
+_transposition_tables = {}
+
+
+def get_search_processes() -> int:
+    """
+    Gets the number of processes to search with, from CONFIG["minimax_search_processes"]
+    :return: The number of processes
+    """
+    if CONFIG["minimax_search_processes"] is None:
+        return max(1, math.floor(multiprocessing.cpu_count() / 2))
+    return max(1, CONFIG["minimax_search_processes"])
+
+
+def get_search_pool():
+    """
+    Gets the pool of worker processes, creating it if it does not exist yet
+    :return: The pool and the shared alpha value
+    """
+    global _search_pool, _search_pool_alpha
+    if _search_pool is None:
+        _search_pool_alpha = multiprocessing.Value("d", -math.inf, lock=False)
+        _search_pool = ProcessPoolExecutor(
+            max_workers=get_search_processes(),
+            initializer=init_search_worker,
+            initargs=(_search_pool_alpha,),
+        )
+    return _search_pool, _search_pool_alpha
+
+
+def get_transposition_table(player_):
+    """
+    Gets the transposition table for a minimax player, creating it if it does not exist yet
+    Tables are kept outside the player so that they are not copied along with the interface, and are shared by every
+    copy of the player that searches in this process
+    :param player_: The minimax player
+    :return: The transposition table, or None if the table is disabled
+    """
+    if not CONFIG["minimax_transposition_table_size"]:
+        return None
+    key = (player_.number, player_.strategy, player_.epsilon_pruning)
+    if key not in _transposition_tables:
+        _transposition_tables[key] = transposition_table(
+            CONFIG["minimax_transposition_table_size"],
+            CONFIG["minimax_transposition_table_replacement"],
+        )
+    return _transposition_tables[key]
+
+
+def init_search_worker(shared_alpha) -> None:
+    """
+    Sets up a worker process in the search pool
+    :param shared_alpha: The alpha value shared with the main process
+    :return: None
+    """
+    global _worker_alpha
+    _worker_alpha = shared_alpha
+
+
+def search_from_state(
+    search_key,
+    search_blob_name,
+    state,
+    max_depth,
+    alpha,
+    beta,
+    current_player_number,
+) -> list:
+    """
+    Runs a minimax search from a search state in a worker process
+    The player and interface are pickled once per search into shared memory, and each top level move only sends the
+    small search state. Workers keep the player and interface of the most recent search, so they are only unpickled
+    once per search per worker
+    :param search_key: Identifies the search that the player and interface belong to
+    :param search_blob_name: The name of the shared memory holding the pickled player and interface
+    :param state: The search state after the top level move
+    :param max_depth: The depth to search to
+    :param alpha: The alpha value
+    :param beta: The beta value
+    :param current_player_number: The number of the player to move next
+    :return: A list pair containing the best move and the score of that move, the stats of the search, and the killer
+    moves and history scores the search added, for the main process to merge into its own
+    """
+    if _worker_search[0] != search_key:
+        search_blob = shared_memory.SharedMemory(name=search_blob_name)
+        try:
+            player_, interface = pickle.loads(search_blob.buf)
+        finally:
+            search_blob.close()
+        ordering = (player_.killer_moves, player_.move_history)
+        _worker_search[:] = [search_key, player_, interface, ordering]
+        table = get_transposition_table(player_)
+        if table is not None:
+            table.new_search()
+    player_, interface, ordering = _worker_search[1:]
+    player_.search_stats = search_stats()
+    # Every move starts from the move ordering of the search, whichever moves this worker has searched before
+    player_.killer_moves = [killers.copy() for killers in ordering[0]]
+    player_.move_history = ordering[1].copy()
+    state.apply_to(interface)
+    combo = player_.minimax(
+        interface,
+        max_depth,
+        alpha,
+        beta,
+        interface.get_player(current_player_number),
+    )
+    history = {
+        key: score - ordering[1].get(key, 0)
+        for key, score in player_.move_history.items()
+        if score != ordering[1].get(key, 0)
+    }
+    return combo, player_.search_stats, player_.killer_moves, history
+
+
 class ai_minimax(ai_player):
     def __init__(
         self,
@@ -37,6 +166,7 @@ class ai_minimax(ai_player):
         epsilon_pruning_level=CONFIG["epsilon_pruning_level"],
         wishful_thinking=True,
         heuristic_modifiers=None,
+        strategy=None,
     ) -> None:
         """
         Constructor for the minimax AI player
@@ -45,6 +175,7 @@ class ai_minimax(ai_player):
         :param time_limit: The time limit for the minimax algorithm to run for, defaults to CONFIG["minimax_time_limit"]
         :param max_depth: The maximum depth for the minimax algorithm to search to, defaults to CONFIG["minimax_max_depth"]\
         :param epsilon_pruning_level: Whether to use epsilon pruning, defaults to CONFIG["epsilon_pruning"]
+        :param strategy: The name of the strategy, defaults to minimax followed by the heuristic modifiers
         """
         if heuristic_modifiers is None:
             heuristic_modifiers = []
@@ -58,9 +189,9 @@ class ai_minimax(ai_player):
             else:
                 hm_abbreviations = hm_abbreviations[:-1] + " + WT]"
         # Call the parent constructor
-        super().__init__(
-            number=number, colour=colour, strategy=f"minimax{hm_abbreviations}"
-        )
+        if strategy is None:
+            strategy = f"minimax{hm_abbreviations}"
+        super().__init__(number=number, colour=colour, strategy=strategy)
         # Log the creation of the player
         self.log(
             "Minimax player created with time limit of "
@@ -77,68 +208,40 @@ class ai_minimax(ai_player):
         # Set the time limit and max depth, and initialise the root score map
         self.time_limit = time_limit
         self.max_depth = max_depth
+        self.root_depth = max_depth
         self.root_score_map = []
+        self.root_move_order = {}
         self.temp_score_variation_map = [0, {}]
-        self.start_time = None
+        # The time limit as a time.monotonic_ns value, or None for no limit, and the number of nodes left to visit
+        # before the clock is next read
+        self.deadline = None
+        self.nodes_until_deadline_check = 0
+        # Whether to log every node of the search, set at the start of each search from the log level
+        self.tracing = False
+        # The stats of the most recent search
+        self.search_stats = search_stats()
+        # Move ordering for the current search - the killer moves at each depth from the top level, and the history
+        # scores of the moves that have caused cutoffs, keyed by the player and the move
+        self.killer_moves = []
+        self.move_history = {}
         self.epsilon_pruning = epsilon_pruning_level
         self.wishful_thinking = wishful_thinking
         self.heuristic_modifiers = heuristic_modifiers
         self.refused_trades = 0
 
-    def perform_minimax_move(self, player_clone, interface_clone, move):
-        """
-        Contains the logic for performing a move within a minimax search
-        Performs a move within a minimax search, for a specific player
-        Acts as a simple interpreter for the move, and calls the appropriate function on the interface
-        :param move: The move to be performed
-        :param player_clone: The player object to perform the move from
-        :param interface_clone: The interface object to perform the move on
-        :return: The interface object after the move has been performed
-        """
-        if move[0] == "buy development card":
-            interface_clone.buy_development_card(player_clone)
-        elif move[0] == "play development card":
-            if move[1] == "year of plenty":
-                interface_clone.play_development_card(
-                    player_clone, move[1], move[2], move[3]
-                )
-            elif move[1] == "monopoly":
-                interface_clone.play_development_card(player_clone, move[1], move[2])
-            else:
-                interface_clone.play_development_card(player_clone, move[1])
-        elif move[0] == "build road":
-            interface_clone.place_road(player_clone, move[1])
-        elif move[0] == "build settlement":
-            interface_clone.place_settlement(player_clone, move[1])
-        elif move[0] == "build city":
-            interface_clone.place_city(player_clone, move[1])
-        elif move[0] == "trade with bank":
-            interface_clone.trade_with_bank(player_clone, move[1], move[2])
-        elif move[0] == "trade with port":
-            interface_clone.trade_with_port(player_clone, move[1], move[2])
-        elif move[0] == "trade with player":
-            # Cannot suppose that the other player will trade with us, so don't trade if this is the case
-            # We will assume that the opposing player always trades with us
-            if move[1] == self.number:
-                interface_clone.trade_with_player(
-                    player_clone, move[2], move[3], move[4]
-                )
-        elif move[0] == "end turn":
-            pass
-        else:
-            # If the move is not recognised, raise an error
-            raise NotImplementedError(
-                "perform_minimax_move does not know how to perform " + str(move)
-            )
-        return interface_clone
-
-    def evaluate_board(self, interface) -> int:
+    def evaluate_board(self, interface, player_=None, explain=False) -> int | dict:
         """
         Generates stats for the player and then passes this to the heuristic function(s)
         See README for more details of how the heuristic is calculated
+        Only the score is worked out, unless an explanation is asked for, as building the mod_map of every board
+        evaluated in a search is slower than scoring it
         :param interface: board_interface
-        :return: The evaluation of the board as an integer
+        :param player_: The copy of this player whose hand is evaluated, defaults to this player
+        :param explain: Whether to return the mod_map of the reasons for the score instead of the score
+        :return: The evaluation of the board as an integer, or the mod_map if explain is True
         """
+        if player_ is None:
+            player_ = self
 
         # The score variation map is a map of the reasons for the score variation, and the amount of the variation
         # Useful for debugging
@@ -148,16 +251,14 @@ class ai_minimax(ai_player):
 
         buildings_list = interface.get_buildings_list()
 
-        if self.calculateVictoryPoints(interface) >= CONFIG["target_score"]:
-            return 1000000
+        if player_.calculateVictoryPoints(interface) >= CONFIG["target_score"]:
+            return {"won": 1000000} if explain else 1000000
 
         stats_map["target score"] = CONFIG["target_score"]
 
         # Victory Points Scoring ------------------------------------------------------
 
-        current_vp = self.calculateVictoryPoints(
-            interface, buildings_list=buildings_list
-        )
+        current_vp = player_.calculateVictoryPoints(interface)
 
         other_players = [
             player
@@ -166,83 +267,67 @@ class ai_minimax(ai_player):
         ]
 
         other_players.sort(
-            key=lambda x: x.calculateVictoryPoints(
-                interface, buildings_list=buildings_list
-            ),
+            key=lambda x: x.calculateVictoryPoints(interface),
             reverse=True,
         )
 
-        if (
-            other_players[0].calculateVictoryPoints(
-                interface, buildings_list=buildings_list
-            )
-            >= CONFIG["target_score"]
-        ):
-            return -1000000
+        if other_players[0].calculateVictoryPoints(interface) >= CONFIG["target_score"]:
+            return {"lost": -1000000} if explain else -1000000
 
         stats_map["other players"] = other_players
         stats_map["victory points"] = current_vp
 
         # Number of roads -----------------------------------------------------
 
-        player_roads = []
-        for road in interface.get_roads_list():
-            if interface.get_roads_list()[road]["player"] is not None:
-                if interface.get_roads_list()[road]["player"] == self:
-                    player_roads.append(road)
+        player_roads = interface.get_player_roads(self)
 
         stats_map["roads"] = player_roads
 
-        resources = []
-        resources_has_access_to = []
+        economics = interface.get_node_economics()
+        resources_has_access_to = set()
         roll_map = {}
 
         # Rating settlements and cities
-        for key, item in buildings_list.items():
-            if buildings_list[key]["player"] is not None:
-                if buildings_list[key]["player"].number == self.number:
-
-                    # Rate based on number of resources available
-                    building_type = buildings_list[key]["building"]
-
-                    if building_type == "settlement":
-                        resources.append(item for item in buildings_list[key]["tiles"])
-                    elif building_type == "city":
-                        resources.append(item for item in buildings_list[key]["tiles"])
-                        resources.append(item for item in buildings_list[key]["tiles"])
-
-                    for tile in buildings_list[key]["tiles"]:
-                        multiplier = 1 if building_type == "settlement" else 2
-                        if tile.resource not in roll_map:
-                            roll_map[tile.resource] = multiplier * max(
-                                1, tile.frequency
-                            )
-                        else:
-                            roll_map[tile.resource] = multiplier * max(
-                                roll_map[tile.resource], tile.frequency
-                            )
+        for key in interface.get_player_buildings(self):
+            node = TOPOLOGY.node_ids[key]
 
-                    stats_map["settlements"][key] = {
-                        "nearby tiles": [tile for tile in buildings_list[key]["tiles"]]
-                    }
+            # Rate based on number of resources available
+            building_type = buildings_list[key]["building"]
 
-                    nearby_resources = [item for item in buildings_list[key]["tiles"]]
-                    for resource in nearby_resources:
-                        resources_has_access_to.append(resource.resource)
+            for tile in buildings_list[key]["tiles"]:
+                multiplier = 1 if building_type == "settlement" else 2
+                if tile.resource not in roll_map:
+                    roll_map[tile.resource] = multiplier * max(1, tile.frequency)
+                else:
+                    roll_map[tile.resource] = multiplier * max(
+                        roll_map[tile.resource], tile.frequency
+                    )
 
-        stats_map["resources"] = self.resources
-        stats_map["has_access_to"] = list(set(resources_has_access_to))
+            # A port the building is on is scored with the player's ports instead
+            nearest_port = economics.nearest_ports[node]
+            stats_map["settlements"][key] = {
+                "nearby tiles": buildings_list[key]["tiles"],
+                "pips": economics.pips[node],
+                "tile count": economics.tile_counts[node],
+                "port value": (
+                    economics.port_values[node]
+                    if nearest_port is not None and nearest_port[0] > 0
+                    else 0
+                ),
+            }
+
+            resources_has_access_to |= economics.tile_resources[node]
+
+        stats_map["resources"] = player_.resources
+        # Sorted, as the order of a set of strings changes between processes
+        stats_map["has_access_to"] = sorted(resources_has_access_to)
         stats_map["roll map"] = roll_map
 
-        ports_list = interface.get_ports_list()
-        for port in ports_list:
-            if ports_list[port] is not None:
-                if ports_list[port]["player"] is not None:
-                    if ports_list[port]["player"].number == self.number:
-                        stats_map["ports"][port] = {
-                            "type": ports_list[port]["symbol"],
-                            "resource": ports_list[port]["resource"],
-                        }
+        for location, port in interface.get_player_ports(self):
+            stats_map["ports"][location] = {
+                "type": port["symbol"],
+                "resource": port["resource"],
+            }
 
         stats_map["largest_army"] = False
         stats_map["longest_road"] = False
@@ -254,20 +339,18 @@ class ai_minimax(ai_player):
         if interface.get_largest_army()[0] is not None:
             if interface.get_largest_army()[0].number == self.number:
                 stats_map["largest_army"] = True
-                stats_map["army_size"] = self.played_robber_cards
+                stats_map["army_size"] = player_.played_robber_cards
         stats_map["largest_army"] = False
         stats_map["longest_road"] = False
-        stats_map["army_size"] = self.played_robber_cards
+        stats_map["army_size"] = player_.played_robber_cards
 
         # Check for how long the longest road is
 
-        player_roads = interface.get_player_roads(self)
-
         if player_roads:
 
             num_available_settlement_positions = 0
             opponents_on_roads = 0
-            road_endings = list(
+            road_endings = sorted(
                 set(
                     [road[0] for road in player_roads]
                     + [road[1] for road in player_roads]
@@ -287,15 +370,10 @@ class ai_minimax(ai_player):
             ] = num_available_settlement_positions
             stats_map["opponents_on_roads"] = opponents_on_roads
 
-        clusters = return_clusters(player_roads)
-        stats_map["longest_continuous_road"] = 0
-        if clusters:
-            longest_cluster = max(clusters, key=len)
-            longest_route = len(find_longest_route(longest_cluster)) - 1
-            stats_map["longest_continuous_road"] = longest_route
+        stats_map["longest_continuous_road"] = interface.get_longest_road_length(self)
 
-        stats_map["development_cards"] = self.development_cards
-        stats_map["total_dev_cards_played"] = self.total_dev_cards_played
+        stats_map["development_cards"] = player_.development_cards
+        stats_map["total_dev_cards_played"] = player_.total_dev_cards_played
 
         # Distance Between Settlements
         settlements = stats_map["settlements"]
@@ -327,17 +405,11 @@ class ai_minimax(ai_player):
 
         stats_map["robber_location"] = interface.get_robber_location()
 
-        default = HMDefault()
-        mod_map = default(interface, stats_map, {})
-        score = sum(mod_map.values())
+        score = HMDefault()(interface, stats_map, heuristic_score(explain))
         for modifier in self.heuristic_modifiers:
-            mod_map = modifier(interface, stats_map, mod_map)
-            score = sum(mod_map.values())
-        # Overwrite score with temp score if it is better, as this is the score that will be used for the minimax algorithm
-        if score > self.temp_score_variation_map[0]:
-            self.temp_score_variation_map = [score, mod_map]
+            score = modifier(interface, stats_map, score)
 
-        return score
+        return score.entries if explain else score.total
 
     def choose_road_location(self, interface) -> Any | None:
         """
@@ -350,14 +422,17 @@ class ai_minimax(ai_player):
 
         self.log("Choosing road location")
 
+        # Work on one copy of the interface, placing and removing each road in turn
+        interface_copy = copy.deepcopy(interface)
+        interface_copy.set_minimax(True)
+        player_copy = interface_copy.get_player(self.number)
+
         # Iterate through all potential road locations and evaluate the board at each location
-        for location in interface.get_potential_road_locations(self):
-            interface_copy = copy.deepcopy(interface)
-            interface_copy.set_minimax(True)
-            player_copy = copy.deepcopy(self)
-            interface_copy.place_road(player_copy, location)
+        for location in interface_copy.get_potential_road_locations(player_copy):
+            token = interface_copy.apply_move(player_copy, ["build road", location])
             # Save the score of the board at this location
-            score_map[location] = self.evaluate_board(interface_copy)
+            score_map[location] = self.evaluate_board(interface_copy, player_copy)
+            interface_copy.undo_move(token)
 
         self.log("Potential Roads Score Map: " + str(score_map))
 
@@ -379,30 +454,58 @@ class ai_minimax(ai_player):
             self, initial_placement=True
         )
 
+        # Only the locations with the most valuable tiles and ports around them are evaluated, keeping the order they
+        # were found in
+        candidates = CONFIG["minimax_placement_candidates"]
+        if candidates is not None and len(potential_locations) > candidates:
+            economics = interface.get_node_economics()
+            best_locations = set(
+                sorted(
+                    potential_locations,
+                    key=lambda location: economics.values[TOPOLOGY.node_ids[location]]
+                    + economics.port_values[TOPOLOGY.node_ids[location]],
+                    reverse=True,
+                )[:candidates]
+            )
+            potential_locations = [
+                location
+                for location in potential_locations
+                if location in best_locations
+            ]
+
+        # Work on one copy of the interface, placing and removing each settlement in turn
+        interface_clone = copy.deepcopy(interface)
+        interface_clone.set_minimax(True)
+        player_clone = interface_clone.get_player(self.number)
+
         # Iterate through all potential locations and evaluate the board at each location
         location_score_map = {}
         for location in potential_locations:
-            interface_clone = copy.deepcopy(interface)
-            interface_clone.set_minimax(True)
-            interface_clone.place_settlement(self, location)
+            token = interface_clone.apply_move(
+                player_clone, ["build settlement", location]
+            )
             # Save the score of the board at this location
-            location_score_map[location] = self.evaluate_board(interface_clone)
+            location_score_map[location] = self.evaluate_board(
+                interface_clone, player_clone
+            )
+            interface_clone.undo_move(token)
 
         # Return the location with the highest score
         best_location = max(location_score_map, key=location_score_map.get)
         interface.place_settlement(self, best_location, True)
+        interface_clone.perform_move(player_clone, ["build settlement", best_location])
 
         # Get all potential locations for the road
         # Cannot use the above method as this is the first road placed and the player has no roads
         road_score_map = {}
 
         for road in [
-            road for road in interface.get_roads_list() if best_location in road
+            TOPOLOGY.edge_names[edge]
+            for edge in TOPOLOGY.node_edges[TOPOLOGY.node_ids[best_location]]
         ]:
-            interface_clone = copy.deepcopy(interface)
-            interface_clone.set_minimax(True)
-            interface_clone.place_road(self, road)
-            road_score_map[road] = self.evaluate_board(interface_clone)
+            token = interface_clone.apply_move(player_clone, ["build road", road])
+            road_score_map[road] = self.evaluate_board(interface_clone, player_clone)
+            interface_clone.undo_move(token)
 
         # Return the road with the highest score and place it
         best_road = max(road_score_map, key=road_score_map.get)
@@ -466,7 +569,8 @@ class ai_minimax(ai_player):
         interface.log_action(f"{self.name}'s resources pre-discard: {self.resources}")
         required_length = len(self.resources) // 2
         while len(self.resources) > required_length:
-            could_discard = list(set(self.resources))
+            # The cards are checked in a fixed order, so ties are broken the same way in every process
+            could_discard = [card for card in RESOURCES if card in self.resources]
             scores = {}
             # Evaluate the board at each possible discard
             for card in could_discard:
@@ -499,7 +603,7 @@ class ai_minimax(ai_player):
             clone = copy.deepcopy(self)
             interface_clone = copy.deepcopy(interface)
             interface_clone.set_minimax(True)
-            clone.resources.extend(trade[2])
+            clone.resources.append(trade[2])
             clone.resources.remove(trade[1])
             scores[trade] = clone.evaluate_board(interface_clone)
         best_trade = max(scores, key=scores.get)
@@ -522,7 +626,7 @@ class ai_minimax(ai_player):
             interface_clone = copy.deepcopy(interface)
             interface_clone.set_minimax(True)
             if response:
-                clone.resources.extend(receiving)
+                clone.resources.append(receiving)
                 clone.resources.remove(giving)
             scores[response] = clone.evaluate_board(interface_clone)
 
@@ -532,15 +636,26 @@ class ai_minimax(ai_player):
     # Minimax functions --------------------------------------------------------
 
     def get_best_move(self, interface, current_player, local_moves):
+        """
+        Finds the best of a list of moves by performing each one and evaluating the board, then undoing it
+        Used for Epsilon Pruning
+        :param interface: The search interface, which must be in minimax mode
+        :param current_player: The player making the moves, from the search interface
+        :param local_moves: The moves to choose from
+        :return: A list containing only the best move
+        """
         if not local_moves:
             return []
         scores = []
         for move in local_moves:
-            clone = copy.deepcopy(current_player)
-            interface_clone = copy.deepcopy(interface)
-            interface_clone.set_minimax(True)
-            self.perform_minimax_move(clone, interface_clone, move)
-            scores.append([move, self.evaluate_board(interface_clone)])
+            token = interface.apply_move(current_player, move)
+            scores.append(
+                [
+                    move,
+                    self.evaluate_board(interface, interface.get_player(self.number)),
+                ]
+            )
+            interface.undo_move(token)
         return [max(scores, key=lambda x: x[1])[0]]
 
     def get_move_combinations(self, interface, current_player) -> list | bool:
@@ -605,31 +720,20 @@ class ai_minimax(ai_player):
             # Append trade with bank moves
             elif move == "trade with bank":
                 local_moves = []
-                resources_can_trade = list(
-                    set(
-                        [
-                            resource
-                            for resource in current_player.resources
-                            if current_player.resources.count(resource) >= 4
-                        ]
-                    )
-                )
+                resources_can_trade = [
+                    resource
+                    for resource, amount in current_player.resources.counts().items()
+                    if amount >= 4
+                ]
                 for resource in resources_can_trade:
                     for resource_to_get in ["clay", "rock", "sheep", "wheat", "wood"]:
                         if resource_to_get != resource:
                             local_moves.append([move, resource, resource_to_get])
 
                 if self.epsilon_pruning >= 1:
-                    scores = []
-                    for trade in local_moves:
-                        clone = copy.deepcopy(current_player)
-                        interface_clone = copy.deepcopy(interface)
-                        interface_clone.set_minimax(True)
-                        clone.resources.extend(trade[2])
-                        for i in range(4):
-                            clone.resources.remove(trade[1])
-                        scores.append([trade, self.evaluate_board(interface_clone)])
-                    local_moves = [max(scores, key=lambda x: x[1])[0]]
+                    local_moves = self.get_best_move(
+                        interface, current_player, local_moves
+                    )
 
                 full_move_list.extend(local_moves)
 
@@ -644,15 +748,9 @@ class ai_minimax(ai_player):
                             local_moves.append([move, resource, resource_to_get])
 
                 if self.epsilon_pruning >= 1:
-                    scores = []
-                    for trade in local_moves:
-                        clone = copy.deepcopy(current_player)
-                        interface_clone = copy.deepcopy(interface)
-                        interface_clone.set_minimax(True)
-                        clone.resources.extend(trade[2])
-                        clone.resources.remove(trade[1])
-                        scores.append([trade, self.evaluate_board(interface_clone)])
-                    local_moves = [max(scores, key=lambda x: x[1])[0]]
+                    local_moves = self.get_best_move(
+                        interface, current_player, local_moves
+                    )
 
                 full_move_list.extend(local_moves)
 
@@ -665,9 +763,13 @@ class ai_minimax(ai_player):
                     for player in interface.get_players_list()
                     if player != current_player
                 ]:
-                    for resource in list(set(current_player.resources)):
-                        for resource_to_get in list(set(other_player.resources)):
-                            if resource_to_get != resource:
+                    for resource in RESOURCES:
+                        for resource_to_get in RESOURCES:
+                            if (
+                                resource_to_get != resource
+                                and resource in current_player.resources
+                                and resource_to_get in other_player.resources
+                            ):
                                 local_moves.append(
                                     [
                                         move,
@@ -680,23 +782,17 @@ class ai_minimax(ai_player):
                 if not local_moves:
                     continue
                 if self.epsilon_pruning >= 1:
-                    # reduce list to only the best trade, using the perform_minimax_move to get the interface object, and the evaluate_board function to rank them
-                    scores = []
-                    for trade in local_moves:
-                        clone = copy.deepcopy(current_player)
-                        interface_clone = copy.deepcopy(interface)
-                        interface_clone.set_minimax(True)
-                        clone.resources.extend(trade[4])
-                        clone.resources.remove(trade[3])
-                        scores.append([trade, self.evaluate_board(interface_clone)])
-                    local_moves = [max(scores, key=lambda x: x[1])[0]]
+                    # reduce list to only the best trade, performing each one on the interface and using the evaluate_board function to rank them
+                    local_moves = self.get_best_move(
+                        interface, current_player, local_moves
+                    )
                 full_move_list.extend(local_moves)
 
             # Append development card moves
             elif move == "play development card":
                 if self == current_player:
                     development_cards_ = current_player.development_cards.copy()
-                    for card in self.gained_dev_cards_this_turn:
+                    for card in current_player.gained_dev_cards_this_turn:
                         development_cards_.remove(card)
                     for card in development_cards_:
                         move = "play development card"
@@ -764,12 +860,255 @@ class ai_minimax(ai_player):
 
         return return_list
 
+    def make_wishful_move(self, interface, current_player, move) -> dict:
+        """
+        Performs a move for the player on the search interface, returning the token to undo it
+        If Wishful Thinking is enabled, the player is first given extra copies of the resources they have access to
+        :param interface: The search interface
+        :param current_player: The player making the move, from the search interface
+        :param move: The move to perform
+        :return: The undo token, which also removes the extra resources
+        """
+        token = interface.make_undo_token(current_player)
+
+        # The Wishful Thinking Modification
+        # Inject extra resources into the player's hand to simulate the possibility of getting a resource,
+        # and therefore the ability to perform a move
+        if self.wishful_thinking:
+            if current_player.number == self.number:
+                for card in self.has_access_to(interface):
+                    # The desert does not give a resource card
+                    if card == "desert":
+                        continue
+                    amount = math.floor(len(interface.get_players_list()) / 2)
+                    current_player.resources.add(card, amount)
+                    held = current_player.resources.count(card)
+                    interface.update_hand_key(
+                        current_player, "resource", card, held - amount, held
+                    )
+
+        interface.perform_move(current_player, move)
+        return token
+
+    def child_alpha(self, alpha, max_depth) -> float:
+        """
+        Gets the alpha value to search the children of a node with
+        At the top level this is just below alpha, so a move that cannot beat the best move so far is given a score
+        strictly lower than it, instead of tying with it in the root score map
+        :param alpha: The alpha value of the node
+        :param max_depth: The depth of the node
+        :return: The alpha value for the children
+        """
+        if max_depth == self.root_depth:
+            return math.nextafter(alpha, -math.inf)
+        return alpha
+
+    def parallel_root_search(
+        self, interface, max_depth, alpha, beta, current_player, potential_moves
+    ) -> list:
+        """
+        Searches the top level moves in parallel, using the persistent pool of worker processes
+        Every move is submitted at once, and the results are added to the root score map in the order of the moves
+        The best score so far is shared with the workers, so that they can prune with it
+        :param interface: The search interface
+        :param max_depth: The depth of the top level
+        :param alpha: The alpha value
+        :param beta: The beta value
+        :param current_player: The player whose turn it is, from the search interface
+        :param potential_moves: The top level moves
+        :return: A list pair containing the best move and the score of that move
+        """
+        executor, shared_alpha = get_search_pool()
+        shared_alpha.value = self.child_alpha(alpha, max_depth)
+        max_combo = ["move_here", -math.inf]
+
+        # The player and interface are only pickled once, into shared memory, and each move is sent as a search state
+        start = time.perf_counter_ns()
+        search_blob = pickle.dumps((self, interface), -1)
+        shared_blob = shared_memory.SharedMemory(create=True, size=len(search_blob))
+        shared_blob.buf[: len(search_blob)] = search_blob
+        self.search_stats.clone_time += time.perf_counter_ns() - start
+        search_key = (self.number, interface.turn_number, time.monotonic_ns())
+        next_player = interface.get_next_player(current_player)
+
+        futures = {}
+        results = {}
+        try:
+            for move in potential_moves:
+                start = time.perf_counter_ns()
+                token = self.make_wishful_move(interface, current_player, move)
+                state = SearchState.from_interface(interface)
+                interface.undo_move(token)
+                self.search_stats.move_application_time += (
+                    time.perf_counter_ns() - start
+                )
+
+                if self.tracing:
+                    self.trace(f"Submitting move {move} to executor")
+                future = executor.submit(
+                    search_from_state,
+                    search_key,
+                    shared_blob.name,
+                    state,
+                    max_depth - 1,
+                    self.child_alpha(alpha, max_depth),
+                    beta,
+                    next_player.number,
+                )
+                futures[future] = move
+
+            for future in as_completed(futures):
+                eval_combo, worker_stats, killer_moves, history = future.result()
+                self.search_stats.merge(worker_stats)
+                results[future] = (eval_combo, killer_moves, history)
+
+                # Share the new alpha with the workers that are still searching
+                alpha = max(alpha, eval_combo[1])
+                shared_alpha.value = self.child_alpha(alpha, max_depth)
+        except MiniMaxTimeoutException:
+            # Stop any moves that have not started, and keep the results that have come back
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            shared_alpha.value = -math.inf
+            shared_blob.close()
+            shared_blob.unlink()
+            # The results are added in the order the moves were submitted, not the order the workers finished in, so
+            # that equal scores are broken the same way in every search
+            for future, move in futures.items():
+                if future in results:
+                    eval_combo, killer_moves, history = results[future]
+                    self.root_score_map.append([move, eval_combo[1]])
+                    max_combo = max(max_combo, eval_combo, key=lambda x: x[1])
+                    self.merge_move_ordering(killer_moves, history)
+
+        return max_combo
+
+    def generate_moves(self, interface, current_player) -> list | bool:
+        """
+        Gets the moves for a node of the search, counting them and the time taken in the search stats
+        :param interface: The search interface
+        :param current_player: The player whose moves are generated
+        :return: The moves, in the format returned by get_move_combinations
+        """
+        start = time.perf_counter_ns()
+        moves = self.get_move_combinations(interface, current_player)
+        self.search_stats.move_generation_time += time.perf_counter_ns() - start
+        if moves:
+            self.search_stats.expanded_nodes += 1
+            self.search_stats.children += len(moves)
+        return moves
+
+    def evaluate_leaf(self, interface, search_self) -> int:
+        """
+        Evaluates a node at the bottom of the search, counting it and the time taken in the search stats
+        :param interface: The search interface
+        :param search_self: The copy of this player in the search interface
+        :return: The evaluation of the board
+        """
+        start = time.perf_counter_ns()
+        score = self.evaluate_board(interface, search_self)
+        self.search_stats.evaluation_time += time.perf_counter_ns() - start
+        self.search_stats.leaf_evaluations += 1
+        return score
+
+    def order_moves(self, moves, current_player, max_depth) -> list | bool:
+        """
+        Orders the moves of a node below the top level, so that the moves most likely to cause a cutoff are searched
+        first. Killer moves at the node's depth come first, then moves by their history score
+        Moves that tie keep the order they were generated in
+        :param moves: The moves of the node
+        :param current_player: The player making the moves
+        :param max_depth: The depth of the node
+        :return: The ordered moves
+        """
+        if not CONFIG["minimax_move_ordering"] or not moves or len(moves) < 2:
+            return moves
+        ply = self.root_depth - max_depth
+        killers = self.killer_moves[ply] if ply < len(self.killer_moves) else ()
+        if not killers and not self.move_history:
+            return moves
+        history = self.move_history
+        number = current_player.number
+
+        def priority(move):
+            key = str(move)
+            return key in killers, history.get((number, key), 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def record_cutoff(self, move, current_player, max_depth) -> None:
+        """
+        Records a move that caused a cutoff, as a killer move at its depth and in the history scores
+        Cutoffs further from the bottom of the tree save more of the search, so they add more to the history score
+        :param move: The move that caused the cutoff
+        :param current_player: The player that made the move
+        :param max_depth: The depth of the node the cutoff happened at
+        :return: None
+        """
+        if not CONFIG["minimax_move_ordering"]:
+            return
+        key = str(move)
+        ply = self.root_depth - max_depth
+        if ply >= len(self.killer_moves):
+            self.killer_moves.extend(
+                [] for _ in range(ply + 1 - len(self.killer_moves))
+            )
+        killers = self.killer_moves[ply]
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[CONFIG["minimax_killer_moves"] :]
+        history_key = (current_player.number, key)
+        self.move_history[history_key] = (
+            self.move_history.get(history_key, 0) + (max_depth + 1) ** 2
+        )
+
+    def merge_move_ordering(self, killer_moves, history) -> None:
+        """
+        Adds the killer moves and history scores found by a worker process to this player's, so that the next
+        iteration of the search is ordered by them
+        :param killer_moves: The killer moves of the worker at each depth from the top level
+        :param history: The history scores the worker added, keyed in the same way as move_history
+        :return: None
+        """
+        for ply, worker_killers in enumerate(killer_moves):
+            if ply >= len(self.killer_moves):
+                self.killer_moves.append([])
+            killers = self.killer_moves[ply]
+            for key in reversed(worker_killers):
+                if key not in killers:
+                    killers.insert(0, key)
+            del killers[CONFIG["minimax_killer_moves"] :]
+        for key, score in history.items():
+            self.move_history[key] = self.move_history.get(key, 0) + score
+
+    def store_transposition(self, table, position, max_depth, combo, window) -> None:
+        """
+        Stores the result of searching a position in the transposition table
+        :param table: The transposition table
+        :param position: The hash of the position
+        :param max_depth: The depth the position was searched to
+        :param combo: The list pair of the best move and its score
+        :param window: The alpha and beta values the position was searched with
+        :return: None
+        """
+        if combo[1] <= window[0]:
+            bound = UPPER_BOUND
+        elif combo[1] >= window[1]:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        table.store(position, max_depth, combo[1], bound, combo[0])
+
     def minimax(self, interface, max_depth, alpha, beta, current_player) -> list:
         """
         Recursive Minimax algorithm
         Slightly based on my previous CE213 assignment
         NOTE: Maximum depth is the starting depth, and the score is increased. Imagine Maximum depth as the top of the
         tree, and the score is decremented to 0 each layer
+        Moves are applied to the interface in place and undone once they have been searched, so the interface must be
+        a copy in minimax mode, and current_player must be one of its players
         :param interface: The current state of the game
         :param max_depth: The maximum depth of the tree.
         :param alpha: The alpha value
@@ -779,147 +1118,156 @@ class ai_minimax(ai_player):
         """
 
         # Check that the depth is correctly set
-        if (
-            max_depth == CONFIG["minimax_max_depth"]
-            and self.number != current_player.number
-        ):
+        if max_depth == self.root_depth and self.number != current_player.number:
             raise Exception("Cannot start minimax on opponent's turn")
 
         # Check if the time limit has been reached, and if so, return a MiniMaxTimeoutException
-        if self.start_time + timedelta(seconds=self.time_limit) < datetime.now():
-            # Recursively return if limit is reached
-            self.log("Time limit reached")
-            raise MiniMaxTimeoutException
+        # The clock is only read every few nodes, as reading it is slow compared to visiting a node
+        self.nodes_until_deadline_check -= 1
+        if self.nodes_until_deadline_check <= 0 and self.deadline is not None:
+            self.nodes_until_deadline_check = CONFIG["minimax_deadline_check_interval"]
+            if time.monotonic_ns() > self.deadline:
+                # Recursively return if limit is reached
+                self.log("Time limit reached")
+                raise MiniMaxTimeoutException
+
+        stats = self.search_stats
+        stats.count_node(self.root_depth - max_depth)
+
+        # In a worker process, raise alpha to the best score that has been found at the top level so far
+        if _worker_alpha is not None:
+            alpha = max(alpha, _worker_alpha.value)
+
+        # Look the position up in the transposition table before expanding it
+        # The top level is always expanded, so that every top level move is added to the root score map
+        table = None
+        if max_depth != self.root_depth:
+            table = get_transposition_table(self)
+        if table is not None:
+            position = interface.get_position_hash(current_player)
+            entry = table.probe(position)
+            if entry is not None and entry[1] >= max_depth:
+                stats.table_hits += 1
+                if entry[3] == EXACT:
+                    stats.table_cutoffs += 1
+                    return [entry[4], entry[2]]
+                elif entry[3] == LOWER_BOUND:
+                    alpha = max(alpha, entry[2])
+                else:
+                    beta = min(beta, entry[2])
+                if beta <= alpha:
+                    stats.table_cutoffs += 1
+                    return [entry[4], entry[2]]
+            window = (alpha, beta)
 
         # Log the current depth
-        self.log(f"Depth: {max_depth}, Maximising: {current_player.name}")
+        if self.tracing:
+            self.trace(f"Depth: {max_depth}, Maximising: {current_player.name}")
 
         # Check if the depth is at the maximum depth, and if so set the variables
-        if max_depth == self.max_depth:
+        if max_depth == self.root_depth:
             self.root_score_map = []
             self.log("Resetting root_score_map")
-            self.temp_score_variation_map = [0, {}]
-            print(
-                "There are "
-                + str(len(self.get_move_combinations(interface, current_player)))
-                + " possible moves at the top level"
-            )
+
+        # The copy of this player in the interface, whose hand is evaluated
+        search_self = interface.get_player(self.number)
 
         if current_player.number == self.number:
             # It is the Minimax AI's turn
             max_combo = ["move_here", -math.inf]
             # Get all possible moves for this player
-            potential_moves = self.get_move_combinations(
+            potential_moves = self.generate_moves(
                 interface, current_player
             )  # This line was changed from self to current_player
             # self.log(f"Potential moves: {potential_moves}")
+            # At the top level, search the moves in order of their scores from the previous iteration
+            if max_depth == self.root_depth:
+                self.log(
+                    f"There are {len(potential_moves)} possible moves at the top level"
+                )
+                if self.root_move_order:
+                    potential_moves.sort(
+                        key=lambda move: self.root_move_order.get(str(move), -math.inf),
+                        reverse=True,
+                    )
+            else:
+                potential_moves = self.order_moves(
+                    potential_moves, current_player, max_depth
+                )
             # If there are no moves, return the end turn move
             if not potential_moves:
-                self.root_score_map.append(
-                    [["end turn"], self.evaluate_board(interface)]
-                )
-                max_combo = [["end turn"], self.evaluate_board(interface)]
+                max_combo = [["end turn"], self.evaluate_leaf(interface, search_self)]
+                self.root_score_map.append(max_combo.copy())
 
             # Else, for each move, perform the move and recursively call minimax
             else:
 
-                if max_depth == self.max_depth and len(potential_moves) > 1:
-                    with concurrent.futures.ProcessPoolExecutor(
-                        max_workers=math.floor(multiprocessing.cpu_count() / 2)
-                    ) as executor:
-                        for move in potential_moves:
-                            interface_clone = copy.deepcopy(interface)
-                            interface_clone.set_minimax(True)
-                            player_clone = copy.deepcopy(self)
-
-                            if self.wishful_thinking:
-                                if player_clone.number == self.number:
-                                    for card in self.has_access_to(interface_clone):
-                                        for _ in range(
-                                            math.floor(
-                                                len(interface_clone.get_players_list())
-                                                / 2
-                                            )
-                                        ):
-                                            player_clone.resources.append(card)
-
-                            # Perform the move
-                            interface_clone = self.perform_minimax_move(
-                                player_clone, interface_clone, move
-                            )
-
-                            self.log(f"Submitting move {move} to executor")
-                            eval_combo = executor.submit(
-                                self.minimax,
-                                interface_clone,
-                                max_depth - 1,
-                                alpha,
-                                beta,
-                                current_player,
-                            )
-                            eval_combo = eval_combo.result()
-
-                            if max_depth == self.max_depth:
-                                self.root_score_map.append([move, eval_combo[1]])
-                            max_combo = max(max_combo, eval_combo, key=lambda x: x[1])
-
-                            # Perform alpha-beta pruning to speed up the algorithm
-                            alpha = max(alpha, max_combo[1])
-                            if beta <= alpha:
-                                self.log(f"Pruning at depth {max_depth}")
-                                break
-
-                for move in potential_moves:
-                    # Create a clone of the interface and player so that the original is not modified
-                    interface_clone = copy.deepcopy(interface)
-                    interface_clone.set_minimax(True)
-                    player_clone = copy.deepcopy(self)
-
-                    # The Wishful Thinking Modification
-                    # Inject extra resources into the player's hand to simulate the possibility of getting a resource,
-                    # and therefore the ability to perform a move
-
-                    if self.wishful_thinking:
-                        if player_clone.number == self.number:
-                            for card in self.has_access_to(interface_clone):
-                                for _ in range(
-                                    math.floor(
-                                        len(interface_clone.get_players_list()) / 2
-                                    )
-                                ):
-                                    player_clone.resources.append(card)
-
-                    # Perform the move
-                    interface_clone = self.perform_minimax_move(
-                        player_clone, interface_clone, move
+                if (
+                    max_depth == self.root_depth
+                    and max_depth > 0
+                    and len(potential_moves) > 1
+                    and get_search_processes() > 1
+                ):
+                    max_combo = self.parallel_root_search(
+                        interface,
+                        max_depth,
+                        alpha,
+                        beta,
+                        current_player,
+                        potential_moves,
                     )
 
-                    # If the depth is at 0, evaluate the board and add the move and score to the list
-                    if max_depth == 0:
-                        eval_combo = [move, self.evaluate_board(interface_clone)]
-                    # Else, recursively call minimax with the new interface and player
-                    else:
-                        eval_combo = self.minimax(
-                            interface_clone,
-                            max_depth - 1,
-                            alpha,
-                            beta,
-                            interface.get_next_player(current_player),
-                        )
-                    # If the depth is at the maximum depth (the top layer), add the move and score to the list as
-                    # these are the immediate moves that can be made and need to be evaluated
-                    if max_depth == self.max_depth:
-                        self.root_score_map.append([move, eval_combo[1]])
-                    max_combo = max(max_combo, eval_combo, key=lambda x: x[1])
+                # Else search them one at a time in this process
+                else:
+                    for move in potential_moves:
+                        # Perform the move on the interface, keeping the token to undo it afterwards
+                        # The move is undone even if the search times out, so the interface can be searched again
+                        start = time.perf_counter_ns()
+                        token = self.make_wishful_move(interface, current_player, move)
+                        stats.move_application_time += time.perf_counter_ns() - start
+                        try:
+                            # If the depth is at 0, evaluate the board and add the move and score to the list
+                            if max_depth == 0:
+                                eval_combo = [
+                                    move,
+                                    self.evaluate_leaf(interface, search_self),
+                                ]
+                            # Else, recursively call minimax with the new interface and player
+                            else:
+                                eval_combo = self.minimax(
+                                    interface,
+                                    max_depth - 1,
+                                    self.child_alpha(alpha, max_depth),
+                                    beta,
+                                    interface.get_next_player(current_player),
+                                )
+                        finally:
+                            start = time.perf_counter_ns()
+                            interface.undo_move(token)
+                            stats.move_application_time += (
+                                time.perf_counter_ns() - start
+                            )
 
-                    # Perform alpha-beta pruning to speed up the algorithm
-                    alpha = max(alpha, max_combo[1])
-                    if beta <= alpha:
-                        self.log(f"Pruning at depth {max_depth}")
-                        break
+                        # If the depth is at the maximum depth (the top layer), add the move and score to the list as
+                        # these are the immediate moves that can be made and need to be evaluated
+                        if max_depth == self.root_depth:
+                            self.root_score_map.append([move, eval_combo[1]])
+                        max_combo = max(max_combo, eval_combo, key=lambda x: x[1])
+
+                        # Perform alpha-beta pruning to speed up the algorithm
+                        alpha = max(alpha, max_combo[1])
+                        if beta <= alpha:
+                            stats.cutoffs += 1
+                            self.record_cutoff(move, current_player, max_depth)
+                            if self.tracing:
+                                self.trace(f"Pruning at depth {max_depth}")
+                            break
 
             # If the depth is at the maximum depth, return the best move
-            self.log(f"Max combo: {max_combo}")
+            if self.tracing:
+                self.trace(f"Max combo: {max_combo}")
+            if table is not None:
+                self.store_transposition(table, position, max_depth, max_combo, window)
             return max_combo
 
         else:
@@ -929,29 +1277,35 @@ class ai_minimax(ai_player):
             opposing_player = current_player  # THIS LINE WAS CHANGED FROM interface.get_next_player(current_player) TO current_player
 
             # Get all possible moves for this player
-            potential_moves = self.get_move_combinations(interface, opposing_player)
+            potential_moves = self.generate_moves(interface, opposing_player)
+            potential_moves = self.order_moves(
+                potential_moves, opposing_player, max_depth
+            )
             if not potential_moves:
-                min_combo = [["end turn"], self.evaluate_board(interface)]
+                min_combo = [["end turn"], self.evaluate_leaf(interface, search_self)]
 
             else:
                 # Else, for each move, perform the move and recursively call minimax
                 for move in potential_moves:
-                    # Create a clone of the interface and player so that the original is not modified
-                    interface_clone = copy.deepcopy(interface)
-                    interface_clone.set_minimax(True)
-                    player_clone = copy.deepcopy(opposing_player)
-
-                    interface_clone = self.perform_minimax_move(
-                        player_clone, interface_clone, move
-                    )
-
-                    # If the depth is at 0, evaluate the board and add the move and score to the list
-                    if max_depth == 0:
-                        eval_combo = [move, self.evaluate_board(interface_clone)]
-                    else:
-                        eval_combo = self.minimax(
-                            interface_clone, max_depth - 1, alpha, beta, opposing_player
-                        )
+                    # Perform the move on the interface, keeping the token to undo it afterwards
+                    start = time.perf_counter_ns()
+                    token = interface.apply_move(opposing_player, move)
+                    stats.move_application_time += time.perf_counter_ns() - start
+                    try:
+                        # If the depth is at 0, evaluate the board and add the move and score to the list
+                        if max_depth == 0:
+                            eval_combo = [
+                                move,
+                                self.evaluate_leaf(interface, search_self),
+                            ]
+                        else:
+                            eval_combo = self.minimax(
+                                interface, max_depth - 1, alpha, beta, opposing_player
+                            )
+                    finally:
+                        start = time.perf_counter_ns()
+                        interface.undo_move(token)
+                        stats.move_application_time += time.perf_counter_ns() - start
 
                     # If the depth is at the maximum depth (the top layer), add the move and score to the list as
                     min_combo = min(min_combo, eval_combo, key=lambda x: x[1])
@@ -959,7 +1313,10 @@ class ai_minimax(ai_player):
                     # Perform alpha-beta pruning to speed up the algorithm
                     beta = min(beta, min_combo[1])
                     if beta <= alpha:
-                        self.log(f"Pruning at depth {max_depth}")
+                        stats.cutoffs += 1
+                        self.record_cutoff(move, opposing_player, max_depth)
+                        if self.tracing:
+                            self.trace(f"Pruning at depth {max_depth}")
                         break
 
                     # A note on imperfect information
@@ -969,15 +1326,90 @@ class ai_minimax(ai_player):
                     # believe that it is fair to allow the minimax player to 'see' the opponents hand.
 
             # If the depth is at the maximum depth, return the best move
-            self.log("Min combo: " + str(min_combo))
+            if self.tracing:
+                self.trace("Min combo: " + str(min_combo))
+            if table is not None:
+                self.store_transposition(table, position, max_depth, min_combo, window)
             return min_combo
 
+    def search_iteration(self, interface, current_player, depth) -> bool:
+        """
+        Runs one iteration of iterative deepening, searching the top level moves to the given depth
+        The top level moves are searched in order of their scores from the previous iteration, which is updated if
+        this iteration finishes
+        :param interface: The search interface
+        :param current_player: The player whose turn it is, from the search interface
+        :param depth: The depth to search to
+        :return: True if the iteration finished, False if the time limit was reached first
+        """
+        self.root_depth = depth
+        try:
+            self.minimax(interface, depth, -math.inf, math.inf, current_player)
+        except MiniMaxTimeoutException as e:
+            self.log(f"MiniMaxTimeoutException at depth {depth}: " + str(e))
+            print(f"MiniMaxTimeoutException at depth {depth}: " + str(e))
+            self.search_stats.timeouts += 1
+            return False
+        self.log(f"Finished searching to depth {depth}")
+        self.search_stats.completed_depth = depth
+        self.root_move_order = {str(move): score for move, score in self.root_score_map}
+        return True
+
+    def make_move(self, interface, best_move) -> None:
+        """
+        Performs the move chosen by the search on the real interface
+        :param interface: The interface object
+        :param best_move: The move to perform, in the format generated by get_move_combinations
+        :return: None
+        """
+        # Best move logic
+        # Very similar to the logic in the minimax function but with a few differences
+
+        if best_move[0] == "build road":
+            interface.place_road(self, best_move[1])
+        elif best_move[0] == "buy development card":
+            interface.buy_development_card(self)
+        elif best_move[0] == "trade with bank":
+            interface.trade_with_bank(self, best_move[1], best_move[2])
+        elif best_move[0] == "trade with port":
+            interface.trade_with_port(self, best_move[1], best_move[2])
+        elif best_move[0] == "build settlement":
+            interface.place_settlement(self, best_move[1])
+        elif best_move[0] == "build city":
+            interface.place_city(self, best_move[1])
+        elif best_move[0] == "play development card":
+            if best_move[1] == "year of plenty":
+                interface.play_development_card(
+                    self, best_move[1], best_move[2], best_move[3]
+                )
+            elif best_move[1] == "monopoly":
+                interface.play_development_card(self, best_move[1], best_move[2])
+            else:
+                interface.play_development_card(self, best_move[1])
+        elif best_move[0] == "trade with player":
+            if self.refused_trades >= 3:
+                print("Too many refused trades, ending turn")
+                raise endOfTurnException
+            response = interface.trade_with_player(
+                self, best_move[2], best_move[3], best_move[4]
+            )
+            if not response:
+                self.refused_trades += 1
+
+        # Raise an exception to end the turn
+        elif best_move[0] == "end turn":
+            raise endOfTurnException
+        else:
+            print("Error: " + str(best_move))
+            sys.exit()
+
     # noinspection DuplicatedCode
-    def turn_actions(self, interface) -> None:
+    def turn_actions(self, interface) -> search_stats:
         """
         This function is called at the start of the player's turn. It is responsible for calling the minimax algorithm
+        The stats of the search are also kept in self.search_stats, as the turn can end with an endOfTurnException
         :param interface: The interface object
-        :return: The move to be made
+        :return: The stats of the search
         """
 
         print(self, " is thinking...")
@@ -985,29 +1417,56 @@ class ai_minimax(ai_player):
         self.log(
             "\n\n$!\n\nBeginning minimax search on turn " + str(interface.turn_number)
         )
-        moves = self.get_move_combinations(interface, self)
+
+        stats = search_stats()
+        self.search_stats = stats
+        search_start = time.perf_counter_ns()
+
+        # The search works on a single copy of the interface, applying and undoing moves on it
+        search_interface = copy.deepcopy(interface)
+        stats.clone_time += time.perf_counter_ns() - search_start
+        search_interface.set_minimax(True)
+        search_player = search_interface.get_player(self.number)
+
+        moves = self.get_move_combinations(search_interface, search_player)
         self.log("Top level moves: " + str(moves))
         if len(moves) == 1 and moves[0] == ["end turn"]:
             print("Only one move available, ending turn")
             raise endOfTurnException
-        # Set the start time
-        self.start_time = datetime.now()
-        self.log("Start time: " + str(self.start_time))
-        # Run the minimax algorithm
-        try:
-            self.minimax(interface, self.max_depth, -math.inf, math.inf, self)
-        # If the minimax algorithm times out, find the best move from the moves that have been evaluated
-        except MiniMaxTimeoutException as e:
-            self.log("MiniMaxTimeoutException: " + str(e))
-            print("MiniMaxTimeoutException: " + str(e))
-            time.sleep(1)
-            if not self.root_score_map:
-                # Not sure whether I like this? Potentially should search for other items
-                print("No moves found, ending turn")
-                self.log("No moves found, ending turn")
-                time.sleep(5)
-                raise endOfTurnException
+        # Entries from earlier searches can be replaced by this one
+        table = get_transposition_table(self)
+        if table is not None:
+            table.new_search()
+        stats.searches = 1
+        # Set the deadline
+        # Workers compare against the same deadline, as the monotonic clock is shared by every process
+        self.deadline = time.monotonic_ns() + int(self.time_limit * 1_000_000_000)
+        self.nodes_until_deadline_check = 0
+        self.tracing = self.logger.isEnabledFor(TRACE)
+        self.log(f"Time limit: {self.time_limit} seconds")
+        # Run the minimax algorithm with iterative deepening, searching one level deeper each time until the time
+        # limit is reached, so that the result of the deepest search to finish is always available
+        # With move ordering, the first iteration only scores the board each top level move leads to, which sorts the
+        # top level moves for the next iteration
+        self.root_move_order = {}
+        self.killer_moves = []
+        self.move_history = {}
+        completed_score_map = []
+        first_depth = 0 if CONFIG["minimax_move_ordering"] else 1
+        for depth in range(first_depth, self.max_depth + 1):
+            if not self.search_iteration(search_interface, search_player, depth):
+                break
+            completed_score_map = self.root_score_map
+        # If not even the first iteration finished, score each move by the board it leads to, which does not search
+        # any further and so is run without the time limit
+        if not completed_score_map:
+            self.deadline = None
+            self.search_iteration(search_interface, search_player, 0)
+            completed_score_map = self.root_score_map
+        self.root_score_map = completed_score_map
+        stats.total_time = time.perf_counter_ns() - search_start
         self.log("Root score map: " + str(self.root_score_map))
+        self.log("Search stats: " + str(stats))
         # Find the best move from the moves that have been evaluated
 
         highest_score = max(self.root_score_map, key=lambda x: x[1])[1]
@@ -1018,6 +1477,8 @@ class ai_minimax(ai_player):
         # print("Best moves: ", best_moves)
 
         # Add slight priority to moves that build cities/settlements and then roads
+        # Ties are broken with the player's random numbers, so a seeded game always picks the same move
+        rng = interface.get_player_random(self)
         best_move_from_minimax = None
         for move_type in CONFIG["move_sort_order"]:
             for move in best_moves:
@@ -1026,14 +1487,14 @@ class ai_minimax(ai_player):
                         move for move in best_moves if move[0] == move_type
                     ]
                     best_move_from_minimax = [
-                        random.choice(best_move_from_minimax),
+                        rng.choice(best_move_from_minimax),
                         highest_score,
                     ]
                     break
             if best_move_from_minimax:
                 break
         if not best_move_from_minimax:
-            best_move_from_minimax = [random.choice(best_moves), highest_score]
+            best_move_from_minimax = [rng.choice(best_moves), highest_score]
         best_move_from_minimax = {
             "move": best_move_from_minimax[0],
             "score": best_move_from_minimax[1],
@@ -1046,8 +1507,14 @@ class ai_minimax(ai_player):
             + " with score "
             + str(best_move_from_minimax["score"])
         )
-        # Log reasoning, which is the score variation map
+        # Log reasoning, which is the score variation map of the board the best move leads to
         # Useful for debugging
+        token = search_interface.apply_move(
+            search_player, best_move_from_minimax["move"]
+        )
+        mod_map = self.evaluate_board(search_interface, search_player, explain=True)
+        search_interface.undo_move(token)
+        self.temp_score_variation_map = [sum(mod_map.values()), mod_map]
         self.log("Reasoning: " + str(self.temp_score_variation_map))
         self.entire_game_moves.append(
             f"Turn {interface.turn_number}, VP {self.calculateVictoryPoints(interface)} - {best_move_from_minimax}"
@@ -1056,43 +1523,6 @@ class ai_minimax(ai_player):
         # Perform the best move
         best_move = best_move_from_minimax["move"]
 
-        # Best move logic
-        # Very similar to the logic in the minimax function but with a few differences
-
-        if best_move[0] == "build road":
-            interface.place_road(self, best_move[1])
-        elif best_move[0] == "buy development card":
-            interface.buy_development_card(self)
-        elif best_move[0] == "trade with bank":
-            interface.trade_with_bank(self, best_move[1], best_move[2])
-        elif best_move[0] == "trade with port":
-            interface.trade_with_port(self, best_move[1], best_move[2])
-        elif best_move[0] == "build settlement":
-            interface.place_settlement(self, best_move[1])
-        elif best_move[0] == "build city":
-            interface.place_city(self, best_move[1])
-        elif best_move[0] == "play development card":
-            if best_move[1] == "year of plenty":
-                interface.play_development_card(
-                    self, best_move[1], best_move[2], best_move[3]
-                )
-            elif best_move[1] == "monopoly":
-                interface.play_development_card(self, best_move[1], best_move[2])
-            else:
-                interface.play_development_card(self, best_move[1])
-        elif best_move[0] == "trade with player":
-            if self.refused_trades >= 3:
-                print("Too many refused trades, ending turn")
-                raise endOfTurnException
-            response = interface.trade_with_player(
-                self, best_move[2], best_move[3], best_move[4]
-            )
-            if not response:
-                self.refused_trades += 1
+        self.make_move(interface, best_move)
 
-        # Raise an exception to end the turn
-        elif best_move[0] == "end turn":
-            raise endOfTurnException
-        else:
-            print("Error: " + str(best_move))
-            sys.exit()
+        return stats
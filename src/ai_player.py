@@ -13,6 +13,10 @@ import logging
 from player import *
 from ports import *
 
+# Log level for detailed search logging, below debug so that it can be turned off separately
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
 
 class ai_player(player):
     """
@@ -77,7 +81,7 @@ class ai_player(player):
         self.logger = logging.getLogger(
             f"{self.file_path} - {random.randint(0, 1000000)}"
         )
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(TRACE if CONFIG["log_minimax_trace"] else logging.DEBUG)
         file_format = logging.Formatter("[%(asctime)s] %(message)s")
         fh = logging.FileHandler(f"logs/players/{self.file_path}")
         fh.setFormatter(file_format)
@@ -93,6 +97,15 @@ class ai_player(player):
             self.logger.debug("\n")
         self.logger.debug(f"{action}")
 
+    def trace(self, action):
+        """
+        Logs an action to the file at the TRACE level
+        Callers in hot loops should check that tracing is enabled first, so that the message is not formatted
+        :param action: The action to log
+        :return: None
+        """
+        self.logger.log(TRACE, action)
+
     def dump_moves(self):
         """
         Dumps the entire game moves to a file
@@ -6,7 +6,6 @@ All methods are overwritten from the parent class
 © 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
 """
 
-import random
 import time
 from typing import Any
 
@@ -29,11 +28,12 @@ class ai_random(ai_player):
         :param interface: The interface object
         :return: The building that was placed
         """
+        rng = interface.get_player_random(self)
         accepted = False
         building = ""
         while accepted is False:
             # Choose a random building and make sure it is not already owned, and can be built next to
-            rand_int = random.randint(0, len(interface.get_buildings_list()) - 1)
+            rand_int = rng.randint(0, len(interface.get_buildings_list()) - 1)
             if (
                 (
                     interface.get_buildings_list()[
@@ -58,19 +58,17 @@ class ai_random(ai_player):
                 building = list(interface.get_buildings_list().keys())[rand_int]
                 interface.place_settlement(self, building, True)
                 # Find the roads near the settlement
-                potential_roads = []
-                for road in interface.get_roads_list():
-                    if building in road:
-                        potential_roads.append(road)
+                potential_roads = [
+                    TOPOLOGY.edge_names[edge]
+                    for edge in TOPOLOGY.node_edges[TOPOLOGY.node_ids[building]]
+                ]
 
                 accepted_road = False
                 while accepted_road is False:
                     # Pick a random road and make sure it is not already owned
-                    rand_int = random.randint(0, len(potential_roads) - 1)
+                    rand_int = rng.randint(0, len(potential_roads) - 1)
                     if (
-                        interface.get_roads_list()[
-                            list(interface.get_roads_list().keys())[rand_int]
-                        ]["player"]
+                        interface.get_roads_list()[potential_roads[rand_int]]["player"]
                         is None
                     ):
                         # Build the road
@@ -85,42 +83,17 @@ class ai_random(ai_player):
         :param interface: The interface object
         :return: The road that was placed
         """
-        # Get a list of all the roads that are owned by the player to know where they can build
-        road_endings = []
-        total_roads = 0
-        for road in interface.get_roads_list():
-            if interface.get_roads_list()[road]["player"] == self:
-                total_roads += 1
-                road_endings.append(road[0])
-                road_endings.append(road[1])
-
+        rng = interface.get_player_random(self)
         # If the player has no roads left to place, return False
-        if total_roads == 15:
+        if interface.count_structure(self, "road") == 15:
             return False
-        not_accepted = True
-        # Loop until accepted
-        attempts = 0
-        while not_accepted and attempts < 100:
-            # Choose a random road from all possible roads and make sure it is not already owned
-            rand_int = random.randint(0, len(interface.get_roads_list()) - 1)
-            if (
-                interface.get_roads_list()[
-                    list(interface.get_roads_list().keys())[rand_int]
-                ]["player"]
-                is None
-            ):
-                # Check if the road is connected to a road that the player owns
-                if (
-                    list(interface.get_roads_list().keys())[rand_int][0] in road_endings
-                    or list(interface.get_roads_list().keys())[rand_int][1]
-                    in road_endings
-                ):
-                    # Return the chosen road
-                    return list(interface.get_roads_list().keys())[rand_int]
-            attempts += 1
-        if attempts >= 100:
+
+        # Get the free roads that are connected to a road that the player owns, and choose a random one
+        potential_roads = interface.get_potential_road_locations(self)
+        if not potential_roads:
             self.log("Failed to find a road to place")
             return False
+        return rng.choice(potential_roads)
 
     def choose_placement_location(
         self, interface, building_type="settlement"
@@ -131,16 +104,11 @@ class ai_random(ai_player):
         :param building_type: The type of building to place
         :return: The building that was placed
         """
+        rng = interface.get_player_random(self)
 
         # Check if the player has any settlements or cities left to place by counting the number of settlements and cities
-        settlements_count = 0
-        cities_count = 0
-        for building in interface.get_buildings_list():
-            if interface.get_buildings_list()[building]["player"] == self:
-                if interface.get_buildings_list()[building]["building"] == "settlement":
-                    settlements_count += 1
-                elif interface.get_buildings_list()[building]["building"] == "city":
-                    cities_count += 1
+        settlements_count = interface.count_structure(self, "settlement")
+        cities_count = interface.count_structure(self, "city")
 
         if building_type == "settlement":
 
@@ -150,13 +118,7 @@ class ai_random(ai_player):
                 return False
 
             # Get a list of all the roads endings (junctions) that are owned by the player to know where they can build a settlement
-            road_endings = []
-            for road in interface.get_roads_list():
-                if interface.get_roads_list()[road]["player"] == self:
-                    if not interface.check_for_nearby_settlements(road[0]):
-                        road_endings.append(road[0])
-                    if not interface.check_for_nearby_settlements(road[1]):
-                        road_endings.append(road[1])
+            road_endings = interface.get_potential_building_locations(self)
 
             # If the player has no places they can build settlements, return False
             if len(road_endings) == 0:
@@ -166,9 +128,10 @@ class ai_random(ai_player):
             # Wait until a valid location is found
             not_accepted = True
             while not_accepted:
-                time.sleep(0.1)
+                if not interface.headless:
+                    time.sleep(0.1)
                 # Pick a random road ending and make sure it is not already owned, and can be built next to
-                rand_int = random.randint(0, len(road_endings) - 1)
+                rand_int = rng.randint(0, len(road_endings) - 1)
                 location = road_endings[rand_int]
                 if interface.get_buildings_list()[location][
                     "player"
@@ -177,16 +140,8 @@ class ai_random(ai_player):
                     return location
 
         elif building_type == "city":
-            settlements = []
-
             # Find all the settlements that the player owns
-            for building in interface.get_buildings_list():
-                if (
-                    interface.get_buildings_list()[building]["player"] == self
-                    and interface.get_buildings_list()[building]["building"]
-                    == "settlement"
-                ):
-                    settlements.append(building)
+            settlements = interface.get_player_settlements(self)
 
             # If the player has no settlements to upgrade, return False
             if len(settlements) == 0:
@@ -196,7 +151,7 @@ class ai_random(ai_player):
             not_accepted = True
             while not_accepted:
                 # Pick a random settlement and make sure it is owned by the player
-                rand_int = random.randint(0, len(settlements) - 1)
+                rand_int = rng.randint(0, len(settlements) - 1)
                 location = settlements[rand_int]
                 if (
                     interface.get_buildings_list()[location]["player"] == self
@@ -215,16 +170,17 @@ class ai_random(ai_player):
         :param interface: Interface object
         :return: None
         """
+        rng = interface.get_player_random(self)
         # Choose a random player to trade with
         players = interface.get_players()
         players.remove(self)
-        player = random.choice(players)
+        player = rng.choice(players)
 
         # Choose a random resource to give
-        giving = random.choice(list(interface.get_resources(self).keys()))
+        giving = rng.choice(list(interface.get_resources(self).keys()))
 
         # Choose a random resource to receive
-        receiving = random.choice(list(interface.get_resources(player).keys()))
+        receiving = rng.choice(list(interface.get_resources(player).keys()))
 
         # Offer the trade
         interface.offer_trade(self, player, giving, receiving)
@@ -237,7 +193,8 @@ class ai_random(ai_player):
         :param giving: The resource being given
         :return: True if accepted, False if rejected
         """
-        return random.uniform(0, 1) > 0.5
+        rng = interface.get_player_random(self)
+        return rng.uniform(0, 1) > 0.5
 
     def play_development_card(self, interface) -> None:
         """
@@ -245,13 +202,14 @@ class ai_random(ai_player):
         :param interface: Interface object
         :return: None
         """
+        rng = interface.get_player_random(self)
 
         development_cards_ = self.development_cards.copy()
         for card in self.gained_dev_cards_this_turn:
             development_cards_.remove(card)
 
         # Choose a random development card
-        card = random.choice(development_cards_)
+        card = rng.choice(development_cards_)
         # If a victory point card is chosen, return
         if card == "victory point":
             print("You can't play a victory point card!")
@@ -265,16 +223,14 @@ class ai_random(ai_player):
 
             # Play a monopoly card, choosing a random resource type
             elif card == "monopoly":
-                res_type = random.choice(["wheat", "sheep", "rock", "clay", "wood"])
+                res_type = rng.choice(["wheat", "sheep", "rock", "clay", "wood"])
                 interface.play_development_card(self, "monopoly", res_type)
 
             # Play a year of plenty card, choosing two random resource types
             elif card == "year of plenty":
                 res = []
                 for i in range(2):
-                    res.append(
-                        random.choice(["wheat", "sheep", "rock", "clay", "wood"])
-                    )
+                    res.append(rng.choice(["wheat", "sheep", "rock", "clay", "wood"]))
                 interface.play_development_card(self, "year of plenty", res[0], res[1])
 
             # Play a road building card, choosing two random road locations
@@ -287,35 +243,27 @@ class ai_random(ai_player):
         :param interface: Interface object
         :return: None
         """
+        rng = interface.get_player_random(self)
         tile_letters = []
 
         # Get a list of all the tiles that are not desert tiles and choose a random one
         for tile in interface.get_tiles_list():
             if tile.resource != "desert":
                 tile_letters.append(tile.letter)
-        interface.move_robber(tile_letters[random.randint(0, len(tile_letters) - 1)])
+        interface.move_robber(tile_letters[rng.randint(0, len(tile_letters) - 1)])
 
         # Get a list of all the players that can be stolen from
         players_to_steal_from = []
-        for key in interface.get_buildings_list():
-            value = interface.get_buildings_list()[key]
+        robber_tile = TILE_LETTERS.index(interface.get_robber_location())
+        for node in TOPOLOGY.tile_nodes[robber_tile]:
+            value = interface.get_buildings_list()[TOPOLOGY.node_names[node]]
+            # If there is a building owned by another player, add the player to the list of players to steal from
             if (
-                key.find(
-                    [
-                        tile_
-                        for tile_ in interface.get_tiles_list()
-                        if tile_.contains_robber
-                    ][0].letter
-                )
-                != -1
+                value["player"] is not None
+                and value["player"] not in players_to_steal_from
+                and value["player"] != self
             ):
-                # If the building is a settlement, add the player to the list of players to steal from
-                if (
-                    value["player"] is not None
-                    and value["player"] not in players_to_steal_from
-                    and value["player"] != self
-                ):
-                    players_to_steal_from.append(value["player"])
+                players_to_steal_from.append(value["player"])
 
         # If there are no players to steal from, return
         if len(players_to_steal_from) == 0:
@@ -326,7 +274,7 @@ class ai_random(ai_player):
         # If there are multiple players to steal from, choose a random one
         else:
             player_to_steal_from = players_to_steal_from[
-                random.randint(0, len(players_to_steal_from) - 1)
+                rng.randint(0, len(players_to_steal_from) - 1)
             ]
         # Steal a random resource from the chosen player
         interface.steal_from_player(player_to_steal_from, self)
@@ -337,10 +285,11 @@ class ai_random(ai_player):
         :param interface: Interface object
         :return: None
         """
+        rng = interface.get_player_random(self)
         # Randomly discard half of the player's resources
         required_length = len(self.resources) // 2
         while len(self.resources) > required_length:
-            rand_int = random.randint(0, len(self.resources) - 1)
+            rand_int = rng.randint(0, len(self.resources) - 1)
             interface.return_player_card(self, self.resources[rand_int])
 
     def turn_actions(self, interface) -> None:
@@ -349,6 +298,7 @@ class ai_random(ai_player):
         :param interface: Interface object
         :return: None
         """
+        rng = interface.get_player_random(self)
 
         # Variables used so that the player doesn't try to build a settlement, city or road if they can't and have already tried
         no_place_to_build_settlement = False
@@ -372,7 +322,7 @@ class ai_random(ai_player):
                 break
 
             # Choose a random move and log it
-            chosen_move = [random.choice(possible_moves)]
+            chosen_move = [rng.choice(possible_moves)]
             self.log(
                 "Round "
                 + str(interface.turn_number)
@@ -415,7 +365,7 @@ class ai_random(ai_player):
             # If the chosen move is to build a road, build a road
             elif (
                 "build road" in chosen_move
-                and random.randint((0 if len(self.resources) < 10 else 1), 1) == 1
+                and rng.randint((0 if len(self.resources) < 10 else 1), 1) == 1
                 and not no_place_to_build_road
             ):
                 # Choose a random location to build a road
@@ -446,7 +396,7 @@ class ai_random(ai_player):
                         if self.resources.count(card) >= 4
                     ),
                     # Choose a random card from the resource deck
-                    random.choice(list(interface.get_resource_deck())),
+                    rng.choice(list(interface.get_resource_deck())),
                 )
                 # Log the trade
                 self.log("Trade with bank - 4:1")
@@ -465,13 +415,13 @@ class ai_random(ai_player):
                     # Choose a random resource to trade with the port from the previously generated list
                     interface.trade_with_port(
                         self,
-                        random.choice(port_resources),
-                        random.choice(list(interface.get_resource_deck())),
+                        rng.choice(port_resources),
+                        rng.choice(list(interface.get_resource_deck())),
                     )
 
             elif "trade with player" in chosen_move:
                 # Choose a random player to trade with
-                player = random.choice(
+                player = rng.choice(
                     [
                         player
                         for player in interface.get_players_list()
@@ -482,13 +432,13 @@ class ai_random(ai_player):
                 interface.trade_with_player(
                     self,
                     player,
-                    random.choice(self.resources),
+                    rng.choice(self.resources),
                     # Choose a random card from the resource deck
-                    random.choice(interface.get_resource_deck()),
+                    rng.choice(interface.get_resource_deck()),
                 )
 
             # Choose a random development card to play
-            elif "play development card" in chosen_move and random.randint(0, 1) == 1:
+            elif "play development card" in chosen_move and rng.randint(0, 1) == 1:
                 self.play_development_card(interface)
                 self.log("Played development card")
                 self.entire_game_moves.append(
@@ -498,7 +448,7 @@ class ai_random(ai_player):
             # Choose to buy a random development card
             elif (
                 "buy development card" in chosen_move
-                and random.randint(0, (2 if len(self.resources) < 10 else 1)) == 1
+                and rng.randint(0, (2 if len(self.resources) < 10 else 1)) == 1
             ):
                 interface.buy_development_card(self)
                 self.log("Bought development card")
@@ -528,7 +478,7 @@ class ai_random(ai_player):
                 ]:
                     raise unknownMoveException(f"Unknown move: {chosen_move}")
 
-            if random.randint(0, 2) == 0:
+            if rng.randint(0, 2) == 0:
                 self.log("Ended turn")
                 self.entire_game_moves.append(
                     f"Turn {interface.turn_number}, VP {self.calculateVictoryPoints(interface)} - Ended turn"
@@ -7,18 +7,24 @@ One of the longest files, but mostly just due to the nice spacing of the arrays
 
 import ai_minimax
 from ai_minimax import *
+from ai_mcts import *
 from ai_random import *
 import random
+from game_random import game_random
+from node_economics import get_node_economics
 from tile import tile
+from topology import *
+from zobrist import ZOBRIST, hand_card_key
 
 
-def roll_dice():
+def roll_dice(rng=random):
     """
     Rolls the dice.
     Statistical distribution of dice rolls is maintained by combining two random numbers between 1 and 6
+    :param rng: The random number generator to roll with, usually the dice stream of the game
     :return: Dice roll result
     """
-    return [random.randint(1, 6), random.randint(1, 6)]
+    return [rng.randint(1, 6), rng.randint(1, 6)]
 
 
 # noinspection DuplicatedCode
@@ -26,12 +32,15 @@ class board:
 
     # Board Setup ---------------------------------------------------------------
 
-    def __init__(self, players: list[player], board_type="default"):
+    def __init__(self, players: list[player], board_type="default", rng=None):
         """
         Initialises the board.
         :param players: The list of players to be added to the board
         :param board_type: The board layout, either the default layout, or a randomised layout
+        :param rng: The random number streams of the game, or None for streams with a random seed
         """
+        if rng is None:
+            rng = game_random()
 
         self.game_number = [1, 1]
         self.players = players
@@ -41,7 +50,7 @@ class board:
 
         # Board Setup
 
-        self.resource_deck = []
+        self.resource_deck = resource_store()
         self.development_card_deck = []
 
         # These are pairs, to know who the player currently holding it is, and what the amount of either soldiers or roads is
@@ -83,97 +92,8 @@ class board:
         # Roads map contains the start and end reference, which player owns the road and
         # the symbol that needs to be printed to form the hexagons correctly
         self._roads = {
-            # Hex a
-            tuple(["a1", "a2"]): {"player": None, "symbol": r"-"},
-            tuple(["a2", "a,c"]): {"player": None, "symbol": r"\ "},
-            tuple(["a,c", "a,c,e"]): {"player": None, "symbol": r"/ "},
-            tuple(["a,c,e", "a,b,e"]): {"player": None, "symbol": r"-"},
-            tuple(["a,b,e", "a,b"]): {"player": None, "symbol": r"\ "},
-            tuple(["a,b", "a1"]): {"player": None, "symbol": r"/ "},
-            # Hex b
-            tuple(["a,b", "b1"]): {"player": None, "symbol": r"-"},
-            tuple(["b1", "b,d"]): {"player": None, "symbol": r"/"},
-            tuple(["b,d", "b,d,g"]): {"player": None, "symbol": r"\ "},
-            tuple(["b,d,g", "b,e,g"]): {"player": None, "symbol": r"-"},
-            tuple(["b,e,g", "a,b,e"]): {"player": None, "symbol": r"/"},
-            # Hex c
-            tuple(["a,c", "c1"]): {"player": None, "symbol": r"-"},
-            tuple(["c1", "c,f"]): {"player": None, "symbol": r"\ "},
-            tuple(["c,f", "c,f,h"]): {"player": None, "symbol": r"/"},
-            tuple(["c,f,h", "c,e,h"]): {"player": None, "symbol": r"-"},
-            tuple(["c,e,h", "a,c,e"]): {"player": None, "symbol": r"\ "},
-            # Hex d
-            tuple(["b,d,g", "d,g,i"]): {"player": None, "symbol": r"/"},
-            tuple(["d,g,i", "d,i"]): {"player": None, "symbol": r"-"},
-            tuple(["d,i", "d1"]): {"player": None, "symbol": r"\ "},
-            tuple(["d1", "d2"]): {"player": None, "symbol": r"/"},
-            tuple(["d2", "b,d"]): {"player": None, "symbol": r"-"},
-            # Hex e
-            tuple(["c,e,h", "e,h,j"]): {"player": None, "symbol": r"/"},
-            tuple(["e,h,j", "e,g,j"]): {"player": None, "symbol": r"-"},
-            tuple(["e,g,j", "b,e,g"]): {"player": None, "symbol": r"\ "},
-            # Hex f
-            tuple(["c,f", "f1"]): {"player": None, "symbol": r"-"},
-            tuple(["f1", "f2"]): {"player": None, "symbol": r"\ "},
-            tuple(["f2", "f,k"]): {"player": None, "symbol": r"/"},
-            tuple(["f,k", "f,h,k"]): {"player": None, "symbol": r"-"},
-            tuple(["f,h,k", "c,f,h"]): {"player": None, "symbol": r"\ "},
-            # Hex g
-            tuple(["e,g,j", "g,j,l"]): {"player": None, "symbol": r"/"},
-            tuple(["g,j,l", "g,i,l"]): {"player": None, "symbol": r"-"},
-            tuple(["g,i,l", "d,g,i"]): {"player": None, "symbol": r"\ "},
-            # Hex h
-            tuple(["f,h,k", "h,k,m"]): {"player": None, "symbol": r"/"},
-            tuple(["h,k,m", "h,j,m"]): {"player": None, "symbol": r"-"},
-            tuple(["h,j,m", "e,h,j"]): {"player": None, "symbol": r"\ "},
-            # Hex i
-            tuple(["g,i,l", "i,l,n"]): {"player": None, "symbol": r"/"},
-            tuple(["i,l,n", "i,n"]): {"player": None, "symbol": r"-"},
-            tuple(["i,n", "i1"]): {"player": None, "symbol": r"\ "},
-            tuple(["i1", "d,i"]): {"player": None, "symbol": r"/"},
-            # Hex j
-            tuple(["h,j,m", "j,m,o"]): {"player": None, "symbol": r"/"},
-            tuple(["j,m,o", "j,l,o"]): {"player": None, "symbol": r"-"},
-            tuple(["j,l,o", "g,j,l"]): {"player": None, "symbol": r"\ "},
-            # Hex k
-            tuple(["f,k", "k1"]): {"player": None, "symbol": r"\ "},
-            tuple(["k1", "k,p"]): {"player": None, "symbol": r"/"},
-            tuple(["k,p", "k,m,p"]): {"player": None, "symbol": r"-"},
-            tuple(["k,m,p", "h,k,m"]): {"player": None, "symbol": r"\ "},
-            # Hex l
-            tuple(["j,l,o", "l,o,q"]): {"player": None, "symbol": r"/"},
-            tuple(["l,o,q", "l,n,q"]): {"player": None, "symbol": r"-"},
-            tuple(["l,n,q", "i,l,n"]): {"player": None, "symbol": r"\ "},
-            # Hex m
-            tuple(["k,m,p", "m,p,r"]): {"player": None, "symbol": r"/"},
-            tuple(["m,p,r", "m,o,r"]): {"player": None, "symbol": r"-"},
-            tuple(["m,o,r", "j,m,o"]): {"player": None, "symbol": r"\ "},
-            # Hex n
-            tuple(["l,n,q", "n,q"]): {"player": None, "symbol": r"/"},
-            tuple(["n,q", "n1"]): {"player": None, "symbol": r"-"},
-            tuple(["n1", "n2"]): {"player": None, "symbol": r"\ "},
-            tuple(["n2", "i,n"]): {"player": None, "symbol": r"/"},
-            # Hex o
-            tuple(["m,o,r", "o,r,s"]): {"player": None, "symbol": r"/"},
-            tuple(["o,r,s", "o,q,s"]): {"player": None, "symbol": r"-"},
-            tuple(["o,q,s", "l,o,q"]): {"player": None, "symbol": r"\ "},
-            # Hex p
-            tuple(["k,p", "p1"]): {"player": None, "symbol": r"\ "},
-            tuple(["p1", "p2"]): {"player": None, "symbol": r"/"},
-            tuple(["p2", "p,r"]): {"player": None, "symbol": r"-"},
-            tuple(["p,r", "m,p,r"]): {"player": None, "symbol": r"\ "},
-            # Hex q
-            tuple(["o,q,s", "q,s"]): {"player": None, "symbol": r"/"},
-            tuple(["q,s", "q1"]): {"player": None, "symbol": r"-"},
-            tuple(["q1", "n,q"]): {"player": None, "symbol": r"\ "},
-            # Hex r
-            tuple(["p,r", "r1"]): {"player": None, "symbol": r"/"},
-            tuple(["r1", "r,s"]): {"player": None, "symbol": r"-"},
-            tuple(["r,s", "o,r,s"]): {"player": None, "symbol": r"\ "},
-            # Hex s
-            tuple(["r,s", "s1"]): {"player": None, "symbol": r"/"},
-            tuple(["s1", "s2"]): {"player": None, "symbol": r"-"},
-            tuple(["s2", "q,s"]): {"player": None, "symbol": r"\ "},
+            tuple(edge): {"player": None, "symbol": symbol}
+            for edge, symbol in ROAD_LAYOUT
         }
 
         # Ports, with the key being the two nodes that the port is between
@@ -285,13 +205,13 @@ class board:
                 "j",
             ]
 
-            potential_tiles = random.sample(potential_tiles, len(potential_tiles))
+            potential_tiles = rng.layout.sample(potential_tiles, len(potential_tiles))
 
             # Iterate through the letter order and get a random tile for each position
             for letter in letter_order_circular:
                 # Get random tile
                 tile_type = potential_tiles.pop(
-                    random.choice(range(len(potential_tiles)))
+                    rng.layout.choice(range(len(potential_tiles)))
                 )
                 if tile_type == "desert":
                     number = 7
@@ -305,342 +225,57 @@ class board:
             # Shuffle the port order by reassigning the keys and items in the dictionary
             port_keys = list(self._ports.keys())
             port_values = list(self._ports.values())
-            random.shuffle(port_values)
+            rng.layout.shuffle(port_values)
             self._ports = dict(zip(port_keys, port_values))
 
         # Buildings map contains a grid reference, the building type, and the player who owns it.
         # Also contains the tile type, so that the resources to give can be calculated easily
         # Needs to be created after the tiles have been created
         self._buildings = {
-            "a1": {
+            node: {
                 "player": None,
                 "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["a"]],
-            },
-            "a2": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["a"]],
-            },
-            "b1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["b"]],
-            },
-            "a,b": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["a", "b"]],
-            },
-            "a,c": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["a", "c"]],
-            },
-            "c1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["c"]],
-            },
-            "d2": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["d"]],
-            },
-            "b,d": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["b", "d"]],
-            },
-            "a,b,e": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["a", "b", "c"]
-                ],
-            },
-            "a,c,e": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["a", "c", "e"]
-                ],
-            },
-            "c,f": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["c", "f"]],
-            },
-            "f1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["f"]],
-            },
-            "d1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["d"]],
-            },
-            "b,d,g": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["b", "d", "g"]
-                ],
-            },
-            "b,e,g": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["b", "e", "g"]
-                ],
-            },
-            "c,e,h": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["c", "e", "h"]
-                ],
-            },
-            "c,f,h": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["c", "f", "h"]
-                ],
-            },
-            "f2": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["f"]],
-            },
-            "d,i": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["d", "i"]],
-            },
-            "d,g,i": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["d", "g", "i"]
-                ],
-            },
-            "e,g,j": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["e", "g", "j"]
-                ],
-            },
-            "e,h,j": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["e", "h", "j"]
-                ],
-            },
-            "f,h,k": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["f", "h", "k"]
-                ],
-            },
-            "f,k": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["f", "k"]],
-            },
-            "i1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["i"]],
-            },
-            "g,i,l": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["g", "i", "l"]
-                ],
-            },
-            "g,j,l": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["g", "j", "l"]
-                ],
-            },
-            "h,j,m": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["h", "j", "m"]
-                ],
-            },
-            "h,k,m": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["h", "k", "m"]
-                ],
-            },
-            "k1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["k"]],
-            },
-            "i,n": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["i", "n"]],
-            },
-            "i,l,n": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["i", "l", "n"]
-                ],
-            },
-            "j,l,o": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["j", "l", "o"]
-                ],
-            },
-            "j,m,o": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["j", "m", "o"]
-                ],
-            },
-            "k,m,p": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["k", "m", "p"]
-                ],
-            },
-            "k,p": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["k", "p"]],
-            },
-            "n2": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["n"]],
-            },
-            "l,n,q": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["l", "n", "q"]
-                ],
-            },
-            "l,o,q": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["l", "o", "q"]
-                ],
-            },
-            "m,o,r": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["m", "o", "r"]
-                ],
-            },
-            "m,p,r": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["m", "p", "r"]
-                ],
-            },
-            "p1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["p"]],
-            },
-            "n1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["n"]],
-            },
-            "n,q": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["n", "q"]],
-            },
-            "o,q,s": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["o", "q", "s"]
-                ],
-            },
-            "o,r,s": {
-                "player": None,
-                "building": None,
-                "tiles": [
-                    tile_ for tile_ in self.tiles if tile_.letter in ["o", "r", "s"]
-                ],
-            },
-            "p,r": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["p", "r"]],
-            },
-            "p2": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["p"]],
-            },
-            "q1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["q"]],
-            },
-            "q,s": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["q", "s"]],
-            },
-            "r,s": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["r", "s"]],
-            },
-            "r1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["r"]],
-            },
-            "s2": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["s"]],
-            },
-            "s1": {
-                "player": None,
-                "building": None,
-                "tiles": [tile_ for tile_ in self.tiles if tile_.letter in ["s"]],
-            },
+                "tiles": [self.tiles[tile_id] for tile_id in TOPOLOGY.node_tiles[i]],
+            }
+            for i, node in enumerate(TOPOLOGY.node_names)
         }
 
+        # The same entries as the maps above, but indexed by the IDs from the topology
+        # These share the dictionaries with the maps, so updating one updates the other
+        self._node_state = [self._buildings[node] for node in TOPOLOGY.node_names]
+        self._edge_state = [self._roads[edge] for edge in TOPOLOGY.edge_names]
+        self._port_state = [self._ports[edge] for edge in PORT_EDGES]
+
+        # Ownership indexes, keyed by player number, holding the IDs of everything each player owns
+        # Kept up to date by the board interface whenever a road or building is placed
+        self.player_roads = {player_.number: set() for player_ in players}
+        self.player_settlements = {player_.number: set() for player_ in players}
+        self.player_cities = {player_.number: set() for player_ in players}
+        self.player_ports = {player_.number: set() for player_ in players}
+
+        # Zobrist hash of the layout, buildings, roads and robber
+        # Kept up to date by the board interface, so that the search can hash a position without visiting the board
+        self.zobrist = self.compute_zobrist()
+
+        # Player number -> Zobrist hash of the cards in the player's hand, see compute_hand_keys
+        # Kept up to date by the board interface during a search, and computed again when a search starts, as the game
+        # changes hands in ways that are not tracked, e.g. clearing the development cards gained at the end of a turn
+        self.hand_keys = self.compute_hand_keys()
+
+        # Production table, mapping each roll to the resources each player gets from it, see compute_production
+        # Built the first time the dice are rolled, and kept up to date by the board interface after that
+        # Set back to None when the board is changed in a way that is not tracked, e.g. by undoing a search move
+        self.production = None
+
+        # Table of how good each node is to build on, see get_node_economics
+        # Looked up the first time it is needed, as the layout does not change after this
+        self._node_economics = None
+
         # Add the required cards to their decks
 
         # Resource Deck
-        for i in range(19):
-            self.resource_deck.append("wheat")
-            self.resource_deck.append("wood")
-            self.resource_deck.append("sheep")
-            self.resource_deck.append("clay")
-            self.resource_deck.append("rock")
+        for resource in RESOURCES:
+            self.resource_deck.add(resource, 19)
 
         # Development Card Deck
         for i in range(14):
@@ -655,8 +290,7 @@ class board:
             self.development_card_deck.append("victory point")
 
         # Shuffle and Sort Decks
-        self.resource_deck.sort()
-        self.development_card_deck = random.sample(
+        self.development_card_deck = rng.deck.sample(
             self.development_card_deck, len(self.development_card_deck)
         )
 
@@ -664,43 +298,175 @@ class board:
 
     # Helper Functions
 
+    def compute_zobrist(self) -> int:
+        """
+        Computes the Zobrist hash of the board from scratch
+        The layout is included so that positions on different boards do not share a hash
+        :return: The hash
+        """
+        value = 0
+        for tile_id, tile_ in enumerate(self.tiles):
+            value ^= ZOBRIST.key("tile", tile_id, tile_.resource, tile_.dice_number)
+            if tile_.contains_robber:
+                value ^= ZOBRIST.key("robber", tile_id)
+        for slot, port in enumerate(self._port_state):
+            if port is not None:
+                value ^= ZOBRIST.key("port", slot, port["resource"])
+        for node, item in enumerate(self._node_state):
+            if item["player"] is not None:
+                value ^= ZOBRIST.key(
+                    "node", node, item["player"].number, item["building"]
+                )
+        for edge, item in enumerate(self._edge_state):
+            if item["player"] is not None:
+                value ^= ZOBRIST.key("edge", edge, item["player"].number)
+        return value
+
+    def compute_hand_keys(self) -> dict:
+        """
+        Computes the Zobrist hash of each player's hand from scratch
+        The hash covers the number of each resource card, development card and development card gained this turn
+        :return: A dict of player number to the hash of their hand
+        """
+        hand_keys = {}
+        for player_ in self.players:
+            value = 0
+            for card, amount in player_.resources.counts().items():
+                value ^= hand_card_key("resource", player_.number, card, amount)
+            for kind, cards in (
+                ("development card", player_.development_cards),
+                ("gained development card", player_.gained_dev_cards_this_turn),
+            ):
+                for card in set(cards):
+                    value ^= hand_card_key(
+                        kind, player_.number, card, cards.count(card)
+                    )
+            hand_keys[player_.number] = value
+        return hand_keys
+
+    def compute_production(self) -> dict:
+        """
+        Computes the production table from scratch
+        The table maps each roll to {player number: {resource: amount}}, for every tile that does not have the robber
+        :return: The production table
+        """
+        production = {roll: {} for roll in range(2, 13)}
+        for node, item in enumerate(self._node_state):
+            if item["player"] is not None:
+                amount = 2 if item["building"] == "city" else 1
+                self.add_node_production(
+                    production, node, item["player"].number, amount
+                )
+        return production
+
+    def add_node_production(self, production, node, number, amount) -> None:
+        """
+        Adds what a building produces to a production table, from every tile around it without the robber
+        :param production: The production table
+        :param node: The node ID of the building
+        :param number: The number of the player who owns the building
+        :param amount: The number of cards to add for each tile, negative to remove them
+        :return: None
+        """
+        for tile_id in TOPOLOGY.node_tiles[node]:
+            tile_ = self.tiles[tile_id]
+            if tile_.resource != "desert" and not tile_.contains_robber:
+                self.add_production(
+                    production[tile_.dice_number], number, tile_.resource, amount
+                )
+
+    def add_tile_production(self, production, tile_id, sign) -> None:
+        """
+        Adds what a tile produces for every building around it to a production table
+        Used when the robber moves onto or off the tile
+        :param production: The production table
+        :param tile_id: The ID of the tile
+        :param sign: 1 to add the tile's production, -1 to remove it
+        :return: None
+        """
+        tile_ = self.tiles[tile_id]
+        if tile_.resource == "desert":
+            return
+        for node in TOPOLOGY.tile_nodes[tile_id]:
+            item = self._node_state[node]
+            if item["player"] is not None:
+                amount = 2 if item["building"] == "city" else 1
+                self.add_production(
+                    production[tile_.dice_number],
+                    item["player"].number,
+                    tile_.resource,
+                    sign * amount,
+                )
+
+    @staticmethod
+    def add_production(payouts, number, resource, amount) -> None:
+        """
+        Changes one entry of a roll's payouts, removing entries that reach zero
+        :param payouts: The payouts for the roll, {player number: {resource: amount}}
+        :param number: The player number
+        :param resource: The resource
+        :param amount: The amount to add
+        :return: None
+        """
+        player_payouts = payouts.setdefault(number, {})
+        player_payouts[resource] = player_payouts.get(resource, 0) + amount
+        if not player_payouts[resource]:
+            del player_payouts[resource]
+            if not player_payouts:
+                del payouts[number]
+
     def calculate_resource_rarity(self):
         """
         Calculates the rarity of each resource on the board. The higher the number, the more rare
-        This function isn't actually used, but it could be used to help the AI make decisions
         :return: A dictionary with the resource as the key and the rarity as the value.
         """
-        resource_rarity_scores = {
-            "wood": 0,
-            "clay": 0,
-            "sheep": 0,
-            "wheat": 0,
-            "rock": 0,
-        }
-        for tile in self.tiles:
-            if tile.resource != "desert":
-                # Add the frequency of the resource to the score
-                # The higher the frequency, the less rare the resource, therefore the score is subtracted from 6
-                resource_rarity_scores[tile.resource] += 6 - tile.frequency
-
-        # Create the final scores by averaging the scores for each resource
-        resource_rarity_scores = {
-            resource: scores / sum(resource_rarity_scores.values())
-            for resource, scores in resource_rarity_scores.items()
-        }
+        return self.get_node_economics().rarity.copy()
 
-        # Normalise the scores
-        normalised_scores = {}
-        print(resource_rarity_scores)
-        for item, score in resource_rarity_scores.items():
-            # Simple formula for normalisation adapted for the scores here
-            normalised_score = (score - min(resource_rarity_scores.values())) / (
-                max(resource_rarity_scores.values())
-                - min(resource_rarity_scores.values())
+    def set_layout(self, tiles, ports) -> None:
+        """
+        Replaces the tiles and ports of a board that nothing has been built on yet, e.g. to rebuild a recorded game
+        :param tiles: The letter, resource and dice number of each tile, sorted by letter
+        :param ports: The resource of the port in each port slot, "any" for a 3:1 port, or None for no port
+        :return: None
+        """
+        self.tiles = [
+            tile(dice_number, letter, resource)
+            for letter, resource, dice_number in tiles
+        ]
+        for node, item in enumerate(self._node_state):
+            item["tiles"] = [
+                self.tiles[tile_id] for tile_id in TOPOLOGY.node_tiles[node]
+            ]
+
+        # Every port of a resource looks the same, so the new ports are copied from the current ones
+        templates = {
+            port["resource"]: port for port in self._ports.values() if port is not None
+        }
+        for edge, resource in zip(PORT_EDGES, ports):
+            self._ports[edge] = (
+                None if resource is None else dict(templates[resource], player=None)
             )
-            normalised_scores.update({item: normalised_score})
-        # print(normalised_scores)
-        return normalised_scores
+        self._port_state = [self._ports[edge] for edge in PORT_EDGES]
+
+        self.zobrist = self.compute_zobrist()
+        self.production = None
+        self._node_economics = None
+
+    def get_node_economics(self):
+        """
+        Gets the table of how good each node is to build on, see node_economics
+        The table is shared by every board with the same layout, and is looked up again after the board is copied
+        :return: The node economics of the layout
+        """
+        if self._node_economics is None:
+            self._node_economics = get_node_economics(self.tiles, self._port_state)
+        return self._node_economics
+
+    def __getstate__(self):
+        # The node economics are left out when the board is copied, as they are looked up again from the layout
+        state = self.__dict__.copy()
+        state["_node_economics"] = None
+        return state
 
     # Printing the Board -------------------------------------------------------
 
@@ -10,6 +10,9 @@ from board import *
 
 import logging
 
+# Victory points for each type of building
+BUILDING_VICTORY_POINTS = {"settlement": 1, "city": 2}
+
 
 class board_interface:
     board: board
@@ -23,12 +26,16 @@ class board_interface:
             super().__init__(self.message)
             raise self
 
-    def __init__(self, players: list[player], game_number: list[int] = [0, 0]):
+    def __init__(
+        self, players: list[player], game_number: list[int] = [0, 0], seed=None
+    ):
         """
         Initialises a board_interface object.
         Object is used to interact with the board object in a standardised way e.g. takes cards from a player
         Acts similarly to a board master
         :param players: A list of players
+        :param game_number: The number of the game and the number of games
+        :param seed: The seed of the game's random numbers, or None for a random seed
         """
         # Initialise board
 
@@ -38,14 +45,27 @@ class board_interface:
         # Setup mode is used to allow the placing of settlements and roads without the need for resources
         self.setup_mode = False
 
+        # Records the rolls and moves of the game, see game_record.game_recorder
+        # None = the game is not recorded, which is always the case for the copies made by the searches
+        self.recorder = None
+
+        # The random number streams of the game, see game_random
+        # Copied along with the interface, so a search draws from its own copy and does not change the real game
+        self.rng = game_random(seed)
+
         # Define the board object
-        self.board = board(board_type=CONFIG["board_layout"], players=players)
+        self.board = board(
+            board_type=CONFIG["board_layout"], players=players, rng=self.rng
+        )
         self.turn_number = 0
         self.board.game_number = game_number
 
         self.all_players_ai = all(isinstance(player, ai_player) for player in players)
         self.board.all_players_ai = self.all_players_ai
 
+        # Headless mode is used to play games between AI players without any output or pauses
+        self.headless = CONFIG["headless_mode"] and self.all_players_ai
+
         # Clear log file
         with open("logs/board_actions.log", "w") as f:
             pass
@@ -101,6 +121,16 @@ class board_interface:
                     return False
         return True
 
+    def __getstate__(self):
+        """
+        Gets the state of the interface for pickling, leaving out the recorder
+        Copies are only used by the searches, so their moves must not be recorded
+        :return: The state
+        """
+        state = self.__dict__.copy()
+        state["recorder"] = None
+        return state
+
     def __deepcopy__(self, memodict={}):
         """
         Deep copies the board_interface object
@@ -128,6 +158,24 @@ class board_interface:
         :return:
         """
         self.minimax_mode = state
+        # The search keeps the hand keys up to date from here on, so they are made correct before it starts
+        if state:
+            self.board.hand_keys = self.board.compute_hand_keys()
+
+    def update_hand_key(self, player_, kind, card, before, after) -> None:
+        """
+        Updates a player's hand key after the number of one of their cards has changed
+        :param player_: The player
+        :param kind: The kind of card - resource, development card or gained development card
+        :param card: The card
+        :param before: The number of the card the player held before the change
+        :param after: The number of the card the player holds after the change
+        :return: None
+        """
+        if before != after:
+            self.board.hand_keys[player_.number] ^= hand_card_key(
+                kind, player_.number, card, before
+            ) ^ hand_card_key(kind, player_.number, card, after)
 
     # Getters and Setters
     # Used to get and set the state of the board
@@ -146,6 +194,26 @@ class board_interface:
         """
         return self.board.players
 
+    def get_player(self, number) -> player:
+        """
+        Gets a player on this board by their number
+        Useful when working with a copy of the interface, as the copy has its own player objects
+        :param number: The player number
+        :return: The player with that number
+        """
+        for player_ in self.board.players:
+            if player_.number == number:
+                return player_
+        raise Exception(f"Could not find player {number}")
+
+    def get_player_random(self, player_: player) -> random.Random:
+        """
+        Gets the random number stream of a player's decisions in this game
+        :param player_: The player
+        :return: The stream
+        """
+        return self.rng.player(player_.number)
+
     def get_tiles_list(self) -> list[tile]:
         """
         Gets the list of tiles
@@ -198,6 +266,22 @@ class board_interface:
         """
         return self.board.longest_road
 
+    def get_node_economics(self):
+        """
+        Gets the table of how good each node is to build on, see node_economics
+        :return: The node economics of the board
+        """
+        return self.board.get_node_economics()
+
+    def set_layout(self, tiles, ports) -> None:
+        """
+        Replaces the tiles and ports of the board before the game starts, see board.set_layout
+        :param tiles: The letter, resource and dice number of each tile, sorted by letter
+        :param ports: The resource of the port in each port slot, or None for no port
+        :return: None
+        """
+        self.board.set_layout(tiles, ports)
+
     def get_robber_location(self) -> str:
         """
         Gets the location of the robber by searching through the tiles
@@ -239,6 +323,8 @@ class board_interface:
         :param print_letters: Whether to print the letters on the board for placing settlements
         :return: None
         """
+        if self.headless:
+            return
         self.board.print_board(print_letters)
 
     def has_potential_road(self, player_) -> bool:
@@ -247,12 +333,7 @@ class board_interface:
         :param player_: The player to check
         :return: Whether the number of potential roads is greater than 0
         """
-        road_endings = []
-        for road in self.board._roads:
-            if self.board._roads[road]["player"] == player_:
-                road_endings.append(road[0])
-                road_endings.append(road[1])
-        return len(road_endings) > 0
+        return len(self.board.player_roads[player_.number]) > 0
 
     def move_robber(self, location) -> None:
         """
@@ -262,14 +343,23 @@ class board_interface:
         """
         if not self.minimax_mode:
             self.log_action(f"Moving robber to '{location}'")
-        for tile_ in self.board.tiles:
+        production = self.board.production
+        for tile_id, tile_ in enumerate(self.board.tiles):
             if tile_.contains_robber:
                 tile_.contains_robber = False
-        for tile_ in self.board.tiles:
+                self.board.zobrist ^= ZOBRIST.key("robber", tile_id)
+                if production is not None:
+                    self.board.add_tile_production(production, tile_id, 1)
+        for tile_id, tile_ in enumerate(self.board.tiles):
             if tile_.letter == location:
                 if not self.minimax_mode:
                     self.log_action(f"Moved robber to {location}")
+                if self.recorder is not None:
+                    self.recorder.robber(tile_id)
                 tile_.contains_robber = True
+                self.board.zobrist ^= ZOBRIST.key("robber", tile_id)
+                if production is not None:
+                    self.board.add_tile_production(production, tile_id, -1)
 
     def steal_from_player(
         self, player_to_steal_from: player, player_to_give_to: player
@@ -284,12 +374,23 @@ class board_interface:
         if len(player_to_steal_from.resources) > 0:
             # Remove and give the card within the function
             card = player_to_steal_from.resources.pop(
-                random.randint(0, len(player_to_steal_from.resources) - 1)
+                self.rng.steal.randint(0, len(player_to_steal_from.resources) - 1)
             )
             player_to_give_to.resources.append(card)
-            self.log_action(
-                f"{player_to_give_to.name} stole a {card} from {player_to_steal_from.name}"
+            amount = player_to_steal_from.resources.count(card)
+            self.update_hand_key(
+                player_to_steal_from, "resource", card, amount + 1, amount
+            )
+            amount = player_to_give_to.resources.count(card)
+            self.update_hand_key(
+                player_to_give_to, "resource", card, amount - 1, amount
             )
+            if self.recorder is not None:
+                self.recorder.steal(player_to_give_to, player_to_steal_from, card)
+            if not self.minimax_mode:
+                self.log_action(
+                    f"{player_to_give_to.name} stole a {card} from {player_to_steal_from.name}"
+                )
             if not self.all_players_ai:
                 if not self.minimax_mode:
                     print(
@@ -309,35 +410,134 @@ class board_interface:
         :param structure: The structure to count
         :return: The number of that structure that the player has
         """
-        count = 0
         if structure == "road":
-            for road in self.get_roads_list():
-                if self.get_roads_list()[road]["player"] is not None:
-                    if self.get_roads_list()[road]["player"].number == player_.number:
-                        count += 1
-            return count
-        for building in self.get_buildings_list():
-            if self.get_buildings_list()[building]["player"] is not None:
-                if (
-                    self.get_buildings_list()[building]["player"].number
-                    == player_.number
-                ):
-                    if self.get_buildings_list()[building] == structure:
-                        count += 1
-        return count
+            return len(self.board.player_roads[player_.number])
+        elif structure == "settlement":
+            return len(self.board.player_settlements[player_.number])
+        elif structure == "city":
+            return len(self.board.player_cities[player_.number])
+        return 0
 
-    def get_player_roads(self, player_):
+    def get_player_roads(self, player_) -> list:
         """
         Gets all the roads of a player
         :param player_: The player to check
-        :return: A list of all the roads the player has
+        :return: A list of all the roads the player has, in the same order as the roads list
+        """
+        return [
+            TOPOLOGY.edge_names[edge]
+            for edge in sorted(self.board.player_roads[player_.number])
+        ]
+
+    def get_player_settlements(self, player_) -> list:
+        """
+        Gets all the settlements of a player
+        :param player_: The player to check
+        :return: A list of the locations of the player's settlements
+        """
+        return [
+            TOPOLOGY.node_names[node]
+            for node in sorted(self.board.player_settlements[player_.number])
+        ]
+
+    def get_player_cities(self, player_) -> list:
+        """
+        Gets all the cities of a player
+        :param player_: The player to check
+        :return: A list of the locations of the player's cities
         """
-        roads = []
-        for road in self.get_roads_list():
-            if self.get_roads_list()[road]["player"] is not None:
-                if self.get_roads_list()[road]["player"].number == player_.number:
-                    roads.append(road)
-        return roads
+        return [
+            TOPOLOGY.node_names[node]
+            for node in sorted(self.board.player_cities[player_.number])
+        ]
+
+    def get_player_buildings(self, player_) -> list:
+        """
+        Gets all the settlements and cities of a player
+        :param player_: The player to check
+        :return: A list of the locations of the player's buildings, in the same order as the buildings list
+        """
+        return [
+            TOPOLOGY.node_names[node]
+            for node in sorted(
+                self.board.player_settlements[player_.number]
+                | self.board.player_cities[player_.number]
+            )
+        ]
+
+    def get_player_ports(self, player_) -> list:
+        """
+        Gets all the ports a player has claimed
+        :param player_: The player to check
+        :return: A list of (port location, port) pairs, in the same order as the ports list
+        """
+        return [
+            (PORT_EDGES[slot], self.board._port_state[slot])
+            for slot in sorted(self.board.player_ports[player_.number])
+        ]
+
+    def set_building(self, player_, location, building) -> None:
+        """
+        Puts a building on the board and updates the ownership indexes, including any ports the building claims
+        Does not check whether the placement is legal or take any resources
+        :param player_: The player who owns the building
+        :param location: The location of the building
+        :param building: The type of building, either "settlement" or "city"
+        :return: None
+        """
+        node = TOPOLOGY.node_ids[location]
+        item = self.board._node_state[node]
+        production = self.board.production
+        if item["player"] is not None:
+            item["player"].victory_points -= BUILDING_VICTORY_POINTS[item["building"]]
+            self.board.zobrist ^= ZOBRIST.key(
+                "node", node, item["player"].number, item["building"]
+            )
+            if production is not None:
+                amount = 2 if item["building"] == "city" else 1
+                self.board.add_node_production(
+                    production, node, item["player"].number, -amount
+                )
+        self.board.zobrist ^= ZOBRIST.key("node", node, player_.number, building)
+        if production is not None:
+            amount = 2 if building == "city" else 1
+            self.board.add_node_production(production, node, player_.number, amount)
+        item.update({"player": player_, "building": building})
+        player_.victory_points += BUILDING_VICTORY_POINTS[building]
+        if building == "city":
+            self.board.player_settlements[player_.number].discard(node)
+            self.board.player_cities[player_.number].add(node)
+            return
+
+        self.board.player_settlements[player_.number].add(node)
+
+        # Check for ports and update them
+        for slot in TOPOLOGY.node_ports[node]:
+            # Technically there is no need to check the owner, as no player can even attempt to place a settlement on
+            # a port that someone else has already built near
+            if self.board._port_state[slot] is not None:
+                self.board._port_state[slot].update({"player": player_})
+                self.board.player_ports[player_.number].add(slot)
+                if not self.minimax_mode:
+                    self.log_action(
+                        f"{player_.name} has claimed a port at {PORT_EDGES[slot]}"
+                    )
+
+    def set_road(self, player_, location) -> None:
+        """
+        Puts a road on the board and updates the ownership indexes
+        Does not check whether the placement is legal or take any resources
+        :param player_: The player who owns the road
+        :param location: The location of the road
+        :return: None
+        """
+        edge = TOPOLOGY.edge_id(location)
+        item = self.board._edge_state[edge]
+        if item["player"] is not None:
+            self.board.zobrist ^= ZOBRIST.key("edge", edge, item["player"].number)
+        self.board.zobrist ^= ZOBRIST.key("edge", edge, player_.number)
+        item.update({"player": player_})
+        self.board.player_roads[player_.number].add(edge)
 
     def check_for_nearby_settlements(self, position) -> bool:
         """
@@ -345,54 +545,25 @@ class board_interface:
         :param position: The coordinates to check
         :return: True if there are settlements or cities within 1 hex of the given coordinates, False otherwise.
         """
-        position_to_check = [position]
-        for road, details in self.board._roads.items():
-            if position in road:
-                position_to_check.append(road[0])
-                position_to_check.append(road[1])
-        position_to_check = list(set(position_to_check))
-        for coord in position_to_check:
-            if self.get_buildings_list()[coord]["player"] is not None:
+        node_state = self.board._node_state
+        node = TOPOLOGY.node_ids[position]
+        if node_state[node]["player"] is not None:
+            return True
+        for neighbour in TOPOLOGY.node_adjacent[node]:
+            if node_state[neighbour]["player"] is not None:
                 return True
         return False
 
     def get_distance_between_nodes(self, node1, node2) -> int:
         """
-        Returns the distance between two nodes using Dijkstra's algorithm
+        Returns the distance between two nodes, from the distance table in the topology
         :param node1: The first node
         :param node2: The second node
         :return: The distance between the two nodes
         """
-        # https://en.wikipedia.org/wiki/Dijkstra%27s_algorithm
-
-        # Initialize the distances to be infinite
-        nodes = self.get_buildings_list().keys()
-        edges = self.get_roads_list().keys()
-        distances = {}
-        previous = {}
-        for node in nodes:
-            distances[node] = 1000000
-            previous[node] = None
-        distances[node1] = 0
-        unvisited = list(nodes)
-
-        # Iterate through the nodes
-        while unvisited:
-            current = min(unvisited, key=lambda node: distances[node])
-            unvisited.remove(current)
-            # If we've reached the second node, stop
-            if current == node2:
-                break
-            # Otherwise, iterate through the edges
-            for edge in edges:
-                if current in edge:
-                    neighbour = edge[0] if edge[1] == current else edge[1]
-                    if neighbour in unvisited:
-                        alt = distances[current] + 1
-                        if alt < distances[neighbour]:
-                            distances[neighbour] = alt
-                            previous[neighbour] = current
-        return distances[node2]
+        return TOPOLOGY.node_distances[TOPOLOGY.node_ids[node1]][
+            TOPOLOGY.node_ids[node2]
+        ]
 
     def are_nodes_connected(self, node1, node2, player_):
         """
@@ -402,22 +573,42 @@ class board_interface:
         :param player_:
         :return: Bool
         """
-        clusters = return_clusters(self.get_player_roads(player_))
-        found_1, found_2 = False, False
-        for cluster in clusters:
-            found_1, found_2 = False, False
-            for road in cluster:
-                if node1 == road[0] or node1 == road[1]:
-                    found_1 = True
-                if node2 == road[0] or node2 == road[1]:
-                    found_2 = True
-        return found_1 and found_2
+        node1, node2 = TOPOLOGY.node_ids[node1], TOPOLOGY.node_ids[node2]
+        for cluster in road_clusters(self.board.player_roads[player_.number]):
+            nodes = {node for edge in cluster for node in TOPOLOGY.edge_nodes[edge]}
+            if node1 in nodes and node2 in nodes:
+                return True
+        return False
+
+    def get_longest_road_length(self, player_) -> int:
+        """
+        Gets the length of a player's longest road
+        Other players' settlements and cities break the road, and the result is cached until the player's roads or
+        the buildings on them change
+        :param player_: The player to check
+        :return: The number of roads in the longest road
+        """
+        roads = self.board.player_roads[player_.number]
+        node_state = self.board._node_state
+        blocked = set()
+        for edge in roads:
+            for node in TOPOLOGY.edge_nodes[edge]:
+                owner = node_state[node]["player"]
+                if owner is not None and owner.number != player_.number:
+                    blocked.add(node)
+        return longest_road_length(roads, blocked)
 
     def verify_game_integrity(self) -> None:
         """
         Check that the game is in a valid state
+        Headless games are not checked, as comparing the interface with a copy of it on every turn and every 7 is slow
         :return: None
         """
+        if self.headless:
+            # Comparing the interface with a copy sorts the players by their numbers, which the order of the turns
+            # follows from then on, so a headless game is put in the same order to play the same way
+            self.board.players.sort(key=lambda player_: player_.number)
+            return
         if (
             len(self.board.resource_deck)
             + sum([len(player_.resources) for player_ in self.board.players])
@@ -432,6 +623,11 @@ class board_interface:
             raise Exception("Development card count is incorrect")
         self.log_action("Cards are correct")
 
+        # The victory points are kept up to date as the game is played, so check them against a full count
+        for player_ in self.board.players:
+            if player_.count_victory_points(self)[0] != player_.victory_points:
+                raise Exception(f"Victory points of {player_.name} are incorrect")
+
         if self == copy.deepcopy(self):
             self.log_action("Deepcopy Test Passed")
         else:
@@ -454,18 +650,15 @@ class board_interface:
         # Check if the card is a resource card
         if card_type == "resource" and not card == "desert":
 
-            # Iterate through the amount of cards to be given
-            for i in range(amount):
-                try:
-                    player_.resources.append(
-                        self.board.resource_deck.pop(
-                            self.board.resource_deck.index(card)
-                        )
-                    )
-                # Exception if there are not enough cards in the bank
-                except ValueError:
-                    if not self.minimax_mode:
-                        print("Not enough cards in the bank")
+            # Move the cards in one go, giving as many as the bank has
+            available = self.board.resource_deck.count(card)
+            if available < amount:
+                if not self.minimax_mode:
+                    print("Not enough cards in the bank")
+                amount = available
+            self.board.resource_deck.move_to(player_.resources, card, amount)
+            held = player_.resources.count(card)
+            self.update_hand_key(player_, "resource", card, held - amount, held)
 
             # Log the action if not in minimax mode
             if not self.minimax_mode:
@@ -479,6 +672,12 @@ class board_interface:
                 # Get a random development card from the bank
                 card_given = self.board.development_card_deck.pop(0)
                 player_.development_cards.append(card_given)
+                held = player_.development_cards.count(card_given)
+                self.update_hand_key(
+                    player_, "development card", card_given, held - 1, held
+                )
+                if card_given == "victory point":
+                    player_.victory_points += 1
 
                 # Log the action if not in minimax mode
                 if not self.minimax_mode:
@@ -513,9 +712,9 @@ class board_interface:
         # Check if the card is a resource card
         if card in ["wheat", "wood", "clay", "sheep", "rock"]:
             # Remove the card from the player's hand and add it to the bank
-            self.board.resource_deck.append(
-                player_.resources.pop(player_.resources.index(card))
-            )
+            player_.resources.move_to(self.board.resource_deck, card)
+            held = player_.resources.count(card)
+            self.update_hand_key(player_, "resource", card, held + 1, held)
             # Log the action if not in minimax mode
             if not self.minimax_mode:
                 self.log_action(f"{player_.name} returned a {card} card to the bank")
@@ -532,6 +731,10 @@ class board_interface:
             self.board.development_card_deck.append(
                 player_.development_cards.pop(player_.development_cards.index(card))
             )
+            held = player_.development_cards.count(card)
+            self.update_hand_key(player_, "development card", card, held + 1, held)
+            if card == "victory point":
+                player_.victory_points -= 1
             # Log the action if not in minimax mode
             if not self.minimax_mode:
                 self.log_action(f"{player_.name} returned a {card} card to the bank")
@@ -558,36 +761,26 @@ class board_interface:
 
             # If this is the initial placement, it doesn't matter if there are any roads, so just return any free locations that are not next to another settlement
             if initial_placement:
-                for key, item in self.get_buildings_list().items():
-                    if not self.get_buildings_list()[key]["building"]:
-                        if not self.check_for_nearby_settlements(key):
-                            list.append(key)
+                for node, item in enumerate(self.board._node_state):
+                    if not item["building"]:
+                        if not self.check_for_nearby_settlements(
+                            TOPOLOGY.node_names[node]
+                        ):
+                            list.append(TOPOLOGY.node_names[node])
 
             # If this is not the initial placement, check if the player has any roads to build on
             else:
-                for road in self.get_roads_list():
-                    if self.get_roads_list()[road]["player"] is not None:
-                        if (
-                            self.get_roads_list()[road]["player"].number
-                            == player_.number
+                for edge in sorted(self.board.player_roads[player_.number]):
+                    # For each end of the road, check if there is a settlement there already, and if not, add it to the list
+                    for node in TOPOLOGY.edge_nodes[edge]:
+                        if not self.check_for_nearby_settlements(
+                            TOPOLOGY.node_names[node]
                         ):
-                            # For each end of the road, check if there is a settlement there already, and if not, add it to the list
-                            if not self.check_for_nearby_settlements(road[0]):
-                                list.append(road[0])
-                            if not self.check_for_nearby_settlements(road[1]):
-                                list.append(road[1])
+                            list.append(TOPOLOGY.node_names[node])
 
         # If the building is a city, check if the player has any settlements to upgrade
         else:
-            for key, item in self.get_buildings_list().items():
-                if self.get_buildings_list()[key]["player"] is not None:
-                    # Get the key of any settlements that belong to the player and add it to the list
-                    if (
-                        self.get_buildings_list()[key]["player"].number
-                        == player_.number
-                        and self.get_buildings_list()[key]["building"] == "settlement"
-                    ):
-                        list.append(key)
+            list = self.get_player_settlements(player_)
             if len(list) == 0:
                 raise ValueError("No settlements to upgrade")
 
@@ -599,45 +792,47 @@ class board_interface:
         :param player_: The player who is placing the road
         :return: A list of potential locations
         """
-        road_endings = []
+        edge_state = self.board._edge_state
+        road_endings = set()
         # Get a list of all the roads the player has
-        # For each road, add the two ends to the list if they are not already in it
-        for road in self.get_roads_list():
-            if self.get_roads_list()[road]["player"] is not None:
-                if self.get_roads_list()[road]["player"].number == player_.number:
-                    if road[0] not in road_endings:
-                        road_endings.append(road[0])
-                    if road[1] not in road_endings:
-                        road_endings.append(road[1])
-
-        list_ = []
-
-        # For each road that contains the road ending, check if there is a road there already
-        # If not, add it to the list
-        for road in self.get_roads_list():
-            for road_ending in road_endings:
-                if road_ending in road:
-                    if not self.get_roads_list()[road]["player"]:
-                        list_.append(road)
+        # For each road, add the two ends to the set
+        for edge in self.board.player_roads[player_.number]:
+            road_endings.update(TOPOLOGY.edge_nodes[edge])
 
-        return list_
-
-    def update_special_cards(self):
-        """
-        Checks whether players need to be given the largest army or longest road cards
+        # For each road that touches a road ending, check if there is a road there already
+        # If not, add it to the list
+        free_edges = set()
+        for road_ending in road_endings:
+            for edge in TOPOLOGY.node_edges[road_ending]:
+                if not edge_state[edge]["player"]:
+                    free_edges.add(edge)
+
+        # Return the roads in the same order as the roads list
+        return [TOPOLOGY.edge_names[edge] for edge in sorted(free_edges)]
+
+    def update_special_cards(self, player_=None):
+        """
+        Checks whether players need to be given the largest army or longest road cards, moving the victory points of
+        the cards to their new holders
+        A player's army and longest road only grow on their own moves, so after a move only the player who made it
+        needs to be checked
+        :param player_: The player to check, or None to check every player
         :return: None
         """
+        players = self.get_players_list() if player_ is None else [player_]
 
         # Check for largest army
 
-        for player_ in self.get_players_list():
+        for player_ in players:
 
             # If the player has more robbers than the current largest army, set them as the new largest army
             if (player_.played_robber_cards > self.get_largest_army()[1]) and (
                 player_.played_robber_cards >= 3
             ):
                 # Update the largest army
-                self.board.largest_army = [player_, player_.played_robber_cards]
+                self.give_special_card(
+                    "largest_army", player_, player_.played_robber_cards
+                )
 
                 # Log the action if not in minimax mode
                 if not self.minimax_mode:
@@ -650,40 +845,29 @@ class board_interface:
 
         # Check for longest road
 
-        for player_ in self.get_players_list():
-            self.log_action(f"Checking for longest road for {player_.name}...")
-
-            # Get a list of all the roads the player has
-            player_roads = []
-            for road in self.get_roads_list():
-                if self.get_roads_list()[road]["player"] is not None:
-                    if self.get_roads_list()[road]["player"].number == player_.number:
-                        player_roads.append(road)
+        for player_ in players:
+            # A player with fewer than 5 roads cannot have a road long enough, so the search is skipped
+            if len(self.board.player_roads[player_.number]) < 5:
+                continue
 
-            # Find the clusters of roads
-            clusters = return_clusters(player_roads)
+            # Get the length of the player's longest road
+            max_cluster = self.get_longest_road_length(player_)
 
-            # If there are no clusters, continue
-            if not any(len(cluster) >= 5 for cluster in clusters):
-                self.log_action(
-                    f"No clusters of length 5 or more" f" for {player_.name}"
-                )
-                self.log_action(f"Clusters: {clusters}")
+            # If the road is too short for the card, continue
+            if max_cluster < 5:
                 continue
 
             # Get the current longest road
             current_longest_road = self.get_longest_road()
 
-            # Get the length of the longest cluster
-            max_cluster = len(find_longest_route(max(clusters, key=len))) - 1
-
-            self.log_action(f"Longest cluster: {max_cluster}")
+            if not self.minimax_mode:
+                self.log_action(f"Longest road for {player_.name}: {max_cluster}")
 
             # If the longest cluster is longer than the current longest road, set it as the new longest road
             if max_cluster > current_longest_road[1] and max_cluster >= 5:
 
                 # Update the longest road
-                self.board.longest_road = [player_, max_cluster]
+                self.give_special_card("longest_road", player_, max_cluster)
 
                 # Log the action if not in minimax mode
                 if not self.minimax_mode:
@@ -694,6 +878,20 @@ class board_interface:
                         f"{player_.name} has a road of length {max_cluster} and has been given the longest road card"
                     )
 
+    def give_special_card(self, card, player_, size) -> None:
+        """
+        Gives the largest army or longest road card to a player, moving its 2 victory points from the last holder
+        :param card: Either "largest_army" or "longest_road"
+        :param player_: The new holder
+        :param size: The size of the player's army, or the length of their road
+        :return: None
+        """
+        holder = getattr(self.board, card)[0]
+        if holder is not None:
+            holder.victory_points -= 2
+        player_.victory_points += 2
+        setattr(self.board, card, [player_, size])
+
     def place_settlement(self, player_, location, setup=False) -> bool:
         """
         Places a settlement on the board
@@ -738,26 +936,15 @@ class board_interface:
                     )
                 return False
 
-        # Update the board
-        self.board._buildings[location].update(
-            {"player": player_, "building": "settlement"}
-        )
-
         # Log the action if not in minimax mode
         if not self.minimax_mode:
             player_.has_built_this_turn = True
             self.log_action(f"{player_.name} placed a settlement at {location}")
 
-        # Check for ports and update them
-        for entry in self.get_ports_list().keys():
-            # If the port is not owned by anyone, check if the settlement is on it
-            # Technically this is not needed as no player can even attempt to place a settlement on a port that someone
-            # else has already built near
-            if self.get_ports_list()[entry] is not None:
-                if location in entry:
-                    self.board._ports[entry].update({"player": player_})
-                    if not self.minimax_mode:
-                        self.log_action(f"{player_.name} has claimed a port at {entry}")
+        # Update the board, claiming any ports next to the settlement
+        self.set_building(player_, location, "settlement")
+        if self.recorder is not None:
+            self.recorder.settlement(player_, location, self.setup_mode)
 
         return True
 
@@ -806,7 +993,9 @@ class board_interface:
                 return False
 
         # Update the board
-        self.board._buildings[location].update({"player": player_, "building": "city"})
+        self.set_building(player_, location, "city")
+        if self.recorder is not None:
+            self.recorder.city(player_, location)
 
         # Log the action if not in minimax mode
         if not self.minimax_mode:
@@ -831,7 +1020,8 @@ class board_interface:
             return False
 
         if not location:
-            self.log_action(f"{player_.name} tried to place a road at {location}")
+            if not self.minimax_mode:
+                self.log_action(f"{player_.name} tried to place a road at {location}")
             return False
 
         # Check if the road is already owned by someone
@@ -863,7 +1053,11 @@ class board_interface:
                             return False
 
             # Place the road
-            self.board._roads[location].update({"player": player_})
+            self.set_road(player_, location)
+            if self.recorder is not None:
+                self.recorder.road(
+                    player_, location, self.setup_mode or free_from_dev_card
+                )
 
             # Log the action if not in minimax mode
             if not self.minimax_mode:
@@ -873,7 +1067,7 @@ class board_interface:
                 )
 
             # Update the special cards
-            self.update_special_cards()
+            self.update_special_cards(player_)
 
             return True
 
@@ -899,6 +1093,8 @@ class board_interface:
                 self.return_player_card(player_, "sheep")
                 self.return_player_card(player_, "rock")
                 card = self.give_player_card(player_, "development", "development_card")
+                if self.recorder is not None:
+                    self.recorder.buy_development_card(player_, card)
 
                 # Log the action if not in minimax mode
                 if not self.minimax_mode:
@@ -907,6 +1103,10 @@ class board_interface:
                         f"{player_.name}'s development cards are now {player_.development_cards}"
                     )
                 player_.gained_dev_cards_this_turn.append(card)
+                held = player_.gained_dev_cards_this_turn.count(card)
+                self.update_hand_key(
+                    player_, "gained development card", card, held - 1, held
+                )
 
                 if CONFIG["table_top_mode"]:
                     if not self.minimax_mode:
@@ -949,6 +1149,8 @@ class board_interface:
             for i in range(4):
                 self.return_player_card(player_, give)
             self.give_player_card(player_, "resource", get)
+            if self.recorder is not None:
+                self.recorder.trade_with_bank(player_, give, get)
         else:
             if not self.minimax_mode:
                 print("Not enough resources to trade")
@@ -974,40 +1176,41 @@ class board_interface:
             )
 
         # Check the player owns the port
-        for port in self.get_ports_list():
-            if self.get_ports_list()[port] is not None:
-                if self.get_ports_list()[port]["player"] is not None:
-                    if self.get_ports_list()[port]["player"].number == player_.number:
-                        # Player owns the port, now check if they have enough resources to trade
-                        port_resource = self.get_ports_list()[port]["resource"]
-                        # If the port is a 2:1 port, check if the player has enough resources to trade
-                        if port_resource == give:
-                            if player_.resources.count(give) >= 2:
-                                # Player has enough resources, take them and give the player the card
-                                self.return_player_card(player_, give)
-                                self.return_player_card(player_, give)
-                                self.give_player_card(player_, "resource", get)
-                                # Log the action if not in minimax mode
-                                if not self.minimax_mode:
-                                    self.log_action(
-                                        f"{player_.name} has used a port to trade 2x {give} for 1x {get}"
-                                    )
-                                return
-
-                        # If the port is a 3:1 port, check if the player has enough resources to trade
-                        elif port_resource == "any":
-                            if player_.resources.count(give) >= 3:
-                                # Player has enough resources, take them and give the player the card
-                                self.return_player_card(player_, give)
-                                self.return_player_card(player_, give)
-                                self.return_player_card(player_, give)
-                                self.give_player_card(player_, "resource", get)
-                                # Log the action if not in minimax mode
-                                if not self.minimax_mode:
-                                    self.log_action(
-                                        f"{player_.name} has used a port to trade 3x {give} for 1x {get}"
-                                    )
-                                return
+        for location, port in self.get_player_ports(player_):
+            # Player owns the port, now check if they have enough resources to trade
+            port_resource = port["resource"]
+            # If the port is a 2:1 port, check if the player has enough resources to trade
+            if port_resource == give:
+                if player_.resources.count(give) >= 2:
+                    # Player has enough resources, take them and give the player the card
+                    self.return_player_card(player_, give)
+                    self.return_player_card(player_, give)
+                    self.give_player_card(player_, "resource", get)
+                    if self.recorder is not None:
+                        self.recorder.trade_with_port(player_, give, get, 2)
+                    # Log the action if not in minimax mode
+                    if not self.minimax_mode:
+                        self.log_action(
+                            f"{player_.name} has used a port to trade 2x {give} for 1x {get}"
+                        )
+                    return
+
+            # If the port is a 3:1 port, check if the player has enough resources to trade
+            elif port_resource == "any":
+                if player_.resources.count(give) >= 3:
+                    # Player has enough resources, take them and give the player the card
+                    self.return_player_card(player_, give)
+                    self.return_player_card(player_, give)
+                    self.return_player_card(player_, give)
+                    self.give_player_card(player_, "resource", get)
+                    if self.recorder is not None:
+                        self.recorder.trade_with_port(player_, give, get, 3)
+                    # Log the action if not in minimax mode
+                    if not self.minimax_mode:
+                        self.log_action(
+                            f"{player_.name} has used a port to trade 3x {give} for 1x {get}"
+                        )
+                    return
 
         self.log_action(f"{player_.name} does not have enough resources to trade")
 
@@ -1055,6 +1258,13 @@ class board_interface:
                 self.give_player_card(
                     player_to_trade_with, "resource", resource_to_give
                 )
+                if self.recorder is not None:
+                    self.recorder.trade_with_player(
+                        original_player,
+                        player_to_trade_with,
+                        resource_to_give,
+                        resource_to_get,
+                    )
                 if not self.minimax_mode:
                     self.log_action(
                         f"{original_player.name} traded {resource_to_give} for {resource_to_get} with {player_to_trade_with.name}"
@@ -1122,7 +1332,7 @@ class board_interface:
                 player_.robber(self)
                 # Increment the number of soldier cards the player has played
                 player_.played_robber_cards += 1
-                self.update_special_cards()
+                self.update_special_cards(player_)
             else:
                 print("You have already played all of your soldier cards!")
 
@@ -1134,11 +1344,15 @@ class board_interface:
             # Get every other player's resources of the type specified
             for other_player in self.get_players_list():
                 if other_player != player_:
-                    # While the other player has the resource type, take it from them and give it to the player
-                    while res_type in other_player.resources:
-                        self.return_player_card(other_player, res_type)
-                        self.give_player_card(player_, "resource", res_type)
-                        count += 1
+                    # Take every card of the resource type from them and give it to the player
+                    amount = other_player.resources.count(res_type)
+                    other_player.resources.move_to(player_.resources, res_type, amount)
+                    self.update_hand_key(other_player, "resource", res_type, amount, 0)
+                    held = player_.resources.count(res_type)
+                    self.update_hand_key(
+                        player_, "resource", res_type, held - amount, held
+                    )
+                    count += amount
             if not self.minimax_mode:
                 self.log_action(
                     f"{player_.name} played a monopoly card and took {count} {res_type} cards"
@@ -1166,6 +1380,10 @@ class board_interface:
         if card != "soldier":
             self.return_player_card(player_, card)
 
+        # Recorded after the card has been played, as the robber and roads it places are recorded as they are placed
+        if self.recorder is not None:
+            self.recorder.play_development_card(player_, card, args)
+
         # Log the action if not in minimax mode, and set the player's played dev card flag to true
         if not self.minimax_mode:
             player_.has_played_dev_card_this_turn = True
@@ -1181,6 +1399,9 @@ class board_interface:
         :return: None
         """
 
+        if self.recorder is not None:
+            self.recorder.roll(current_player, roll, self.turn_number)
+
         if isinstance(roll, list):
             self.board.current_roll = roll
             roll = sum(roll)
@@ -1196,7 +1417,10 @@ class board_interface:
                     self.log_action(
                         f"{player_.name} must discard half their resources as they have more than 7"
                     )
+                    hand_before = player_.resources.counts()
                     player_.robber_discard(self)
+                    if self.recorder is not None:
+                        self.recorder.discard(player_, hand_before)
             self.verify_game_integrity()
             self.log_action("Moving the robber...")
             current_player.robber(self)
@@ -1210,66 +1434,35 @@ class board_interface:
 
         # If the roll is not a 7, the player gets the resources from the tiles they have settlements on
         else:
-            player_gained_resources = False
-            # Get every building a player has
-            for player_ in self.get_players_list():
-                # Cards to give is a dictionary of the resources to give to the player, and the number of each resource
-                # These are all added at the end
-                cards_to_give = {}
-                for building in self.get_buildings_list():
-                    if self.get_buildings_list()[building].get("building") is not None:
-                        tiles = self.get_buildings_list()[building].get("tiles")
-
-                        # If the tiles near a building are the same as the roll, give the player the resources from the tiles
-                        for building_tile in tiles:
-                            if (
-                                building_tile.dice_number == roll
-                                and not building_tile.contains_robber
-                            ):
-                                self.log_action(
-                                    f"Tile {building_tile} with number {building_tile.dice_number} and resource {building_tile.resource} has been rolled!"
-                                )
-                                # If the building is a settlement, give the player one of the resource
-                                if (
-                                    self.get_buildings_list()[building].get("building")
-                                    == "settlement"
-                                    and self.get_buildings_list()[building].get(
-                                        "player"
-                                    )
-                                    == player_
-                                ):
-                                    if building_tile.resource in cards_to_give:
-                                        cards_to_give[building_tile.resource] += 1
-                                    else:
-                                        cards_to_give[building_tile.resource] = 1
-                                # If the building is a city, give the player two of the resource
-                                elif (
-                                    self.get_buildings_list()[building].get("building")
-                                    == "city"
-                                    and self.get_buildings_list()[building].get(
-                                        "player"
-                                    )
-                                    == player_
-                                ):
-                                    if building_tile.resource in cards_to_give:
-                                        cards_to_give[building_tile.resource] += 2
-                                    else:
-                                        cards_to_give[building_tile.resource] = 2
-
-                for card in cards_to_give:
-                    if not self.all_players_ai:
-                        print(
-                            f"{player_} has gained {cards_to_give[card]} {card} card"
-                            + ("s" if cards_to_give[card] > 1 else "")
-                        )
-                    self.give_player_card(
-                        player_, "resource", card, cards_to_give[card]
-                    )
-                    player_gained_resources = True
-
+            player_gained_resources = self.produce_resources(roll)
             if not player_gained_resources and not self.all_players_ai:
                 print("No resources were gained this turn")
 
+    def produce_resources(self, roll) -> bool:
+        """
+        Gives every player the resources they produce from a roll that is not a 7
+        Also used by searches that roll the dice, which do not need the rest of process_roll
+        :param roll: The total of the dice
+        :return: Whether any player gained resources
+        """
+        player_gained_resources = False
+        # The production table lists what every player gets from the roll
+        if self.board.production is None:
+            self.board.production = self.board.compute_production()
+        payouts = self.board.production[roll]
+        for player_ in self.get_players_list():
+            # Cards to give is a dictionary of the resources to give to the player, and the number of each resource
+            cards_to_give = payouts.get(player_.number, {})
+            for card in cards_to_give:
+                if not self.all_players_ai and not self.minimax_mode:
+                    print(
+                        f"{player_} has gained {cards_to_give[card]} {card} card"
+                        + ("s" if cards_to_give[card] > 1 else "")
+                    )
+                self.give_player_card(player_, "resource", card, cards_to_give[card])
+                player_gained_resources = True
+        return player_gained_resources
+
     # Moves -------------------------------------------------------------------------------------------------------------
 
     def return_possible_moves(self, player_: player) -> list[str]:
@@ -1283,17 +1476,10 @@ class board_interface:
 
         # Initial counting of settlements and cities for future use
         hand = player_.count_cards("resources")
-        buildings_count = {"settlements": 0, "cities": 0}
-        for building in self.get_buildings_list():
-            if self.get_buildings_list()[building]["player"] is not None:
-                if (
-                    self.get_buildings_list()[building]["player"].number
-                    == player_.number
-                ):
-                    if self.get_buildings_list()[building]["building"] == "settlement":
-                        buildings_count["settlements"] += 1
-                    elif self.get_buildings_list()[building]["building"] == "city":
-                        buildings_count["cities"] += 1
+        buildings_count = {
+            "settlements": self.count_structure(player_, "settlement"),
+            "cities": self.count_structure(player_, "city"),
+        }
         moves = []
 
         # TRADING MOVES
@@ -1307,24 +1493,17 @@ class board_interface:
                     moves.append("trade with bank")
 
             # Check if the player can trade with a port
-            for port in self.get_ports_list():
-                # Check if the port is owned by the player
-                if self.get_ports_list()[port] is not None:
-                    if self.get_ports_list()[port]["player"] is not None:
-                        if (
-                            self.get_ports_list()[port]["player"].number
-                            == player_.number
-                        ):
-                            # Get the type of port and the resource it gives
-                            type_ = self.get_ports_list()[port]["symbol"]
-                            player_resources = player_.count_cards("resources")
-                            port_resource = self.get_ports_list()[port]["resource"]
-                            highest_resource = max(player_resources.values())
-                            # If the player has enough of the resource, they can trade
-                            if (
-                                "2" in type_ and player_resources[port_resource] >= 2
-                            ) or ("3" in type_ and highest_resource >= 3):
-                                moves.append("trade with port")
+            # Only ports owned by the player are checked
+            for location, port in self.get_player_ports(player_):
+                # Get the type of port and the resource it gives
+                type_ = port["symbol"]
+                port_resource = port["resource"]
+                highest_resource = max(hand.values())
+                # If the player has enough of the resource, they can trade
+                if ("2" in type_ and hand[port_resource] >= 2) or (
+                    "3" in type_ and highest_resource >= 3
+                ):
+                    moves.append("trade with port")
 
             if (
                 not isinstance(player_, ai_player)
@@ -1401,6 +1580,184 @@ class board_interface:
 
         return moves
 
+    # Search Moves -----------------------------------------------------------------------------------------------------
+
+    def make_undo_token(self, player_) -> dict:
+        """
+        Records everything that a move by the given player can change, so that the move can be reversed with undo_move
+        Covers every player's hand and flags, both decks, the special cards, the robber and the player's ownership
+        :param player_: The player who is about to move
+        :return: The undo token
+        """
+        return {
+            "player": player_.number,
+            "hands": [
+                (
+                    player_item.resources.copy(),
+                    player_item.development_cards.copy(),
+                    player_item.gained_dev_cards_this_turn.copy(),
+                    player_item.played_robber_cards,
+                    player_item.total_dev_cards_played,
+                    player_item.has_built_this_turn,
+                    player_item.has_played_dev_card_this_turn,
+                    player_item.victory_points,
+                )
+                for player_item in self.board.players
+            ],
+            "resource_deck": self.board.resource_deck.copy(),
+            "development_card_deck": self.board.development_card_deck.copy(),
+            "largest_army": self.board.largest_army.copy(),
+            "longest_road": self.board.longest_road.copy(),
+            "robber": [tile_.contains_robber for tile_ in self.board.tiles],
+            "zobrist": self.board.zobrist,
+            "hand_keys": self.board.hand_keys.copy(),
+            "roads": self.board.player_roads[player_.number].copy(),
+            "settlements": self.board.player_settlements[player_.number].copy(),
+            "cities": self.board.player_cities[player_.number].copy(),
+            "ports": self.board.player_ports[player_.number].copy(),
+        }
+
+    def perform_move(self, player_, move) -> None:
+        """
+        Performs a move for a player
+        Acts as a simple interpreter for the move, and calls the appropriate function
+        :param player_: The player making the move, must be one of the players on this board
+        :param move: The move to perform, in the format generated by ai_minimax.get_move_combinations
+        :return: None
+        """
+        if move[0] == "buy development card":
+            self.buy_development_card(player_)
+        elif move[0] == "play development card":
+            if move[1] == "year of plenty":
+                self.play_development_card(player_, move[1], move[2], move[3])
+            elif move[1] == "monopoly":
+                self.play_development_card(player_, move[1], move[2])
+            else:
+                self.play_development_card(player_, move[1])
+        elif move[0] == "build road":
+            self.place_road(player_, move[1])
+        elif move[0] == "build settlement":
+            self.place_settlement(player_, move[1])
+        elif move[0] == "build city":
+            self.place_city(player_, move[1])
+        elif move[0] == "trade with bank":
+            self.trade_with_bank(player_, move[1], move[2])
+        elif move[0] == "trade with port":
+            self.trade_with_port(player_, move[1], move[2])
+        elif move[0] == "trade with player":
+            # Asking the other player would start another search, so assume that they always accept the trade
+            other_player = self.get_player(move[2].number)
+            if move[3] in player_.resources and move[4] in other_player.resources:
+                self.return_player_card(player_, move[3])
+                self.return_player_card(other_player, move[4])
+                self.give_player_card(player_, "resource", move[4])
+                self.give_player_card(other_player, "resource", move[3])
+        elif move[0] == "end turn":
+            pass
+        else:
+            # If the move is not recognised, raise an error
+            raise NotImplementedError(
+                "perform_move does not know how to perform " + str(move)
+            )
+
+    def apply_move(self, player_, move) -> dict:
+        """
+        Performs a move for a player, returning an undo token that reverses it when passed to undo_move
+        Lets a search move through the game tree on a single interface, instead of copying the interface for every node
+        Undo tokens must be undone in the reverse order to how they were made
+        :param player_: The player making the move, must be one of the players on this board
+        :param move: The move to perform, in the format generated by ai_minimax.get_move_combinations
+        :return: The undo token
+        """
+        token = self.make_undo_token(player_)
+        self.perform_move(player_, move)
+        return token
+
+    def undo_move(self, token) -> None:
+        """
+        Reverses a move made with apply_move, or everything done since make_undo_token was called
+        :param token: The undo token
+        :return: None
+        """
+        number = token["player"]
+
+        # Remove anything the player has built since the token was made
+        for edge in self.board.player_roads[number] - token["roads"]:
+            self.board._edge_state[edge]["player"] = None
+        for node in self.board.player_settlements[number] - token["settlements"]:
+            self.board._node_state[node].update({"player": None, "building": None})
+        for node in self.board.player_cities[number] - token["cities"]:
+            if node in token["settlements"]:
+                self.board._node_state[node]["building"] = "settlement"
+            else:
+                self.board._node_state[node].update({"player": None, "building": None})
+        for slot in self.board.player_ports[number] - token["ports"]:
+            self.board._port_state[slot]["player"] = None
+        self.board.player_roads[number] = token["roads"]
+        self.board.player_settlements[number] = token["settlements"]
+        self.board.player_cities[number] = token["cities"]
+        self.board.player_ports[number] = token["ports"]
+
+        # Restore the hands, keeping the same lists so that any references to them stay valid
+        for player_item, hand in zip(self.board.players, token["hands"]):
+            player_item.resources.assign(hand[0])
+            player_item.development_cards[:] = hand[1]
+            player_item.gained_dev_cards_this_turn[:] = hand[2]
+            (
+                player_item.played_robber_cards,
+                player_item.total_dev_cards_played,
+                player_item.has_built_this_turn,
+                player_item.has_played_dev_card_this_turn,
+                player_item.victory_points,
+            ) = hand[3:]
+
+        self.board.resource_deck.assign(token["resource_deck"])
+        self.board.development_card_deck[:] = token["development_card_deck"]
+        self.board.largest_army = token["largest_army"]
+        self.board.longest_road = token["longest_road"]
+        for tile_, contains_robber in zip(self.board.tiles, token["robber"]):
+            tile_.contains_robber = contains_robber
+        self.board.zobrist = token["zobrist"]
+        self.board.hand_keys = token["hand_keys"]
+        # Rebuilt when it is next needed, as the search does not roll the dice
+        self.board.production = None
+
+    def get_position_hash(self, current_player) -> int:
+        """
+        Gets the Zobrist hash of the position, for the search's transposition table
+        Combines the board's hash and the hand keys, which are kept up to date as the board and hands change, with
+        the flags, the special cards, the decks and the player to move. The turn number is included as some heuristics
+        depend on it
+        :param current_player: The player to move
+        :return: The hash
+        """
+        value = self.board.zobrist ^ ZOBRIST.key("to move", current_player.number)
+        value ^= ZOBRIST.key("turn", self.turn_number)
+        for hand_key in self.board.hand_keys.values():
+            value ^= hand_key
+        for player_ in self.board.players:
+            value ^= ZOBRIST.key(
+                "flags",
+                player_.number,
+                player_.played_robber_cards,
+                player_.has_built_this_turn,
+                player_.has_played_dev_card_this_turn,
+            )
+        for name, special_card in (
+            ("largest army", self.board.largest_army),
+            ("longest road", self.board.longest_road),
+        ):
+            if special_card[0] is not None:
+                value ^= ZOBRIST.key(name, special_card[0].number, special_card[1])
+
+        # The bank size covers any resources that the search has added to a hand, and the top development card is
+        # the one that will be bought next
+        deck = self.board.development_card_deck
+        value ^= ZOBRIST.key(
+            "decks", len(self.board.resource_deck), len(deck), deck[0] if deck else None
+        )
+        return value
+
     # Initial Placement --------
 
     def initial_placement(self) -> None:
@@ -1425,22 +1782,23 @@ class board_interface:
             print(f"{player_} is placing settlement number {2 - order.count(player_)}")
 
             if CONFIG["randomise_starting_locations"]:
-                location = random.choice(
+                location = self.rng.placement.choice(
+                    self.get_potential_building_locations(
+                        player_, initial_placement=True
+                    )
+                )
+                road = self.rng.placement.choice(
                     [
-                        l
-                        for l in self.get_buildings_list()
-                        if self.get_buildings_list()[l]["building"] is None
-                        and not self.check_for_nearby_settlements(l)
+                        TOPOLOGY.edge_names[edge]
+                        for edge in TOPOLOGY.node_edges[TOPOLOGY.node_ids[location]]
                     ]
                 )
-                road = random.choice(
-                    [road for road in self.get_roads_list() if location in road]
-                )
                 print(f"Randomly placing settlement at {location}")
-                self.board._buildings[location].update(
-                    {"player": player_, "building": "settlement"}
-                )
-                self.board._roads[road].update({"player": player_, "road": "road"})
+                self.set_building(player_, location, "settlement")
+                self.set_road(player_, road)
+                if self.recorder is not None:
+                    self.recorder.settlement(player_, location, True)
+                    self.recorder.road(player_, road, True)
             else:
                 # Get the location of the settlement and place it
                 location = player_.initial_placement(self)
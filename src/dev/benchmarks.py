@@ -0,0 +1,334 @@
+"""
+Benchmark Suite
+Times the hot paths of the game engine and the MiniMax search on fixed mid-game positions, so that the effect of a
+change to the engine can be measured against a stable baseline
+Each benchmark is repeated several times, and reported as operations per second with the variation between repeats
+
+Usage (from the src directory):
+python3 -m dev.benchmarks [--quick] [--seed SEED] [--record FILE] [--output FILE] [benchmark ...]
+
+Options:
+--quick      Runs fewer repeats of each benchmark, for a rough result
+--seed       The seed used to build the positions and play the games, defaults to 1
+--record     An archive of recorded games to take the positions from, instead of building them
+--output     The JSON file to write the results to, defaults to benchmark_results.json
+benchmark    The names of the benchmarks to run, defaults to all of them
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import argparse
+import json
+import platform
+import statistics
+
+from game import *
+from game_record import read_game_records
+from playout import playout_engine
+from replay import replay_engine
+
+# Number of turns played to reach each position, giving an early, middle and late game
+FIXTURE_TURNS = (5, 15, 30)
+# Depth of the fixed depth MiniMax benchmark
+BENCHMARK_MINIMAX_DEPTH = 2
+
+
+def make_players() -> list:
+    """
+    Creates the players used in every benchmark
+    :return: Two random players and a MiniMax player, which is player 2
+    """
+    return [
+        ai_random(1, "green"),
+        ai_minimax(2, "yellow", max_depth=1),
+        ai_random(3, "red"),
+    ]
+
+
+def make_fixture(seed, turns) -> board_interface:
+    """
+    Builds a reproducible mid-game position
+    The board and starting locations come from a headless game, and each turn every player rolls the dice and then
+    makes up to three random moves from the moves the MiniMax player would consider for them
+    :param seed: The seed for the position
+    :param turns: The number of turns to play
+    :return: The interface of the position
+    """
+    match = game(make_players(), [seed, 1], seed)
+    match.initial_placement()
+    interface = match.interface
+    search_player = interface.get_player(2)
+    for turn in range(1, turns + 1):
+        interface.turn_number = turn
+        interface.board.turn = turn
+        for player_ in interface.get_players_list():
+            # A 7 would ask the players to discard and move the robber, which is not needed for a fixture
+            roll = roll_dice(interface.rng.dice)
+            while sum(roll) == 7:
+                roll = roll_dice(interface.rng.dice)
+            interface.process_roll(roll, player_)
+            player_.has_built_this_turn = False
+            player_.has_played_dev_card_this_turn = False
+            player_.dev_cards_at_start_of_turn = player_.development_cards.copy()
+            interface.set_minimax(True)
+            for _ in range(3):
+                moves = search_player.get_move_combinations(interface, player_)
+                if not moves:
+                    break
+                move = interface.get_player_random(player_).choice(moves)
+                if move == ["end turn"]:
+                    break
+                interface.apply_move(player_, move)
+            interface.set_minimax(False)
+            interface.update_special_cards()
+    return interface
+
+
+def load_fixtures(path, turns) -> list:
+    """
+    Takes positions from recorded games, at the start of each of the turns that the games reach
+    Player 2 is replaced with a MiniMax player and the others with random players, as in make_players
+    :param path: The path of the archive of recorded games
+    :param turns: The turns to take positions at
+    :return: The interfaces of the positions
+    """
+    fixtures = []
+    for record in read_game_records(path):
+        if not any(details["number"] == 2 for details in record["players"]):
+            continue
+        players = [
+            (
+                ai_minimax(details["number"], details["colour"], max_depth=1)
+                if details["number"] == 2
+                else ai_random(details["number"], details["colour"])
+            )
+            for details in record["players"]
+        ]
+        replay = replay_engine(record, players)
+        for turn in turns:
+            if turn <= replay.turns:
+                fixtures.append(copy.deepcopy(replay.seek(turn)))
+    if not fixtures:
+        raise ValueError(f"{path} does not have any games with a player 2")
+    return fixtures
+
+
+def time_operation(operation, setup, number, repeat) -> dict:
+    """
+    Times an operation, which is run a number of times in each repeat
+    :param operation: The function to time, which is passed the result of setup
+    :param setup: A function run before each repeat and left out of the timing, or None
+    :param number: The number of times to run the operation in each repeat
+    :param repeat: The number of repeats
+    :return: The operations per second of each repeat and a summary of them
+    """
+    rates = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        for _ in range(number):
+            operation(state)
+        elapsed = time.perf_counter() - start
+        rates.append(number / elapsed if elapsed > 0 else math.inf)
+    mean = statistics.fmean(rates)
+    stdev = statistics.stdev(rates) if len(rates) > 1 else 0.0
+    return {
+        "ops_per_sec": mean,
+        "stdev": stdev,
+        "relative_stdev": stdev / mean if mean else 0.0,
+        "min": min(rates),
+        "max": max(rates),
+        "number": number,
+        "repeat": repeat,
+        "rates": rates,
+    }
+
+
+def get_benchmarks(fixtures, seed) -> dict:
+    """
+    Creates the benchmarks for a set of positions
+    Each benchmark is a tuple of (operation, setup, number of operations per repeat), and runs the operation once on
+    every position
+    :param fixtures: The positions to run the benchmarks on
+    :param seed: The seed for the headless games
+    :return: A dict of benchmark name to benchmark
+    """
+    players = [(fixture, fixture.get_player(2)) for fixture in fixtures]
+
+    def each_fixture(operation):
+        def run(state):
+            for fixture, player_ in players:
+                operation(fixture, player_)
+
+        return run
+
+    def process_roll_setup():
+        # Rolling gives out cards, so each run rolls on its own copy of the positions
+        return [copy.deepcopy(fixture) for fixture in fixtures for _ in range(20)]
+
+    def process_roll(copies):
+        interface = copies.pop()
+        interface.process_roll([4, 4], interface.get_player(2))
+
+    def uncached_longest_road(fixture, player_):
+        # Searches the roads directly, as get_longest_road_length would return the cached length
+        for number, roads in fixture.board.player_roads.items():
+            blocked = {
+                node
+                for edge in roads
+                for node in TOPOLOGY.edge_nodes[edge]
+                if fixture.board._node_state[node]["player"] is not None
+                and fixture.board._node_state[node]["player"].number != number
+            }
+            find_longest_road(roads, blocked)
+
+    def minimax_setup():
+        # Each search starts from fresh copies with an empty transposition table, so every repeat does the same work
+        table = get_transposition_table(players[0][1])
+        if table is not None:
+            table.clear()
+            table.new_search()
+        searches = []
+        for fixture in fixtures:
+            search_interface = copy.deepcopy(fixture)
+            search_interface.set_minimax(True)
+            search_player = search_interface.get_player(2)
+            search_player.deadline = None
+            search_player.root_move_order = {}
+            searches.append((search_interface, search_player))
+        return searches
+
+    def minimax(searches):
+        for search_interface, search_player in searches:
+            search_player.search_iteration(
+                search_interface, search_player, BENCHMARK_MINIMAX_DEPTH
+            )
+
+    def playout(state):
+        # Plays one game to the end from each position, which is restored afterwards
+        # The same game is played every time, so that runs can be compared
+        for fixture, player_ in players:
+            playout_engine(fixture, rng=random.Random(seed)).play_games(player_, 1)
+            fixture.set_minimax(False)
+
+    def headless_game(state):
+        # The same game is played every time, as the length of a game varies a lot between seeds
+        match = game(make_players(), [1, 1], seed)
+        match.initial_placement()
+        match.play()
+
+    return {
+        "return_possible_moves": (
+            each_fixture(
+                lambda fixture, player_: fixture.return_possible_moves(player_)
+            ),
+            None,
+            200,
+        ),
+        "get_move_combinations": (
+            each_fixture(
+                lambda fixture, player_: player_.get_move_combinations(fixture, player_)
+            ),
+            None,
+            50,
+        ),
+        "evaluate_board": (
+            each_fixture(lambda fixture, player_: player_.evaluate_board(fixture)),
+            None,
+            200,
+        ),
+        "process_roll": (process_roll, process_roll_setup, 20 * len(fixtures)),
+        "update_special_cards": (
+            each_fixture(lambda fixture, player_: fixture.update_special_cards()),
+            None,
+            200,
+        ),
+        "clone": (
+            each_fixture(lambda fixture, player_: copy.deepcopy(fixture)),
+            None,
+            20,
+        ),
+        "find_longest_road": (each_fixture(uncached_longest_road), None, 200),
+        "get_longest_road_length": (
+            each_fixture(
+                lambda fixture, player_: [
+                    fixture.get_longest_road_length(other)
+                    for other in fixture.get_players_list()
+                ]
+            ),
+            None,
+            200,
+        ),
+        "minimax": (minimax, minimax_setup, 1),
+        "playout": (playout, None, 20),
+        "headless_game": (headless_game, None, 1),
+    }
+
+
+def run_benchmarks(names=None, seed=1, quick=False, record=None) -> dict:
+    """
+    Runs the benchmarks
+    :param names: The names of the benchmarks to run, or None for all of them
+    :param seed: The seed for the positions and games
+    :param quick: Whether to run fewer repeats
+    :param record: The path of an archive of recorded games to take the positions from, or None to build them
+    :return: The results, including the settings they were run with
+    """
+    if record is not None:
+        fixtures = load_fixtures(record, FIXTURE_TURNS)
+    else:
+        fixtures = [make_fixture(seed, turns) for turns in FIXTURE_TURNS]
+    benchmarks = get_benchmarks(fixtures, seed)
+    if names:
+        unknown = set(names) - set(benchmarks)
+        if unknown:
+            raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    else:
+        names = list(benchmarks)
+    repeat = 3 if quick else 10
+
+    results = {}
+    for name in names:
+        operation, setup, number = benchmarks[name]
+        # Run once first so that caches and lazily built tables are the same for every repeat
+        time_operation(operation, setup, 1, 1)
+        results[name] = time_operation(operation, setup, number, repeat)
+        print(
+            f"{name.ljust(25)} {results[name]['ops_per_sec']:>12.2f} ops/sec "
+            f"± {results[name]['relative_stdev'] * 100:.1f}%"
+        )
+
+    return {
+        "seed": seed,
+        "fixture_turns": FIXTURE_TURNS,
+        "record": record,
+        "fixtures": len(fixtures),
+        "minimax_depth": BENCHMARK_MINIMAX_DEPTH,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": CONFIG,
+        "benchmarks": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the game engine")
+    parser.add_argument("benchmarks", nargs="*")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--record", default=None)
+    parser.add_argument("--output", default="benchmark_results.json")
+    arguments = parser.parse_args()
+
+    if not os.path.exists("logs/players"):
+        os.makedirs("logs/players")
+
+    # Headless games with a single search process give the most stable timings
+    CONFIG["headless_mode"] = True
+    CONFIG["minimax_search_processes"] = 1
+
+    benchmark_results = run_benchmarks(
+        arguments.benchmarks, arguments.seed, arguments.quick, arguments.record
+    )
+    with open(arguments.output, "w") as file:
+        json.dump(benchmark_results, file, indent=4)
+    print(f"\nResults written to {arguments.output}")
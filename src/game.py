@@ -3,7 +3,10 @@ Game class, for setting up and running a game
 
 © 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
 """
+from contextlib import nullcontext, redirect_stdout
+
 from board_interface import *
+from game_record import game_recorder
 from player import player, endOfTurnException
 
 
@@ -44,6 +47,10 @@ class game:
                 )
             print("Table top mode is enabled")
             print("An acknowledgement will be required to continue each turn")
+        if CONFIG["headless_mode"] and not self.all_players_ai:
+            raise self.setupError(
+                "Headless mode is only compatible with a game featuring only AI players"
+            )
 
         # Double checks that the target score is valid, and warns the user if it is not the default
         if CONFIG["target_score"] != 10:
@@ -59,14 +66,17 @@ class game:
                 + ("shorter" if CONFIG["target_score"] < 10 else "longer")
                 + " than usual"
             )
-            for i in range(3, 0, -1):
-                print("Continuing in " + str(i) + " seconds")
-                time.sleep(1)
+            if not self.interface.headless:
+                for i in range(3, 0, -1):
+                    print("Continuing in " + str(i) + " seconds")
+                    time.sleep(1)
 
-    def __init__(self, players: list[player], game_number=[1, 1]):
+    def __init__(self, players: list[player], game_number=[1, 1], seed=None):
         """
         Initialises a 'match' of the game, which is just a game with stored results.
         :param players: A list of the players in the game
+        :param game_number: The number of the game and the number of games
+        :param seed: The seed of the game's random numbers, kept in the game record, or None for a random seed
         :return: None
         """
 
@@ -84,7 +94,11 @@ class game:
         self.all_players_ai = all(
             isinstance(player, ai_player) for player in self.players
         )
-        self.interface = board_interface(self.players, game_number)
+        self.interface = board_interface(self.players, game_number, seed)
+        # The seed is kept even when one was not given, so that every game can be played again
+        self.seed = self.interface.rng.seed
+        if CONFIG["game_record_file"] is not None:
+            self.interface.recorder = game_recorder(CONFIG["game_record_file"])
         self.turn = 1
         self.player_has_won = False
         self.stats = {}
@@ -92,14 +106,48 @@ class game:
         self.turn_time_total = {player.name: 0 for player in self.players}
         self.results = {player.name: 0 for player in self.players}
         self.player_victory_points = {player.name: [] for player in self.players}
+        # The search stats of each minimax player, added together over the match
+        self.search_stats = {
+            player.name: search_stats()
+            for player in self.players
+            if isinstance(player, ai_minimax)
+        }
+
+    def record_search_stats(self, player_) -> None:
+        """
+        Adds the stats of a player's most recent search to the stats for the match
+        The stats are read from the player rather than returned, as a search can end the turn with an exception
+        :param player_: The player who has just made a move
+        :return: None
+        """
+        if player_.name in self.search_stats:
+            self.search_stats[player_.name].merge(player_.search_stats)
+            player_.search_stats = search_stats()
+
+    def console_output(self):
+        """
+        Gets the context that the game is played in, which discards everything printed to the console in headless mode
+        :return: A context manager
+        """
+        return redirect_stdout(None) if self.interface.headless else nullcontext()
 
     def initial_placement(self):
+        """
+        Run the initial placement methods of the players
+        Everything printed is discarded in headless mode
+        :return: None
+        """
+        with self.console_output():
+            self.run_initial_placement()
+
+    def run_initial_placement(self):
         """
         Run the initial placement methods of the players
         :return: None
         """
 
-        os.system("clear" if os.name == "posix" else "cls")
+        if not self.interface.headless:
+            os.system("clear" if os.name == "posix" else "cls")
 
         # Perform the setup checking
         self.setup_checking()
@@ -153,6 +201,12 @@ class game:
             time.sleep(1)
             await_user_input("Are you ready to start the game?")
 
+        # Start recording before the initial placement, so that the whole development card deck is recorded
+        if self.interface.recorder is not None:
+            self.interface.recorder.start_game(
+                self.interface, self.game_number, self.seed
+            )
+
         # Set up the initial placement of the players
         self.interface.initial_placement()
 
@@ -168,12 +222,22 @@ class game:
             player.calculateVictoryPoints(self.interface)
 
     def play(self):
+        """
+        The main game loop
+        Everything printed is discarded in headless mode
+        :return: None
+        """
+        with self.console_output():
+            self.run_game()
+
+    def run_game(self):
         """
         The main game loop
         :return: None
         """
 
         self.start_time = time.time()
+        winner = None
 
         # Checks if the game has been won
         while not self.player_has_won:
@@ -190,7 +254,6 @@ class game:
                 player_turn_start_time = time.time()
 
                 # Sort cards and set variables
-                player_.resources.sort()
                 player_.development_cards.sort()
                 player_.has_built_this_turn = False
                 player_.has_played_dev_card_this_turn = False
@@ -234,7 +297,7 @@ class game:
                     if not isinstance(player_, ai_player):
                         input("Press enter to roll the dice")
                         print("\033[F", end="")
-                        two_dice = roll_dice()
+                        two_dice = roll_dice(self.interface.rng.dice)
                         dice_roll = sum(two_dice)
                         if isinstance(two_dice, list):
                             self.interface.board.current_roll = two_dice
@@ -245,7 +308,7 @@ class game:
                         print(f"You rolled {dice_roll}" + " " * 20 + "\033[K")
 
                     else:
-                        two_dice = roll_dice()
+                        two_dice = roll_dice(self.interface.rng.dice)
                         dice_roll = sum(two_dice)
                         if isinstance(two_dice, list):
                             self.interface.board.current_roll = two_dice
@@ -298,8 +361,11 @@ class game:
                             print(f"{player_} is thinking...")
                             time.sleep(random.uniform(0.5, 1.5))
 
-                        player_.turn_actions(self.interface)
-                        self.interface.update_special_cards()
+                        try:
+                            player_.turn_actions(self.interface)
+                        finally:
+                            self.record_search_stats(player_)
+                        self.interface.update_special_cards(player_)
                         num_moves_made += 1
                         if CONFIG["table_top_mode"]:
                             await_user_input()
@@ -329,7 +395,10 @@ class game:
                 self.interface.verify_game_integrity()
 
                 # End of turn waiting
-                if not CONFIG["table_top_mode"]:
+                # There is no one watching a headless game, so it does not wait at all
+                if self.interface.headless:
+                    pass
+                elif not CONFIG["table_top_mode"]:
                     if self.interface.all_players_ai:
                         if CONFIG["presentation_mode"]:
                             time.sleep(0.5)
@@ -353,7 +422,9 @@ class game:
                     >= CONFIG["target_score"]
                 ):
                     self.player_has_won = True
-                    os.system("clear")
+                    winner = player_
+                    if not self.interface.headless:
+                        os.system("clear")
                     self.interface.print_board()
                     print("\n")
                     print("- Turn " + str(self.turn) + " -")
@@ -381,8 +452,15 @@ class game:
         self.end_time = time.time()
         self.duration = self.end_time - self.start_time
 
+        if self.interface.recorder is not None:
+            self.interface.recorder.end_game(winner, self.turn, self.player_has_won)
+
         # Dump the moves of the players
         for player in self.players:
             if isinstance(player, ai_player):
                 player.dump_moves()
+            if player.name in self.search_stats:
+                self.interface.log_action(
+                    f"{player.name}'s search stats: {self.search_stats[player.name]}"
+                )
             self.results[player.name] = player.calculateVictoryPoints(self.interface)
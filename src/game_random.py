@@ -0,0 +1,53 @@
+"""
+Game Random Numbers
+The random number generators of a single game, with separate streams for the dice, the development card deck, the
+layout, the robber's steals, the randomised starting locations and each player's decisions
+Every stream is derived from the game seed, so a game can be played again exactly from its seed, and a player drawing
+more or fewer numbers, e.g. by searching for longer, does not change the dice or the deck of the game
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import random
+
+
+class game_random:
+    """
+    The random number streams of a game
+    Each stream is a random.Random seeded with the game seed and the name of the stream, in the same way as the
+    Zobrist keys, so the streams are the same in every process
+    """
+
+    def __init__(self, seed=None):
+        """
+        Initialises the streams of a game
+        :param seed: The game seed, or None to take a seed from the random module
+        """
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+
+        self.layout = self.stream("layout")
+        self.deck = self.stream("deck")
+        self.dice = self.stream("dice")
+        self.steal = self.stream("steal")
+        self.placement = self.stream("placement")
+        # Player number -> the stream of the player's decisions, made the first time the player needs it
+        self.players = {}
+
+    def stream(self, name) -> random.Random:
+        """
+        Creates a stream from the game seed
+        :param name: The name of the stream
+        :return: The stream
+        """
+        return random.Random(f"{self.seed}:{name}")
+
+    def player(self, number) -> random.Random:
+        """
+        Gets the stream of a player's decisions
+        :param number: The player number
+        :return: The stream
+        """
+        if number not in self.players:
+            self.players[number] = self.stream(f"player {number}")
+        return self.players[number]
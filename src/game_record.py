@@ -0,0 +1,539 @@
+"""
+Game Record
+Compact binary record of a game, holding the seed, the layout, and every roll and move made in it
+Records are appended to an archive file one after another, so a whole batch of games is kept in a single file that
+can be read back without the logs
+
+Each game is stored as a frame - the magic bytes, the format version and the length of the body, then the body
+The body starts with a header of the seed, the players, the layout and the order of the development card deck, and is
+followed by the events of the game. An event is an opcode byte and a fixed number of bytes for that opcode, which
+hold the IDs from the topology, the index of a resource in RESOURCES or of a card in DEVELOPMENT_CARDS, and player
+numbers. The resources given for the second settlement of the setup are not recorded, as they follow from where it is
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+import os
+import struct
+
+from ai_player import ai_player
+from CONFIG import CONFIG
+from resource_store import RESOURCES
+from search_state import DEVELOPMENT_CARDS
+from topology import *
+
+MAGIC = b"CGR"
+VERSION = 3
+
+# Magic, version and length of the body
+FRAME_HEADER = struct.Struct("<3sBI")
+# Whether the game has a seed, the seed, the game number, the number of games, the target score and the number of
+# players
+GAME_HEADER = struct.Struct("<BQHHBB")
+
+# The codes of the tiles and ports are the index in these tuples
+TILE_RESOURCES = RESOURCES + ("desert",)
+PORT_RESOURCES = RESOURCES + ("any",)
+
+# Stored in place of a value that is not there, e.g. an empty port slot or an unused argument
+NONE = 255
+
+# Event opcodes
+ROLL = 1
+SETTLEMENT = 2
+CITY = 3
+ROAD = 4
+BUY_DEVELOPMENT_CARD = 5
+PLAY_DEVELOPMENT_CARD = 6
+TRADE_WITH_BANK = 7
+TRADE_WITH_PORT = 8
+TRADE_WITH_PLAYER = 9
+ROBBER = 10
+STEAL = 11
+DISCARD = 12
+END = 13
+TURN = 14
+
+# Opcode -> (name, number of bytes after the opcode)
+EVENTS = {
+    # Player, first die, second die. A roll entered as a total is stored as the total and 0
+    ROLL: ("roll", 3),
+    # Player, node, whether it was free
+    SETTLEMENT: ("settlement", 3),
+    # Player, node
+    CITY: ("city", 2),
+    # Player, edge, whether it was free
+    ROAD: ("road", 3),
+    # Player, card drawn
+    BUY_DEVELOPMENT_CARD: ("buy development card", 2),
+    # Player, card, the resources chosen for a monopoly or year of plenty card
+    PLAY_DEVELOPMENT_CARD: ("play development card", 4),
+    # Player, resource given, resource received
+    TRADE_WITH_BANK: ("trade with bank", 3),
+    # Player, resource given, resource received, number of cards given
+    TRADE_WITH_PORT: ("trade with port", 4),
+    # Player, other player, resource given, resource received
+    TRADE_WITH_PLAYER: ("trade with player", 4),
+    # Tile
+    ROBBER: ("robber", 1),
+    # Player stealing, player stolen from, resource stolen
+    STEAL: ("steal", 3),
+    # Player, number of each resource discarded
+    DISCARD: ("discard", 1 + len(RESOURCES)),
+    # Winner, or 0 if no one won, the number of turns as two bytes, and whether the winner reached the target score
+    # A game that hits the turn limit is given to the player with the most victory points, who has not reached it
+    END: ("end", 4),
+    # Turn number as two bytes, recorded before the first roll of each turn
+    TURN: ("turn", 2),
+}
+
+
+def encode_string(string) -> bytes:
+    """
+    Encodes a string with its length in front
+    :param string: The string, at most 255 bytes long once encoded
+    :return: The encoded string
+    """
+    data = string.encode()
+    return bytes((len(data),)) + data
+
+
+def decode_string(body, offset) -> tuple:
+    """
+    Decodes a string written by encode_string
+    :param body: The bytes to read from
+    :param offset: The position of the string
+    :return: The string and the position after it
+    """
+    length = body[offset]
+    end = offset + 1 + length
+    return body[offset + 1 : end].decode(), end
+
+
+def resource_or_none(code):
+    """
+    Decodes an optional resource
+    :param code: The index of the resource, or NONE
+    :return: The resource, or None
+    """
+    return None if code == NONE else RESOURCES[code]
+
+
+def decode_event(opcode, payload) -> tuple:
+    """
+    Decodes the payload of an event into names, in the same form the board interface uses
+    :param opcode: The opcode of the event
+    :param payload: The bytes after the opcode
+    :return: The name of the event followed by its values
+    """
+    name = EVENTS[opcode][0]
+    if opcode == ROLL:
+        return name, payload[0], payload[1], payload[2]
+    if opcode == SETTLEMENT:
+        return name, payload[0], TOPOLOGY.node_names[payload[1]], bool(payload[2])
+    if opcode == CITY:
+        return name, payload[0], TOPOLOGY.node_names[payload[1]]
+    if opcode == ROAD:
+        return name, payload[0], TOPOLOGY.edge_names[payload[1]], bool(payload[2])
+    if opcode == BUY_DEVELOPMENT_CARD:
+        return name, payload[0], DEVELOPMENT_CARDS[payload[1]]
+    if opcode == PLAY_DEVELOPMENT_CARD:
+        return (
+            name,
+            payload[0],
+            DEVELOPMENT_CARDS[payload[1]],
+            resource_or_none(payload[2]),
+            resource_or_none(payload[3]),
+        )
+    if opcode == TRADE_WITH_BANK:
+        return name, payload[0], RESOURCES[payload[1]], RESOURCES[payload[2]]
+    if opcode == TRADE_WITH_PORT:
+        return (
+            name,
+            payload[0],
+            RESOURCES[payload[1]],
+            RESOURCES[payload[2]],
+            payload[3],
+        )
+    if opcode == TRADE_WITH_PLAYER:
+        return (
+            name,
+            payload[0],
+            payload[1],
+            RESOURCES[payload[2]],
+            RESOURCES[payload[3]],
+        )
+    if opcode == ROBBER:
+        return name, TILE_LETTERS[payload[0]]
+    if opcode == STEAL:
+        return name, payload[0], payload[1], RESOURCES[payload[2]]
+    if opcode == DISCARD:
+        return name, payload[0], dict(zip(RESOURCES, payload[1:]))
+    if opcode == TURN:
+        return name, payload[0] | payload[1] << 8
+    return name, payload[0] or None, payload[1] | payload[2] << 8, bool(payload[3])
+
+
+def decode_game(body) -> dict:
+    """
+    Decodes the body of a game's frame
+    :param body: The body
+    :return: A dict of the seed, game number, target score, players, tiles, ports, development card deck and events
+    """
+    (
+        has_seed,
+        seed,
+        game_number,
+        number_of_games,
+        target_score,
+        player_count,
+    ) = GAME_HEADER.unpack_from(body)
+    offset = GAME_HEADER.size
+
+    players = []
+    for _ in range(player_count):
+        number = body[offset]
+        colour, offset = decode_string(body, offset + 1)
+        strategy, offset = decode_string(body, offset)
+        players.append({"number": number, "colour": colour, "strategy": strategy})
+
+    tiles = []
+    for letter in TILE_LETTERS:
+        tiles.append((letter, TILE_RESOURCES[body[offset]], body[offset + 1]))
+        offset += 2
+
+    ports = []
+    for _ in TOPOLOGY.port_edges:
+        code = body[offset]
+        ports.append(None if code == NONE else PORT_RESOURCES[code])
+        offset += 1
+
+    deck_size = body[offset]
+    offset += 1
+    development_card_deck = [
+        DEVELOPMENT_CARDS[code] for code in body[offset : offset + deck_size]
+    ]
+    offset += deck_size
+
+    events = []
+    while offset < len(body):
+        opcode = body[offset]
+        size = EVENTS[opcode][1]
+        events.append(decode_event(opcode, body[offset + 1 : offset + 1 + size]))
+        offset += 1 + size
+
+    return {
+        "seed": seed if has_seed else None,
+        "game_number": [game_number, number_of_games],
+        "target_score": target_score,
+        "players": players,
+        "tiles": tiles,
+        "ports": ports,
+        "development_card_deck": development_card_deck,
+        "events": events,
+    }
+
+
+def read_game_records(path):
+    """
+    Reads the games in an archive file, in the order they were recorded
+    :param path: The path of the archive
+    :return: A generator of games, in the format returned by decode_game
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    offset = 0
+    while offset < len(data):
+        magic, version, length = FRAME_HEADER.unpack_from(data, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a game record, or is from another version")
+        offset += FRAME_HEADER.size
+        yield decode_game(data[offset : offset + length])
+        offset += length
+
+
+def merge_game_records(paths, destination) -> None:
+    """
+    Appends archives to another archive, deleting them afterwards
+    Frames are self contained, so the files are simply joined together
+    :param paths: The paths of the archives to append
+    :param destination: The path of the archive to append them to
+    :return: None
+    """
+    directory = os.path.dirname(destination)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(destination, "ab") as file:
+        for path in paths:
+            with open(path, "rb") as source:
+                file.write(source.read())
+            os.remove(path)
+
+
+class game_recorder:
+    """
+    Records the events of a game into a buffer, and appends the game to the archive in one write when it ends
+    The board interface calls the event methods as moves are made, and the game calls start_game and end_game
+    """
+
+    def __init__(self, path):
+        """
+        Initialises a recorder
+        :param path: The path of the archive to append games to
+        """
+        self.path = path
+        self.buffer = bytearray()
+        self.recording = False
+        # The turn of the last roll recorded
+        self.turn = None
+
+    def start_game(self, interface, game_number, seed=None) -> None:
+        """
+        Starts recording a game, writing its header
+        Must be called before the initial placement, so the whole development card deck is recorded
+        :param interface: The interface of the game
+        :param game_number: The number of the game and the number of games
+        :param seed: The seed of the game's random numbers, or None if it is not known
+        :return: None
+        """
+        board = interface.board
+        players = interface.get_players_list()
+        buffer = bytearray(
+            GAME_HEADER.pack(
+                seed is not None,
+                seed or 0,
+                game_number[0],
+                game_number[1],
+                CONFIG["target_score"],
+                len(players),
+            )
+        )
+        for player_ in players:
+            buffer.append(player_.number)
+            buffer += encode_string(player_.colour)
+            buffer += encode_string(
+                player_.strategy if isinstance(player_, ai_player) else ""
+            )
+        for tile_ in board.tiles:
+            buffer.append(TILE_RESOURCES.index(tile_.resource))
+            buffer.append(tile_.dice_number)
+        for port in board._port_state:
+            buffer.append(
+                NONE if port is None else PORT_RESOURCES.index(port["resource"])
+            )
+        buffer.append(len(board.development_card_deck))
+        buffer += bytes(
+            DEVELOPMENT_CARDS.index(card) for card in board.development_card_deck
+        )
+        self.buffer = buffer
+        self.recording = True
+        self.turn = None
+
+    def end_game(self, winner, turns, reached_target=True) -> None:
+        """
+        Records the end of the game and appends it to the archive
+        :param winner: The winner, or None if no one won
+        :param turns: The number of turns played
+        :param reached_target: Whether the winner reached the target score, rather than leading when the game was
+        ended at the turn limit
+        :return: None
+        """
+        self.buffer += bytes(
+            (
+                END,
+                winner.number if winner is not None else 0,
+                turns & 255,
+                turns >> 8,
+                reached_target,
+            )
+        )
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Appends the game recorded so far to the archive, and stops recording
+        :return: None
+        """
+        if not self.recording:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as file:
+            file.write(
+                FRAME_HEADER.pack(MAGIC, VERSION, len(self.buffer)) + self.buffer
+            )
+        self.buffer = bytearray()
+        self.recording = False
+
+    # Events ----------------------------------------------------------------------
+
+    def roll(self, player_, roll, turn) -> None:
+        """
+        Records a roll of the dice, and the start of the turn if it is the first roll of the turn
+        :param player_: The player rolling
+        :param roll: The two dice, or the total
+        :param turn: The turn number
+        :return: None
+        """
+        if turn != self.turn:
+            self.buffer += bytes((TURN, turn & 255, turn >> 8))
+            self.turn = turn
+        if isinstance(roll, list):
+            self.buffer += bytes((ROLL, player_.number, roll[0], roll[1]))
+        else:
+            self.buffer += bytes((ROLL, player_.number, roll, 0))
+
+    def settlement(self, player_, location, free) -> None:
+        """
+        Records a settlement being placed
+        :param player_: The player placing it
+        :param location: The name of the node
+        :param free: Whether it was placed without paying for it
+        :return: None
+        """
+        self.buffer += bytes(
+            (SETTLEMENT, player_.number, TOPOLOGY.node_ids[location], free)
+        )
+
+    def city(self, player_, location) -> None:
+        """
+        Records a settlement being upgraded to a city
+        :param player_: The player upgrading it
+        :param location: The name of the node
+        :return: None
+        """
+        self.buffer += bytes((CITY, player_.number, TOPOLOGY.node_ids[location]))
+
+    def road(self, player_, location, free) -> None:
+        """
+        Records a road being placed
+        :param player_: The player placing it
+        :param location: The names of the nodes at each end
+        :param free: Whether it was placed without paying for it
+        :return: None
+        """
+        self.buffer += bytes(
+            (ROAD, player_.number, TOPOLOGY.edge_ids[tuple(location)], free)
+        )
+
+    def buy_development_card(self, player_, card) -> None:
+        """
+        Records a development card being bought
+        :param player_: The player buying it
+        :param card: The card they drew
+        :return: None
+        """
+        self.buffer += bytes(
+            (BUY_DEVELOPMENT_CARD, player_.number, DEVELOPMENT_CARDS.index(card))
+        )
+
+    def play_development_card(self, player_, card, args) -> None:
+        """
+        Records a development card being played
+        :param player_: The player playing it
+        :param card: The card
+        :param args: The resources chosen for a monopoly or year of plenty card
+        :return: None
+        """
+        resources = [NONE, NONE]
+        if card in ("monopoly", "year of plenty"):
+            for i, resource in enumerate(args[:2]):
+                resources[i] = RESOURCES.index(resource)
+        self.buffer += bytes(
+            (
+                PLAY_DEVELOPMENT_CARD,
+                player_.number,
+                DEVELOPMENT_CARDS.index(card),
+                resources[0],
+                resources[1],
+            )
+        )
+
+    def trade_with_bank(self, player_, give, get) -> None:
+        """
+        Records a trade with the bank
+        :param player_: The player trading
+        :param give: The resource given
+        :param get: The resource received
+        :return: None
+        """
+        self.buffer += bytes(
+            (
+                TRADE_WITH_BANK,
+                player_.number,
+                RESOURCES.index(give),
+                RESOURCES.index(get),
+            )
+        )
+
+    def trade_with_port(self, player_, give, get, amount) -> None:
+        """
+        Records a trade with a port
+        :param player_: The player trading
+        :param give: The resource given
+        :param get: The resource received
+        :param amount: The number of cards given
+        :return: None
+        """
+        self.buffer += bytes(
+            (
+                TRADE_WITH_PORT,
+                player_.number,
+                RESOURCES.index(give),
+                RESOURCES.index(get),
+                amount,
+            )
+        )
+
+    def trade_with_player(self, player_, other_player, give, get) -> None:
+        """
+        Records a trade between two players
+        :param player_: The player who offered the trade
+        :param other_player: The player who accepted it
+        :param give: The resource the first player gave
+        :param get: The resource the first player received
+        :return: None
+        """
+        self.buffer += bytes(
+            (
+                TRADE_WITH_PLAYER,
+                player_.number,
+                other_player.number,
+                RESOURCES.index(give),
+                RESOURCES.index(get),
+            )
+        )
+
+    def robber(self, tile_id) -> None:
+        """
+        Records the robber being moved
+        :param tile_id: The ID of the tile it was moved to
+        :return: None
+        """
+        self.buffer += bytes((ROBBER, tile_id))
+
+    def steal(self, player_, player_stolen_from, card) -> None:
+        """
+        Records a card being stolen
+        :param player_: The player stealing
+        :param player_stolen_from: The player stolen from
+        :param card: The resource stolen
+        :return: None
+        """
+        self.buffer += bytes(
+            (STEAL, player_.number, player_stolen_from.number, RESOURCES.index(card))
+        )
+
+    def discard(self, player_, hand_before) -> None:
+        """
+        Records the cards a player discarded when a 7 was rolled
+        :param player_: The player discarding
+        :param hand_before: The counts of the player's resources before they discarded
+        :return: None
+        """
+        hand = player_.resources.counts()
+        self.buffer += bytes((DISCARD, player_.number))
+        self.buffer += bytes(
+            hand_before[resource] - hand[resource] for resource in RESOURCES
+        )
@@ -1,104 +1,101 @@
 """
-Methods to find the longest route in a graph.
-ChatGPT wrote some code as listed below
+Longest Road
+Finds the length of a player's longest road, and the connected clusters of their roads
+Roads are given as sets of edge IDs from the topology, and buildings as node IDs
 
 © 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
 """
 
+from topology import *
 
-# Using AI to write an AI program is ironic haha
+# Lengths that have already been found, keyed by the roads and the nodes blocking them
+# The length only depends on these, so an entry never goes out of date, and the same roads are found again and again
+# as the search applies and undoes moves
+_longest_road_cache = {}
+LONGEST_ROAD_CACHE_SIZE = 2**16
 
-# CHATGPT HAS WRITTEN THIS CODE ------------------------------------------------
 
-
-def find_longest_route(paths):
-    # create a dictionary to store the adjacency list of the graph
-    adj_list = {}
-    for path in paths:
-        a, b = path
-        if a not in adj_list:
-            adj_list[a] = set()
-        if b not in adj_list:
-            adj_list[b] = set()
-        adj_list[a].add(b)
-        adj_list[b].add(a)
-
-    # initialize variables for tracking the longest route and current path
-    longest_route = []
-    current_path = []
-
-    # recursively find the longest route starting from the first node
-    find_route_from_node(
-        list(adj_list.keys())[0], adj_list, set(), set(), longest_route, current_path
-    )
-
-    return longest_route
-
-
-def find_route_from_node(
-    node, adj_list, visited, used_paths, longest_route, current_path
-):
-    visited.add(node)
-    current_path.append(node)
-
-    # check if the current path is longer than the longest route so far
-    if len(current_path) > len(longest_route):
-        longest_route[:] = current_path
-
-    # recursively explore all unexplored neighbours of the node
-    unexplored_neighbours = [
-        neighbour for neighbour in adj_list[node] if neighbour not in visited
-    ]
-    if len(unexplored_neighbours) == 1:
-        # if there is only one unexplored neighbour, continue exploring that path
-        find_route_from_node(
-            unexplored_neighbours[0],
-            adj_list,
-            visited,
-            used_paths,
-            longest_route,
-            current_path,
-        )
-    elif len(unexplored_neighbours) > 1:
-        # if there are multiple unexplored neighbours, mark this as a fork in the road
-        for neighbour in unexplored_neighbours:
-            path = frozenset([node, neighbour])
-            if path not in used_paths:
-                used_paths.add(path)
-                find_route_from_node(
-                    neighbour,
-                    adj_list,
-                    visited.copy(),
-                    used_paths.copy(),
-                    longest_route,
-                    current_path.copy(),
-                )
-                used_paths.remove(path)
-
-    # remove the current node from the visited set and current path
-    visited.remove(node)
-    current_path.pop()
-
-
-# END OF CHATGPT'S CODE -------------------------------------------------------
-
-
-# Method to find the clusters of roads that are together
-def return_clusters(set):
+def road_clusters(roads) -> list[set]:
+    """
+    Groups roads into clusters of roads that are connected to each other
+    Each road is in exactly one cluster
+    :param roads: The edge IDs of the roads
+    :return: A list of sets of edge IDs
+    """
+    remaining = set(roads)
     clusters = []
-    # Iterates through every road that the player owns
-    for road in set:
-        # Checks through all existing clusters
-        for cluster in clusters:
-            # For every road in the cluster, check if the current road is connected to it
-            for node in cluster:
-                if road[0] in node or road[1] in node:
-                    # If it is, add the current road to the cluster, otherwise do nothing
-                    cluster.extend([road])
-                    break
-        else:
-            # If the road is not connected to any other road create a new cluster
-            if road not in [item for sublist in clusters for item in sublist]:
-                clusters.append([road])
-
+    while remaining:
+        edge = remaining.pop()
+        cluster = {edge}
+        stack = [edge]
+        while stack:
+            for node in TOPOLOGY.edge_nodes[stack.pop()]:
+                for neighbour in TOPOLOGY.node_edges[node]:
+                    if neighbour in remaining:
+                        remaining.remove(neighbour)
+                        cluster.add(neighbour)
+                        stack.append(neighbour)
+        clusters.append(cluster)
     return clusters
+
+
+def longest_road_length(roads, blocked) -> int:
+    """
+    Finds the number of roads in the longest road, which may not use a road twice or pass through a blocked node
+    Results are cached, so the search is only run the first time a set of roads is seen
+    :param roads: The edge IDs of the player's roads
+    :param blocked: The node IDs of other players' buildings, which break a road in two
+    :return: The length of the longest road
+    """
+    key = (frozenset(roads), frozenset(blocked))
+    length = _longest_road_cache.get(key)
+    if length is None:
+        length = find_longest_road(key[0], key[1])
+        if len(_longest_road_cache) >= LONGEST_ROAD_CACHE_SIZE:
+            _longest_road_cache.clear()
+        _longest_road_cache[key] = length
+    return length
+
+
+def find_longest_road(roads, blocked) -> int:
+    """
+    Finds the length of the longest road with a depth first search over the roads
+    Every road is tried as the first road of the route, heading towards each of its ends
+    :param roads: The edge IDs of the player's roads
+    :param blocked: The node IDs that a road cannot pass through
+    :return: The length of the longest road
+    """
+    longest = 0
+    used = set()
+    for edge in roads:
+        used.add(edge)
+        for end in TOPOLOGY.edge_nodes[edge]:
+            longest = max(longest, 1 + extend_road(end, roads, blocked, used))
+        used.remove(edge)
+        # No route can be longer than one that uses every road
+        if longest == len(roads):
+            break
+    return longest
+
+
+def extend_road(node, roads, blocked, used) -> int:
+    """
+    Finds the longest way to continue a road from a node
+    :param node: The node ID the road has reached
+    :param roads: The edge IDs of the player's roads
+    :param blocked: The node IDs that a road cannot pass through
+    :param used: The edge IDs already in the road, which is restored before returning
+    :return: The number of roads that can be added
+    """
+    if node in blocked:
+        return 0
+    longest = 0
+    for edge in TOPOLOGY.node_edges[node]:
+        if edge in roads and edge not in used:
+            used.add(edge)
+            a, b = TOPOLOGY.edge_nodes[edge]
+            longest = max(
+                longest, 1 + extend_road(b if a == node else a, roads, blocked, used)
+            )
+            used.remove(edge)
+    return longest
@@ -0,0 +1,111 @@
+"""
+Match Farm
+Runs batches of matches between AI players across a pool of processes, sending each match's results back as soon as
+it finishes. Used by the batch mode of __main__ to evaluate AI configurations over many matches
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from game import *
+from game_record import merge_game_records
+
+
+def get_match_processes() -> int:
+    """
+    Gets the number of processes to run matches in, from CONFIG["batch_processes"]
+    :return: The number of processes
+    """
+    if CONFIG["batch_processes"] is None:
+        return max(1, multiprocessing.cpu_count())
+    return max(1, CONFIG["batch_processes"])
+
+
+def init_match_worker(config, directory) -> None:
+    """
+    Sets up a worker process in the match pool
+    Each worker works in its own directory, so that the log files of matches running at the same time do not clash
+    :param config: The CONFIG of the main process, which may have been changed in the menu
+    :param directory: The directory to make the worker's directory in
+    :return: None
+    """
+    CONFIG.update(config)
+    # Matches are already run in parallel, so each search runs in the worker itself
+    CONFIG["minimax_search_processes"] = 1
+    CONFIG["headless_mode"] = True
+
+    worker_directory = os.path.join(directory, f"worker_{os.getpid()}")
+    os.makedirs(os.path.join(worker_directory, "logs", "players"), exist_ok=True)
+    # Each worker records its games to its own file, which are joined together once the batch is finished
+    if CONFIG["game_record_file"] is not None:
+        CONFIG["game_record_file"] = os.path.join(worker_directory, "games.rec")
+    os.chdir(worker_directory)
+
+
+def run_match(players, match_number, number_of_matches, seed) -> dict:
+    """
+    Plays a single match in a worker process
+    :param players: The players, which are copies sent from the main process
+    :param match_number: The number of the match
+    :param number_of_matches: The total number of matches in the batch
+    :param seed: The seed for the match's random numbers, see game_random
+    :return: The match's results, the number of turns, total turn time and search stats of each player, and the match
+    duration
+    """
+    for player_ in players:
+        if isinstance(player_, ai_player):
+            player_.make_log_file()
+
+    match = game(players, [match_number, number_of_matches], seed)
+    match.initial_placement()
+    match.play()
+    return {
+        "match_number": match_number,
+        "results": match.results,
+        "player_num_turns": match.player_num_turns,
+        "turn_time_total": match.turn_time_total,
+        "duration": match.duration,
+        "player_victory_points": match.player_victory_points,
+        "search_stats": match.search_stats,
+    }
+
+
+def run_matches(players, number_of_matches, seed=None, directory="temp"):
+    """
+    Runs a batch of matches across the pool, yielding the results of each match as it finishes
+    Every match has its own seed, taken from the batch seed and the match number, so a batch can be repeated
+    :param players: The players, all of which must be AI players
+    :param number_of_matches: The number of matches to play
+    :param seed: The batch seed, or None for a random seed
+    :param directory: The directory for the workers' log files and game records
+    :return: A generator of match results, in the format returned by run_match
+    """
+    if not all(isinstance(player_, ai_player) for player_ in players):
+        raise ValueError("Batch mode can only be used with AI players")
+    if seed is None:
+        seed = random.randrange(2**32)
+    os.makedirs(directory, exist_ok=True)
+
+    with ProcessPoolExecutor(
+        max_workers=get_match_processes(),
+        initializer=init_match_worker,
+        initargs=(CONFIG.copy(), os.path.abspath(directory)),
+    ) as executor:
+        futures = [
+            executor.submit(run_match, players, i + 1, number_of_matches, seed + i + 1)
+            for i in range(number_of_matches)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+    if CONFIG["game_record_file"] is not None:
+        merge_game_records(
+            [
+                os.path.join(directory, worker, "games.rec")
+                for worker in sorted(os.listdir(directory))
+                if worker.startswith("worker_")
+                and os.path.exists(os.path.join(directory, worker, "games.rec"))
+            ],
+            CONFIG["game_record_file"],
+        )
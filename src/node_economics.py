@@ -0,0 +1,149 @@
+"""
+Node Economics
+How good each node of a board is to build on, worked out once for each layout from the tiles and ports around it
+Used by the heuristics and the placement code, instead of adding up the tiles around a node every time it is scored
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+from topology import *
+from resource_store import RESOURCES
+
+# The tables of the layouts seen so far, keyed by the layout
+# Boards look their table up here rather than storing it, so it is not copied when a board is cloned
+_economics_cache = {}
+
+
+def get_node_economics(tiles, port_state):
+    """
+    Gets the table for a layout, building it the first time the layout is seen
+    :param tiles: The tiles of the board, sorted by letter
+    :param port_state: The ports of the board, indexed by port slot
+    :return: The node economics of the layout
+    """
+    key = (
+        tuple((tile_.resource, tile_.dice_number) for tile_ in tiles),
+        tuple(
+            (port["symbol"], port["resource"]) if port is not None else None
+            for port in port_state
+        ),
+    )
+    economics = _economics_cache.get(key)
+    if economics is None:
+        economics = node_economics(tiles, port_state)
+        _economics_cache[key] = economics
+    return economics
+
+
+def calculate_resource_rarity(tiles) -> dict:
+    """
+    Calculates the rarity of each resource on a board. The higher the number, the more rare
+    :param tiles: The tiles of the board
+    :return: A dictionary with the resource as the key and the rarity, normalised between 0 and 1, as the value
+    """
+    resource_rarity_scores = dict.fromkeys(RESOURCES, 0)
+    for tile_ in tiles:
+        if tile_.resource != "desert":
+            # Add the frequency of the resource to the score
+            # The higher the frequency, the less rare the resource, therefore the score is subtracted from 6
+            resource_rarity_scores[tile_.resource] += 6 - tile_.frequency
+
+    # Create the final scores by averaging the scores for each resource
+    total = sum(resource_rarity_scores.values())
+    resource_rarity_scores = {
+        resource: score / total for resource, score in resource_rarity_scores.items()
+    }
+
+    # Normalise the scores
+    lowest = min(resource_rarity_scores.values())
+    highest = max(resource_rarity_scores.values())
+    if highest == lowest:
+        return dict.fromkeys(RESOURCES, 0.0)
+    return {
+        resource: (score - lowest) / (highest - lowest)
+        for resource, score in resource_rarity_scores.items()
+    }
+
+
+class node_economics:
+    """
+    Feature table of a layout, with each feature stored as a tuple indexed by node ID
+    Only depends on the tiles and ports, so the robber and buildings do not change it
+    """
+
+    __slots__ = (
+        "rarity",
+        "pips",
+        "tile_counts",
+        "resource_pips",
+        "tile_resources",
+        "values",
+        "nearest_ports",
+        "port_values",
+    )
+
+    def __init__(self, tiles, port_state):
+        """
+        Builds the table
+        :param tiles: The tiles of the board, sorted by letter
+        :param port_state: The ports of the board, indexed by port slot
+        """
+        # Resource -> rarity between 0 and 1, see calculate_resource_rarity
+        self.rarity = calculate_resource_rarity(tiles)
+
+        pips = []
+        tile_counts = []
+        resource_pips = []
+        tile_resources = []
+        values = []
+        for node in range(len(TOPOLOGY.node_names)):
+            node_tiles = [tiles[tile_id] for tile_id in TOPOLOGY.node_tiles[node]]
+            vector = dict.fromkeys(RESOURCES, 0)
+            for tile_ in node_tiles:
+                if tile_.resource != "desert":
+                    vector[tile_.resource] += tile_.frequency
+            # Number of dots on the tiles around the node, so the number of rolls out of 36 that produce something
+            pips.append(sum(tile_.frequency for tile_ in node_tiles))
+            tile_counts.append(len(node_tiles))
+            # Pips of each resource, in the order of RESOURCES
+            resource_pips.append(tuple(vector.values()))
+            # Types of tile around the node, including the desert
+            tile_resources.append(frozenset(tile_.resource for tile_ in node_tiles))
+            # Pips weighted so that rare resources are worth up to twice as much
+            values.append(
+                sum(
+                    amount * (1 + self.rarity[resource])
+                    for resource, amount in vector.items()
+                )
+            )
+        self.pips = tuple(pips)
+        self.tile_counts = tuple(tile_counts)
+        self.resource_pips = tuple(resource_pips)
+        self.tile_resources = tuple(tile_resources)
+        self.values = tuple(values)
+
+        # Node -> (distance in roads, port type, port resource) of the closest port
+        # Node -> value of the closest port to the resources around the node, less the further away the port is
+        # A 2:1 port is worth twice the pips of its resource, and a 3:1 port twice the pips of the node's best resource
+        nearest_ports = []
+        port_values = []
+        for node in range(len(TOPOLOGY.node_names)):
+            distances = TOPOLOGY.node_distances[node]
+            nearest = None
+            for slot, edge in enumerate(TOPOLOGY.port_edges):
+                port = port_state[slot]
+                if port is None:
+                    continue
+                distance = min(distances[end] for end in TOPOLOGY.edge_nodes[edge])
+                if nearest is None or distance < nearest[0]:
+                    nearest = (distance, port["symbol"], port["resource"])
+            nearest_ports.append(nearest)
+            if nearest is None:
+                port_values.append(0.0)
+            elif nearest[1] == "2:1":
+                pips = resource_pips[node][RESOURCES.index(nearest[2])]
+                port_values.append(2 * pips / (1 + nearest[0]))
+            else:
+                port_values.append(2 * max(resource_pips[node]) / (1 + nearest[0]))
+        self.nearest_ports = tuple(nearest_ports)
+        self.port_values = tuple(port_values)
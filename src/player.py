@@ -16,6 +16,8 @@ from tabulate import tabulate
 
 # import json_fix
 from CONFIG import CONFIG
+from topology import *
+from resource_store import *
 
 
 # Exception to be raised when a player ends their turn
@@ -55,7 +57,7 @@ class player:
         self.name = "Player " + str(number)
         self.coloured_name = termcolor.colored(self.name, self.colour)
         self.victory_points = 0
-        self.resources = []
+        self.resources = resource_store()
         self.development_cards = []
         self.played_robber_cards = 0
         self.has_built_this_turn = False
@@ -95,12 +97,10 @@ class player:
         """
         res = []
         buildings_list = interface.get_buildings_list()
-        for key, item in buildings_list.items():
-            if buildings_list[key]["player"] is not None:
-                if buildings_list[key]["player"].number == self.number:
-                    for tile in buildings_list[key]["tiles"]:
-                        if tile.resource not in res:
-                            res.append(tile.resource)
+        for key in interface.get_player_buildings(self):
+            for tile in buildings_list[key]["tiles"]:
+                if tile.resource not in res:
+                    res.append(tile.resource)
         return res
 
     def count_cards(self, card_type) -> dict:
@@ -109,15 +109,14 @@ class player:
         :param card_type: The type of card to count, either "resource" or "development"
         :return: The number of each card
         """
+        # Resources are already counted
+        if card_type in ["resource", "resources"]:
+            return self.resources.counts()
+
         card_count = {}
 
         # Get the card list
-        if card_type in ["resource", "resources"]:
-            list_ = self.resources
-            for resource in ["wheat", "wood", "sheep", "clay", "rock"]:
-                card_count[resource] = 0
-        else:
-            list_ = self.development_cards
+        list_ = self.development_cards
 
         # Count the cards
         for card in list_:
@@ -134,11 +133,12 @@ class player:
         :return: None
         """
         # Get the card list and sort it
+        # The resource cards are always in alphabetical order already
         if type_ in ["resource", "resources"]:
             list_to_print = self.resources
         else:
             list_to_print = self.development_cards
-        list_to_print.sort()
+            list_to_print.sort()
 
         if filter_bought_dev_cards and type_ == "development":
             for card in self.gained_dev_cards_this_turn:
@@ -166,69 +166,53 @@ class player:
                 print(
                     f"You have played {self.played_robber_cards} of your soldier cards"
                 )
-        self.resources.sort()
         self.development_cards.sort()
 
-    def calculateVictoryPoints(
-        self, interface, output=False, buildings_list=None
-    ) -> int:
+    def calculateVictoryPoints(self, interface, output=False) -> int:
         """
-        Calculates the player's victory points, from both their settlements/cities and their development cards
-        :param buildings_list:
+        Gets the player's victory points, from both their settlements/cities and their development cards
+        The total is kept up to date by the board interface whenever a building, development card or special card
+        changes hands, so it is not counted again here
         :param output: Whether to print the victory points
-        :param interface: The interface, so that _buildings can be checked
+        :param interface: The interface, so that the sources of the victory points can be printed
         :return: The player's victory points
         """
-        self.victory_points = 0
-        sources = {
-            "settlements": 0,
-            "cities": 0,
-            "development cards": 0,
-            "longest_road": 0,
-            "largest_army": 0,
-        }
-
-        # Get the buildings list
-        if buildings_list is None:
-            buildings_list = interface.get_buildings_list()
-
-        # Count the number of settlements and cities, and add the victory points
-        for building in buildings_list:
-            if buildings_list[building] is not None:
-                if buildings_list[building].get("player") == self:
-                    if buildings_list[building].get("building") == "settlement":
-                        self.victory_points += 1
-                        sources["settlements"] += 1
-                    elif buildings_list[building].get("building") == "city":
-                        self.victory_points += 2
-                        sources["cities"] += 1
-        # Count the number of development cards that are victory points, and add the victory points
-        for card in self.development_cards:
-            if card == "victory point":
-                self.victory_points += 1
-                sources["development cards"] += 1
-        # Check if the player has the largest army or longest road, and add the victory points
-        if interface.get_largest_army()[0] == self:
-            self.victory_points += 2
-            sources["largest_army"] += 1
-        # Check if the player has the longest road, and add the victory points
-        if interface.get_longest_road()[0] == self:
-            self.victory_points += 2
-            sources["longest_road"] += 1
-
         # If output is True, print the victory points
         if output:
             print(f"Player has {self.victory_points} victory points")
-            for source in sources:
+            for source, count in self.count_victory_points(interface)[1].items():
                 # If a source has any victory points, print it
-                if sources[source] > 0:
-                    print(f"{source}: {sources[source]}")
+                if count > 0:
+                    print(f"{source}: {count}")
                     # Also print the development cards if the source is development cards
                     if source == "development cards":
                         self.printHand("development cards")
 
         return self.victory_points
 
+    def count_victory_points(self, interface) -> tuple[int, dict]:
+        """
+        Counts the player's victory points from scratch, from the board and their development cards
+        Used to print where the victory points come from, and to check the total kept by the board interface
+        :param interface: The interface, so that the buildings and special cards can be checked
+        :return: The total, and the number of each source of victory points
+        """
+        sources = {
+            "settlements": interface.count_structure(self, "settlement"),
+            "cities": interface.count_structure(self, "city"),
+            "development cards": self.development_cards.count("victory point"),
+            "longest_road": int(interface.get_longest_road()[0] == self),
+            "largest_army": int(interface.get_largest_army()[0] == self),
+        }
+        total = (
+            sources["settlements"]
+            + 2 * sources["cities"]
+            + sources["development cards"]
+            + 2 * sources["longest_road"]
+            + 2 * sources["largest_army"]
+        )
+        return total, sources
+
     # Placing Roads and Settlements ------------------------------------------------
 
     def choose_placement_location(
@@ -288,10 +272,9 @@ class player:
         # Get the current road endings
         # Roads need to connect to a current road ending
         current_road_endings = []
-        for tuple_, details in interface.get_roads_list().items():
-            if details["player"] == self:
-                current_road_endings.append(tuple_[0])
-                current_road_endings.append(tuple_[1])
+        for tuple_ in interface.get_player_roads(self):
+            current_road_endings.append(tuple_[0])
+            current_road_endings.append(tuple_[1])
 
         # Print the board
         interface.print_board(print_letters=True)
@@ -397,15 +380,14 @@ class player:
 
         # Get a list of players that can be stolen from
         players_to_steal_from = []
-        for key in interface.get_buildings_list():
-            value = interface.get_buildings_list()[key]
-            if key.find(new_robber_location.letter) != -1:
-                if (
-                    value["player"] is not None
-                    and value["player"] not in players_to_steal_from
-                    and value["player"] != self
-                ):
-                    players_to_steal_from.append(value["player"])
+        for node in TOPOLOGY.tile_nodes[TILE_LETTERS.index(new_robber_location.letter)]:
+            value = interface.get_buildings_list()[TOPOLOGY.node_names[node]]
+            if (
+                value["player"] is not None
+                and value["player"] not in players_to_steal_from
+                and value["player"] != self
+            ):
+                players_to_steal_from.append(value["player"])
 
         singular_player_to_steal_from = None
 
@@ -564,15 +546,12 @@ class player:
         """
 
         ports = []
-        for port in interface.get_ports_list():
-            if interface.get_ports_list()[port] is not None:
-                if interface.get_ports_list()[port]["player"] is not None:
-                    if interface.get_ports_list()[port]["player"].number == self.number:
-                        resource = interface.get_ports_list()[port]["resource"]
-                        if resource == "any" and "3:1 Port" not in ports:
-                            ports.append("3:1 Port")
-                        else:
-                            ports.append(f"{resource} Port")
+        for location, port in interface.get_player_ports(self):
+            resource = port["resource"]
+            if resource == "any" and "3:1 Port" not in ports:
+                ports.append("3:1 Port")
+            else:
+                ports.append(f"{resource} Port")
 
         if len(ports) > 0:
             print("You have access to the following ports:")
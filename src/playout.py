@@ -0,0 +1,267 @@
+"""
+Playout Engine
+Plays games from any position to the end as quickly as possible, with a lightweight random policy
+Runs on an interface in minimax mode, so nothing is logged or printed, and skips the checks and copies made by a normal
+game. Used for the playouts of sampling based searches, and to compare players over many games
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import random
+import time
+
+from CONFIG import CONFIG
+from resource_store import RESOURCES
+from search_state import SearchState
+
+# Every total of two dice, once for each way of rolling it, so that a random item has the odds of a roll
+DICE_TOTALS = tuple(first + second for first in range(1, 7) for second in range(1, 7))
+
+# The number of each structure a player can build
+STRUCTURE_LIMITS = {"road": 15, "settlement": 5, "city": 4}
+
+
+class playout_engine:
+    """
+    Plays out games on an interface, changing it in place
+    Every player uses the same random policy, and no one initiates trades with other players
+    """
+
+    def __init__(
+        self, interface, build_chance=0.5, max_moves_per_turn=None, rng=random
+    ):
+        """
+        Initialises the engine for an interface, putting the interface into minimax mode
+        :param interface: The interface to play on
+        :param build_chance: The chance of building a road, buying a development card or trading with the bank when
+        able to, instead of ending the turn
+        :param max_moves_per_turn: The number of moves after which a turn is ended, defaults to
+        CONFIG["max_moves_per_turn_ai"]
+        :param rng: The random number generator for the dice and the random policy, defaults to the random module
+        """
+        self.interface = interface
+        self.rng = rng
+        self.interface.set_minimax(True)
+        self.build_chance = build_chance
+        self.max_moves_per_turn = (
+            max_moves_per_turn or CONFIG["max_moves_per_turn_ai"] or 100
+        )
+        self.costs = interface.get_building_cost_list()
+
+    # Dice and deck ---------------------------------------------------------------
+
+    def shuffle_deck(self) -> None:
+        """
+        Shuffles the development cards left in the deck
+        Restoring a search state gives the true order of the deck, which no player can know, so the deck is shuffled
+        at the start of each playout rather than every playout drawing the same cards
+        :return: None
+        """
+        self.rng.shuffle(self.interface.board.development_card_deck)
+
+    def roll(self, current_player) -> int:
+        """
+        Rolls the dice for a player
+        On a 7, players with too many cards discard at random, and the robber is moved to a random tile to steal from
+        a random player, instead of asking the players
+        :param current_player: The player rolling the dice
+        :return: The total of the dice
+        """
+        interface = self.interface
+        rng = self.rng
+        roll = DICE_TOTALS[int(rng.random() * 36)]
+        if roll != 7:
+            interface.produce_resources(roll)
+            return roll
+
+        for player_ in interface.get_players_list():
+            hand = player_.resources
+            if len(hand) >= 7:
+                for _ in range(len(hand) // 2):
+                    interface.return_player_card(
+                        player_, hand[int(rng.random() * len(hand))]
+                    )
+        interface.move_robber(
+            rng.choice(
+                [
+                    tile_.letter
+                    for tile_ in interface.get_tiles_list()
+                    if tile_.resource != "desert" and not tile_.contains_robber
+                ]
+            )
+        )
+        victims = [
+            player_
+            for player_ in interface.get_players_list()
+            if player_ is not current_player and len(player_.resources) > 0
+        ]
+        if victims:
+            interface.steal_from_player(rng.choice(victims), current_player)
+        return roll
+
+    # Moves -----------------------------------------------------------------------
+
+    def can_afford(self, hand, structure) -> bool:
+        """
+        Checks whether a hand has the resources for a structure
+        :param hand: The counts of the player's resources
+        :param structure: The structure to check
+        :return: Whether the hand can pay for it
+        """
+        for resource, amount in self.costs[structure].items():
+            if hand[resource] < amount:
+                return False
+        return True
+
+    def choose_move(self, current_player) -> list:
+        """
+        Chooses a move with the random policy
+        Builds a city or settlement whenever possible, and otherwise sometimes builds a road, buys a development card
+        or trades with the bank, before ending the turn
+        Checks the hand directly rather than listing every possible move, as most of them are never chosen
+        :param current_player: The player making the move
+        :return: The move, in the format generated by ai_minimax.get_move_combinations
+        """
+        interface = self.interface
+        rng = self.rng
+        board = interface.board
+        number = current_player.number
+        hand = current_player.resources.counts()
+
+        if (
+            self.can_afford(hand, "city")
+            and board.player_settlements[number]
+            and len(board.player_cities[number]) < STRUCTURE_LIMITS["city"]
+        ):
+            return [
+                "build city",
+                rng.choice(interface.get_player_settlements(current_player)),
+            ]
+        if (
+            self.can_afford(hand, "settlement")
+            and len(board.player_settlements[number]) < STRUCTURE_LIMITS["settlement"]
+        ):
+            locations = interface.get_potential_building_locations(current_player)
+            if locations:
+                return ["build settlement", rng.choice(locations)]
+        if (
+            self.can_afford(hand, "road")
+            and len(board.player_roads[number]) < STRUCTURE_LIMITS["road"]
+            and rng.random() < self.build_chance
+        ):
+            locations = interface.get_potential_road_locations(current_player)
+            if locations:
+                return ["build road", rng.choice(locations)]
+        if (
+            hand["sheep"] >= 1
+            and hand["rock"] >= 1
+            and hand["wheat"] >= 1
+            and board.development_card_deck
+            and rng.random() < self.build_chance
+        ):
+            return ["buy development card"]
+        if not current_player.has_built_this_turn:
+            giving = [card for card, amount in hand.items() if amount >= 4]
+            if giving and rng.random() < self.build_chance:
+                give = rng.choice(giving)
+                return [
+                    "trade with bank",
+                    give,
+                    rng.choice([card for card in RESOURCES if card != give]),
+                ]
+        return ["end turn"]
+
+    def make_move(self, current_player, move):
+        """
+        Makes a move other than ending the turn
+        Roads are paid for here, as place_road does not take resources in minimax mode
+        :param current_player: The player making the move
+        :param move: The move, in the format generated by ai_minimax.get_move_combinations
+        :return: The player if the move won them the game, otherwise None
+        """
+        interface = self.interface
+        if move[0] == "build road":
+            for resource, amount in self.costs["road"].items():
+                for _ in range(amount):
+                    interface.return_player_card(current_player, resource)
+        # The interface keeps the special cards and victory points up to date as the move is made
+        interface.perform_move(current_player, move)
+        if current_player.calculateVictoryPoints(interface) >= CONFIG["target_score"]:
+            return current_player
+        return None
+
+    def end_turn(self, current_player):
+        """
+        Ends a player's turn and starts the next player's turn, rolling the dice for them
+        :param current_player: The player ending their turn
+        :return: The next player
+        """
+        interface = self.interface
+        next_player = interface.get_next_player(current_player)
+        for player_ in interface.get_players_list():
+            player_.gained_dev_cards_this_turn[:] = []
+        next_player.has_built_this_turn = False
+        next_player.has_played_dev_card_this_turn = False
+        self.roll(next_player)
+        return next_player
+
+    # Games -----------------------------------------------------------------------
+
+    def play(self, current_player, moves_this_turn=0, max_turns=None) -> tuple:
+        """
+        Plays a game from the current position until a player wins or the number of turns runs out
+        The dice are not rolled for the current player, as they are assumed to have already rolled
+        :param current_player: The player to move, from the engine's interface
+        :param moves_this_turn: The number of moves the player has already made this turn
+        :param max_turns: The number of turns to play before stopping, or None to play until a player wins
+        :return: The winner, or None if no player won, and the number of turns that were ended
+        """
+        limit = self.max_moves_per_turn
+        turns = 0
+        while max_turns is None or turns < max_turns:
+            if moves_this_turn >= limit:
+                move = ["end turn"]
+            else:
+                move = self.choose_move(current_player)
+            if move[0] == "end turn":
+                current_player = self.end_turn(current_player)
+                moves_this_turn = 0
+                turns += 1
+                continue
+            winner = self.make_move(current_player, move)
+            if winner is not None:
+                return winner, turns
+            moves_this_turn += 1
+        return None, turns
+
+    def play_games(self, current_player, games, max_turns=None) -> dict:
+        """
+        Plays a number of games from the current position, which is restored before each game
+        :param current_player: The player to move, from the engine's interface
+        :param games: The number of games to play
+        :param max_turns: The number of turns to play in each game, or None to play until a player wins
+        :return: The number of wins for each player number, with None for games no one won, the average number of
+        turns and the games played per second
+        """
+        interface = self.interface
+        start_state = SearchState.from_interface(interface)
+        number = current_player.number
+        wins = {player_.number: 0 for player_ in interface.get_players_list()}
+        wins[None] = 0
+        total_turns = 0
+
+        start = time.perf_counter()
+        for _ in range(games):
+            start_state.apply_to(interface)
+            self.shuffle_deck()
+            winner, turns = self.play(interface.get_player(number), 0, max_turns)
+            wins[winner.number if winner is not None else None] += 1
+            total_turns += turns
+        elapsed = time.perf_counter() - start
+        start_state.apply_to(interface)
+
+        return {
+            "games": games,
+            "wins": wins,
+            "average_turns": total_turns / games if games else 0.0,
+            "games_per_second": games / elapsed if elapsed > 0 else 0.0,
+        }
@@ -13,19 +13,16 @@ def get_port_combinations(interface, player):
     :return: The list of combinations
     """
     port_resources = []
-    for port in interface.get_ports_list():
-        if interface.get_ports_list()[port] is not None:
-            if interface.get_ports_list()[port]["player"] is not None:
-                if interface.get_ports_list()[port]["player"].number == player.number:
-                    # Get the resource that the port trades for
-                    resource = interface.get_ports_list()[port]["resource"]
-                    # If the port is a 3:1 port, add all resources to the list
-                    if resource == "any":
-                        for card in player.resources:
-                            if player.resources.count(card) >= 3:
-                                port_resources.append(card)
-                    else:
-                        for card in player.resources:
-                            if card == resource and player.resources.count(card) >= 2:
-                                port_resources.append(card)
+    hand = player.resources.counts()
+    for location, port in interface.get_player_ports(player):
+        # Get the resource that the port trades for
+        resource = port["resource"]
+        # If the port is a 3:1 port, add all resources to the list
+        # Each resource is added once for every card of it in the hand
+        if resource == "any":
+            for card, amount in hand.items():
+                if amount >= 3:
+                    port_resources.extend([card] * amount)
+        elif hand.get(resource, 0) >= 2:
+            port_resources.extend([resource] * hand[resource])
     return port_resources
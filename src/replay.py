@@ -0,0 +1,363 @@
+"""
+Replay Engine
+Rebuilds the positions of a recorded game by applying the events of its record to a board interface, without asking
+the players for any decisions. Snapshots are taken every few turns as the game is replayed, so that jumping around a
+long game only replays the events since the nearest snapshot
+Used to reproduce the position an AI made a move in, and to collect real mid-game positions for the benchmarks
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+from board_interface import *
+from game_record import read_game_records
+
+
+def load_replay(path, index=0, players=None):
+    """
+    Loads a game from an archive of game records
+    :param path: The path of the archive
+    :param index: The position of the game in the archive
+    :param players: The players to replay the game with, see replay_engine
+    :return: The replay engine of the game
+    """
+    for position, record in enumerate(read_game_records(path)):
+        if position == index:
+            return replay_engine(record, players)
+    raise IndexError(f"{path} does not have a game {index}")
+
+
+def make_player(number, colour, strategy) -> player:
+    """
+    Creates a player for a recorded player, with the default settings of its strategy
+    :param number: The player number
+    :param colour: The player colour
+    :param strategy: The recorded strategy, or an empty string for a human player
+    :return: The player
+    """
+    if strategy.startswith("mcts"):
+        return ai_mcts(number, colour)
+    if strategy.startswith("minimax"):
+        return ai_minimax(number, colour)
+    if strategy:
+        return ai_random(number, colour)
+    return player(number, colour)
+
+
+class replay_engine:
+    """
+    Replays a recorded game on an interface, which is changed in place
+    Positions are addressed by the number of events applied, or by the turn and the player about to roll
+    """
+
+    def __init__(
+        self, record, players=None, snapshot_interval=CONFIG["replay_snapshot_interval"]
+    ):
+        """
+        Initialises the engine, setting up the board of the game before the initial placement
+        :param record: The game, in the format returned by game_record.read_game_records
+        :param players: The players to replay the game with, which must have the same numbers as the recorded
+        players, or None to create players with the default settings of the recorded strategies
+        :param snapshot_interval: The number of turns between snapshots, defaults to CONFIG["replay_snapshot_interval"]
+        """
+        self.record = record
+        self.events = record["events"]
+        self.snapshot_interval = max(1, snapshot_interval)
+        order = [details["number"] for details in record["players"]]
+
+        if players is None:
+            players = [
+                make_player(details["number"], details["colour"], details["strategy"])
+                for details in record["players"]
+            ]
+        else:
+            players_by_number = {player_.number: player_ for player_ in players}
+            if sorted(players_by_number) != sorted(order):
+                raise ValueError("The players do not match the players of the record")
+            players = [players_by_number[number] for number in order]
+
+        # The interface is given the game's seed, so its random number streams start where the game's did
+        # The layout and deck are still set from the record, as a record does not always have a seed
+        seed = record["seed"] if record["seed"] is not None else 0
+        self.interface = board_interface(players, record["game_number"], seed)
+        self.interface.set_layout(record["tiles"], record["ports"])
+        self.interface.board.development_card_deck[:] = record["development_card_deck"]
+
+        # Index of the roll that starts each player's turn, keyed by the turn and the number of the player rolling
+        self.turn_starts = {}
+        # Index of the event that starts each turn
+        self.turn_events = {}
+        turn = 0
+        for index, event in enumerate(self.events):
+            if event[0] == "turn":
+                turn = event[1]
+                self.turn_events[turn] = index
+            elif event[0] == "roll":
+                self.turn_starts.setdefault((turn, event[1]), index)
+        self.turns = turn
+        self.first_roll = min(self.turn_starts.values(), default=len(self.events))
+
+        # The number of events applied, and the turn they reached
+        self.position = 0
+        self.turn = 0
+        # Number of events applied -> (turn, search state)
+        self.snapshots = {}
+        self.take_snapshot()
+
+    # Snapshots -------------------------------------------------------------------
+
+    def take_snapshot(self) -> None:
+        """
+        Stores the current position, so it can be returned to without replaying the events before it
+        :return: None
+        """
+        self.snapshots[self.position] = (
+            self.turn,
+            SearchState.from_interface(self.interface),
+        )
+
+    def restore_snapshot(self, position) -> None:
+        """
+        Returns the interface to a stored position
+        :param position: The number of events applied in the position
+        :return: None
+        """
+        turn, state = self.snapshots[position]
+        # The search state is indexed by the order of the players, which changes during the game
+        self.interface.get_players_list().sort(
+            key=lambda player_: state.players.index(player_.number)
+        )
+        state.apply_to(self.interface)
+        self.position = position
+        self.set_turn(turn)
+
+    def set_turn(self, turn) -> None:
+        """
+        Sets the turn number of the replay and the interface
+        :param turn: The turn number
+        :return: None
+        """
+        self.turn = turn
+        self.interface.turn_number = turn
+        self.interface.board.turn = turn
+
+    # Seeking ---------------------------------------------------------------------
+
+    def seek(self, turn, player_number=None) -> board_interface:
+        """
+        Moves to the start of a turn, or of a player's turn, before the dice are rolled
+        :param turn: The turn number
+        :param player_number: The number of the player, or None for the start of the turn
+        :return: The interface, in the position
+        """
+        if player_number is None:
+            if turn not in self.turn_events:
+                raise ValueError(f"This game does not have a turn {turn}")
+            return self.seek_event(self.turn_events[turn])
+        if (turn, player_number) not in self.turn_starts:
+            raise ValueError(
+                f"Player {player_number} did not start turn {turn} of this game"
+            )
+        return self.seek_event(self.turn_starts[(turn, player_number)])
+
+    def seek_event(self, position) -> board_interface:
+        """
+        Moves to the position after a number of events have been applied
+        Starts from the nearest snapshot before the position, unless the current position is closer
+        :param position: The number of events to have applied
+        :return: The interface, in the position
+        """
+        if not 0 <= position <= len(self.events):
+            raise IndexError(f"The game only has {len(self.events)} events")
+        nearest = max(snapshot for snapshot in self.snapshots if snapshot <= position)
+        if position < self.position or nearest > self.position:
+            self.restore_snapshot(nearest)
+        while self.position < position:
+            self.step()
+        return self.interface
+
+    def step(self) -> tuple:
+        """
+        Applies the next event, taking a snapshot first if it starts a turn that snapshots are taken at
+        :return: The event, in the format returned by game_record.decode_event
+        """
+        event = self.events[self.position]
+        if (
+            event[0] == "turn"
+            and (event[1] - 1) % self.snapshot_interval == 0
+            and self.position not in self.snapshots
+        ):
+            self.take_snapshot()
+
+        # Minimax mode stops the interface logging and printing the replayed moves
+        self.interface.set_minimax(True)
+        try:
+            self.apply_event(event)
+        finally:
+            self.interface.set_minimax(False)
+        self.position += 1
+        return event
+
+    # Events ----------------------------------------------------------------------
+
+    def pay(self, player_, structure) -> None:
+        """
+        Takes the cost of a structure from a player
+        :param player_: The player paying
+        :param structure: The structure, as named in the building cost list
+        :return: None
+        """
+        interface = self.interface
+        for resource, amount in interface.get_building_cost_list()[structure].items():
+            for _ in range(amount):
+                interface.return_player_card(player_, resource)
+
+    def apply_event(self, event) -> None:
+        """
+        Applies an event to the interface, making the same changes the interface and game made when it was recorded
+        :param event: The event, in the format returned by game_record.decode_event
+        :return: None
+        """
+        interface = self.interface
+        name = event[0]
+
+        if name == "turn":
+            self.set_turn(event[1])
+            return
+
+        if name == "roll":
+            player_ = interface.get_player(event[1])
+            # Reset the player's turn, as the game does before they roll
+            player_.has_built_this_turn = False
+            player_.has_played_dev_card_this_turn = False
+            player_.dev_cards_at_start_of_turn = player_.development_cards.copy()
+            for other in interface.get_players_list():
+                other.gained_dev_cards_this_turn = []
+            if event[3]:
+                interface.board.current_roll = [event[2], event[3]]
+            total = event[2] + event[3]
+            # On a 7, the discards, robber and steal are the events that follow
+            if total != 7:
+                interface.produce_resources(total)
+            # The game's integrity check sorts the players by number in the first turn, which changes the order
+            # resources are given out in from then on
+            if self.position == self.first_roll:
+                interface.get_players_list().sort(key=lambda other: other.number)
+            return
+
+        if name == "robber":
+            interface.move_robber(event[1])
+            return
+
+        if name == "steal":
+            thief = interface.get_player(event[1])
+            victim = interface.get_player(event[2])
+            victim.resources.move_to(thief.resources, event[3])
+            return
+
+        if name == "discard":
+            player_ = interface.get_player(event[1])
+            for resource, amount in event[2].items():
+                for _ in range(amount):
+                    interface.return_player_card(player_, resource)
+            return
+
+        if name == "end":
+            winner = event[1]
+            if winner is None:
+                return
+            victory_points = interface.get_player(winner).victory_points
+            if event[3]:
+                if victory_points < self.record["target_score"]:
+                    raise ValueError(
+                        f"The replay does not match the record, as player {winner} has not won"
+                    )
+            # A game ended at the turn limit goes to the player with the most victory points
+            elif victory_points < max(
+                other.victory_points for other in interface.get_players_list()
+            ):
+                raise ValueError(
+                    f"The replay does not match the record, as player {winner} was not in the lead"
+                )
+            return
+
+        player_ = interface.get_player(event[1])
+
+        if name == "settlement":
+            if not event[3]:
+                self.pay(player_, "settlement")
+            interface.set_building(player_, event[2], "settlement")
+            player_.has_built_this_turn = True
+            # Players receive resources from their second settlement of the setup
+            if (
+                self.turn == 0
+                and len(interface.board.player_settlements[player_.number]) == 2
+            ):
+                for tile_ in interface.get_buildings_list()[event[2]]["tiles"]:
+                    if not tile_.contains_robber:
+                        interface.give_player_card(player_, "resource", tile_.resource)
+
+        elif name == "city":
+            self.pay(player_, "city")
+            interface.set_building(player_, event[2], "city")
+            player_.has_built_this_turn = True
+
+        elif name == "road":
+            if not event[3]:
+                self.pay(player_, "road")
+            interface.set_road(player_, event[2])
+            player_.has_built_this_turn = True
+
+        elif name == "buy development card":
+            for resource in ("wheat", "sheep", "rock"):
+                interface.return_player_card(player_, resource)
+            card = interface.give_player_card(
+                player_, "development", "development_card"
+            )
+            if card != event[2]:
+                raise ValueError(
+                    f"The replay does not match the record, as {card} was drawn instead of {event[2]}"
+                )
+            player_.gained_dev_cards_this_turn.append(card)
+
+        elif name == "play development card":
+            # The robber and roads placed by the card are the events before this one
+            card = event[2]
+            if card == "soldier":
+                if (
+                    player_.development_cards.count("soldier")
+                    > player_.played_robber_cards
+                ):
+                    player_.played_robber_cards += 1
+            elif card == "monopoly":
+                for other in interface.get_players_list():
+                    if other is not player_:
+                        other.resources.move_to(
+                            player_.resources, event[3], other.resources.count(event[3])
+                        )
+            elif card == "year of plenty":
+                interface.give_player_card(player_, "resource", event[3])
+                interface.give_player_card(player_, "resource", event[4])
+            if card != "soldier":
+                interface.return_player_card(player_, card)
+            player_.has_played_dev_card_this_turn = True
+            player_.total_dev_cards_played += 1
+
+        elif name == "trade with bank":
+            for _ in range(4):
+                interface.return_player_card(player_, event[2])
+            interface.give_player_card(player_, "resource", event[3])
+
+        elif name == "trade with port":
+            for _ in range(event[4]):
+                interface.return_player_card(player_, event[2])
+            interface.give_player_card(player_, "resource", event[3])
+
+        elif name == "trade with player":
+            other = interface.get_player(event[2])
+            interface.return_player_card(player_, event[3])
+            interface.return_player_card(other, event[4])
+            interface.give_player_card(player_, "resource", event[4])
+            interface.give_player_card(other, "resource", event[3])
+
+        # The game checks the special cards of the player after every move they make
+        interface.update_special_cards(player_)
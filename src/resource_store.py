@@ -0,0 +1,200 @@
+"""
+Resource Store
+A counted multiset of resource cards, used for the bank and for each player's hand
+Cards are stored as a count of each resource, so giving, taking and counting cards does not depend on how many cards
+are held. Also reads like a list of cards, so code that iterates, indexes or prints a hand still works
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+# Every resource, in the order of the count vectors of the search state and the codes of the game record
+RESOURCES = ("wheat", "wood", "sheep", "clay", "rock")
+
+# The order that the cards of a store are listed in, which is alphabetical as the sorted lists of cards were
+CARD_ORDER = tuple(sorted(RESOURCES))
+
+
+class resource_store:
+    """
+    Counted multiset of resource cards
+    Reading it as a list gives the cards grouped by resource, in the order of CARD_ORDER
+    """
+
+    __slots__ = ("_counts", "_total")
+
+    def __init__(self, cards=()):
+        """
+        Initialises a resource store
+        :param cards: The cards to start with, as an iterable of card names
+        """
+        self._counts = dict.fromkeys(CARD_ORDER, 0)
+        self._total = 0
+        self.extend(cards)
+
+    # Counted Operations
+
+    def add(self, card, amount=1) -> None:
+        """
+        Adds cards to the store
+        :param card: The resource to add
+        :param amount: The number of cards to add
+        :return: None
+        """
+        if card not in self._counts:
+            raise ValueError(f"{card} is not a resource card")
+        self._counts[card] += amount
+        self._total += amount
+
+    def take(self, card, amount=1) -> None:
+        """
+        Takes cards from the store
+        :param card: The resource to take
+        :param amount: The number of cards to take
+        :return: None
+        """
+        if self._counts.get(card, 0) < amount:
+            raise ValueError(f"There are not {amount} {card} cards to take")
+        self._counts[card] -= amount
+        self._total -= amount
+
+    def move_to(self, other, card, amount=1) -> None:
+        """
+        Moves cards from this store to another, e.g. from the bank to a player
+        :param other: The store to move the cards to
+        :param card: The resource to move
+        :param amount: The number of cards to move
+        :return: None
+        """
+        self.take(card, amount)
+        other.add(card, amount)
+
+    def count(self, card) -> int:
+        """
+        Counts the cards of one resource
+        :param card: The resource to count
+        :return: The number of cards
+        """
+        return self._counts.get(card, 0)
+
+    def counts(self) -> dict:
+        """
+        Gets the number of cards of every resource
+        :return: A dict of resource to count, in the order of CARD_ORDER
+        """
+        return self._counts.copy()
+
+    def assign(self, cards) -> None:
+        """
+        Replaces the contents of the store, keeping the same object so that references to it stay valid
+        :param cards: Another resource store, or an iterable of card names
+        :return: None
+        """
+        if isinstance(cards, resource_store):
+            self._counts = cards._counts.copy()
+            self._total = cards._total
+        else:
+            self.clear()
+            self.extend(cards)
+
+    def copy(self):
+        """
+        Copies the store
+        :return: The copy
+        """
+        store = resource_store()
+        store.assign(self)
+        return store
+
+    # List Operations
+    # Kept so that the store can be used in place of the list of cards it replaced
+    # There is no sort, as the cards are always listed in the order of CARD_ORDER
+
+    def append(self, card) -> None:
+        """
+        Adds a card to the store
+        :param card: The resource to add
+        :return: None
+        """
+        self.add(card)
+
+    def extend(self, cards) -> None:
+        """
+        Adds cards to the store
+        :param cards: An iterable of card names
+        :return: None
+        """
+        for card in cards:
+            self.add(card)
+
+    def remove(self, card) -> None:
+        """
+        Takes a card from the store
+        :param card: The resource to take
+        :return: None
+        """
+        self.take(card)
+
+    def pop(self, index=-1):
+        """
+        Takes the card at a position of the list of cards
+        :param index: The position of the card
+        :return: The card
+        """
+        card = self[index]
+        self.take(card)
+        return card
+
+    def index(self, card) -> int:
+        """
+        Gets the position of the first card of a resource in the list of cards
+        :param card: The resource to find
+        :return: The position
+        """
+        if not self.count(card):
+            raise ValueError(f"{card} is not in the store")
+        position = 0
+        for resource, amount in self._counts.items():
+            if resource == card:
+                return position
+            position += amount
+
+    def clear(self) -> None:
+        """
+        Takes every card from the store
+        :return: None
+        """
+        self._counts = dict.fromkeys(CARD_ORDER, 0)
+        self._total = 0
+
+    def __len__(self):
+        return self._total
+
+    def __contains__(self, card):
+        return self._counts.get(card, 0) > 0
+
+    def __iter__(self):
+        for card, amount in self._counts.items():
+            for _ in range(amount):
+                yield card
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._total
+        if not 0 <= index < self._total:
+            raise IndexError("resource store index out of range")
+        for card, amount in self._counts.items():
+            if index < amount:
+                return card
+            index -= amount
+
+    def __eq__(self, other):
+        if isinstance(other, resource_store):
+            return self._counts == other._counts
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
@@ -0,0 +1,296 @@
+"""
+Search State
+A compact copy of everything a move can change in a game, stored in a single bytearray indexed by the IDs from the
+topology. Used by the minimax search to snapshot and restore an interface, and to send positions to worker processes
+without pickling the whole interface
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+from topology import *
+from resource_store import RESOURCES
+
+# The order of the cards in the count vectors
+DEVELOPMENT_CARDS = (
+    "soldier",
+    "monopoly",
+    "year of plenty",
+    "road building",
+    "victory point",
+)
+
+# The number of cards in a full development card deck
+# 14 soldiers, 2 each of monopoly, year of plenty and road building, and 5 victory points
+DEVELOPMENT_CARD_DECK_SIZE = 25
+
+# Layout of each player's block of the state
+# Resource, development card and gained this turn development card counts, then the single byte values
+HAND = 0
+DEV_CARDS = HAND + len(RESOURCES)
+GAINED_DEV_CARDS = DEV_CARDS + len(DEVELOPMENT_CARDS)
+PLAYED_ROBBER_CARDS = GAINED_DEV_CARDS + len(DEVELOPMENT_CARDS)
+TOTAL_DEV_CARDS_PLAYED = PLAYED_ROBBER_CARDS + 1
+VICTORY_POINTS = TOTAL_DEV_CARDS_PLAYED + 1
+FLAGS = VICTORY_POINTS + 1
+PLAYER_BLOCK_SIZE = FLAGS + 1
+
+# Bits of the flags byte
+HAS_BUILT_THIS_TURN = 1
+HAS_PLAYED_DEV_CARD_THIS_TURN = 2
+
+# Building types for the node building array
+NO_BUILDING = 0
+SETTLEMENT = 1
+CITY = 2
+BUILDING_TYPES = (None, "settlement", "city")
+
+# Layout of the board block, which follows the player blocks
+# Owners are stored as the player's position in the players tuple plus one, so that 0 means no owner
+# The development card deck is stored in order from the top, as the card's position in DEVELOPMENT_CARDS plus one,
+# so that 0 means the rest of the deck is empty
+NODE_OWNERS = 0
+NODE_BUILDINGS = NODE_OWNERS + len(TOPOLOGY.node_names)
+EDGE_OWNERS = NODE_BUILDINGS + len(TOPOLOGY.node_names)
+PORT_OWNERS = EDGE_OWNERS + len(TOPOLOGY.edge_names)
+RESOURCE_BANK = PORT_OWNERS + len(PORT_EDGES)
+DEVELOPMENT_CARD_DECK = RESOURCE_BANK + len(RESOURCES)
+ROBBER = DEVELOPMENT_CARD_DECK + DEVELOPMENT_CARD_DECK_SIZE
+LARGEST_ARMY = ROBBER + 1
+LONGEST_ROAD = LARGEST_ARMY + 2
+BOARD_BLOCK_SIZE = LONGEST_ROAD + 2
+
+# Stored in the robber byte if no tile contains the robber
+NO_ROBBER = 255
+
+
+class SearchState:
+    """
+    Compact search state
+    Holds the player numbers in board order, and one bytearray with a block for each player followed by the board
+    Cloning copies the bytearray, and the state can be hashed, compared and pickled cheaply
+    """
+
+    __slots__ = ("players", "data")
+
+    def __init__(self, players: tuple, data: bytearray = None):
+        """
+        Initialises a search state
+        :param players: The player numbers, in the same order as the players on the board
+        :param data: The state data, defaults to an empty board
+        """
+        self.players = tuple(players)
+        if data is None:
+            data = bytearray(len(self.players) * PLAYER_BLOCK_SIZE + BOARD_BLOCK_SIZE)
+            data[self.board_offset + ROBBER] = NO_ROBBER
+        self.data = data
+
+    @classmethod
+    def from_interface(cls, interface):
+        """
+        Takes a snapshot of a board interface
+        :param interface: The board interface
+        :return: The search state
+        """
+        board_ = interface.board
+        state = cls(player_.number for player_ in board_.players)
+        data = state.data
+
+        for index, player_ in enumerate(board_.players):
+            offset = index * PLAYER_BLOCK_SIZE
+            for position, card in enumerate(RESOURCES):
+                data[offset + HAND + position] = player_.resources.count(card)
+            for card in player_.development_cards:
+                data[offset + DEV_CARDS + DEVELOPMENT_CARDS.index(card)] += 1
+            for card in player_.gained_dev_cards_this_turn:
+                data[offset + GAINED_DEV_CARDS + DEVELOPMENT_CARDS.index(card)] += 1
+            data[offset + PLAYED_ROBBER_CARDS] = player_.played_robber_cards
+            data[offset + TOTAL_DEV_CARDS_PLAYED] = player_.total_dev_cards_played
+            data[offset + VICTORY_POINTS] = player_.victory_points
+            data[offset + FLAGS] = (
+                HAS_BUILT_THIS_TURN * player_.has_built_this_turn
+                + HAS_PLAYED_DEV_CARD_THIS_TURN * player_.has_played_dev_card_this_turn
+            )
+
+            # Ownership comes from the board's ownership indexes, so only what the player owns is visited
+            offset = state.board_offset
+            owner = index + 1
+            for node in board_.player_settlements[player_.number]:
+                data[offset + NODE_OWNERS + node] = owner
+                data[offset + NODE_BUILDINGS + node] = SETTLEMENT
+            for node in board_.player_cities[player_.number]:
+                data[offset + NODE_OWNERS + node] = owner
+                data[offset + NODE_BUILDINGS + node] = CITY
+            for edge in board_.player_roads[player_.number]:
+                data[offset + EDGE_OWNERS + edge] = owner
+            for slot in board_.player_ports[player_.number]:
+                data[offset + PORT_OWNERS + slot] = owner
+
+        offset = state.board_offset
+        for index, card in enumerate(RESOURCES):
+            data[offset + RESOURCE_BANK + index] = board_.resource_deck.count(card)
+        for position, card in enumerate(board_.development_card_deck):
+            data[offset + DEVELOPMENT_CARD_DECK + position] = (
+                DEVELOPMENT_CARDS.index(card) + 1
+            )
+        for tile_id, tile_ in enumerate(board_.tiles):
+            if tile_.contains_robber:
+                data[offset + ROBBER] = tile_id
+        data[offset + LARGEST_ARMY] = state.owner_index(board_.largest_army[0])
+        data[offset + LARGEST_ARMY + 1] = board_.largest_army[1]
+        data[offset + LONGEST_ROAD] = state.owner_index(board_.longest_road[0])
+        data[offset + LONGEST_ROAD + 1] = board_.longest_road[1]
+        return state
+
+    def apply_to(self, interface) -> None:
+        """
+        Sets a board interface to this state
+        The interface must be for the same game, so it has the same players, tiles and ports
+        Only the parts of the board that differ from this state are changed
+        :param interface: The board interface
+        :return: None
+        """
+        board_ = interface.board
+        data = self.data
+        offset = self.board_offset
+        players = board_.players
+
+        # Hands and flags
+        for index, player_ in enumerate(players):
+            block = index * PLAYER_BLOCK_SIZE
+            player_.resources.assign(self.expand(block + HAND, RESOURCES))
+            player_.development_cards[:] = self.expand(
+                block + DEV_CARDS, DEVELOPMENT_CARDS
+            )
+            player_.gained_dev_cards_this_turn[:] = self.expand(
+                block + GAINED_DEV_CARDS, DEVELOPMENT_CARDS
+            )
+            player_.played_robber_cards = data[block + PLAYED_ROBBER_CARDS]
+            player_.total_dev_cards_played = data[block + TOTAL_DEV_CARDS_PLAYED]
+            player_.victory_points = data[block + VICTORY_POINTS]
+            player_.has_built_this_turn = bool(
+                data[block + FLAGS] & HAS_BUILT_THIS_TURN
+            )
+            player_.has_played_dev_card_this_turn = bool(
+                data[block + FLAGS] & HAS_PLAYED_DEV_CARD_THIS_TURN
+            )
+            board_.player_settlements[player_.number] = set()
+            board_.player_cities[player_.number] = set()
+            board_.player_roads[player_.number] = set()
+            board_.player_ports[player_.number] = set()
+
+        # Buildings, roads and ports, rebuilding the ownership indexes as they are visited
+        for node, item in enumerate(board_._node_state):
+            owner = data[offset + NODE_OWNERS + node]
+            building = data[offset + NODE_BUILDINGS + node]
+            player_ = players[owner - 1] if owner else None
+            if (
+                item["player"] is not player_
+                or item["building"] != BUILDING_TYPES[building]
+            ):
+                item.update({"player": player_, "building": BUILDING_TYPES[building]})
+            if building == SETTLEMENT:
+                board_.player_settlements[player_.number].add(node)
+            elif building == CITY:
+                board_.player_cities[player_.number].add(node)
+        for edge, item in enumerate(board_._edge_state):
+            owner = data[offset + EDGE_OWNERS + edge]
+            item["player"] = players[owner - 1] if owner else None
+            if owner:
+                board_.player_roads[item["player"].number].add(edge)
+        for slot, item in enumerate(board_._port_state):
+            owner = data[offset + PORT_OWNERS + slot]
+            if item is not None:
+                item["player"] = players[owner - 1] if owner else None
+                if owner:
+                    board_.player_ports[item["player"].number].add(slot)
+
+        # Decks
+        board_.resource_deck.assign(self.expand(offset + RESOURCE_BANK, RESOURCES))
+        deck = []
+        for position in range(DEVELOPMENT_CARD_DECK_SIZE):
+            code = data[offset + DEVELOPMENT_CARD_DECK + position]
+            if not code:
+                break
+            deck.append(DEVELOPMENT_CARDS[code - 1])
+        board_.development_card_deck[:] = deck
+
+        # Robber and special cards
+        for tile_id, tile_ in enumerate(board_.tiles):
+            tile_.contains_robber = tile_id == data[offset + ROBBER]
+        owner = data[offset + LARGEST_ARMY]
+        board_.largest_army = [
+            players[owner - 1] if owner else None,
+            data[offset + LARGEST_ARMY + 1],
+        ]
+        owner = data[offset + LONGEST_ROAD]
+        board_.longest_road = [
+            players[owner - 1] if owner else None,
+            data[offset + LONGEST_ROAD + 1],
+        ]
+        board_.zobrist = board_.compute_zobrist()
+        board_.hand_keys = board_.compute_hand_keys()
+        board_.production = None
+
+    @property
+    def board_offset(self) -> int:
+        """
+        The position of the board block in the data
+        :return: The offset
+        """
+        return len(self.players) * PLAYER_BLOCK_SIZE
+
+    def owner_index(self, player_) -> int:
+        """
+        Converts a player into the value stored for an owner
+        :param player_: The player, or None
+        :return: The player's position in the players tuple plus one, or 0 for None
+        """
+        if player_ is None:
+            return 0
+        return self.players.index(player_.number) + 1
+
+    def expand(self, offset, cards) -> list:
+        """
+        Turns a count vector back into a list of cards
+        :param offset: The position of the count vector in the data
+        :param cards: The cards that the counts are for
+        :return: The list of cards
+        """
+        list_ = []
+        for index, card in enumerate(cards):
+            list_.extend([card] * self.data[offset + index])
+        return list_
+
+    def hand(self, number) -> dict:
+        """
+        Gets the resource counts of a player
+        :param number: The player number
+        :return: A dict of resource counts, in the same format as player.count_cards("resources")
+        """
+        offset = self.players.index(number) * PLAYER_BLOCK_SIZE + HAND
+        return {card: self.data[offset + i] for i, card in enumerate(RESOURCES)}
+
+    def clone(self):
+        """
+        Copies the state
+        :return: The copy
+        """
+        return SearchState(self.players, self.data[:])
+
+    def __eq__(self, other):
+        if not isinstance(other, SearchState):
+            return False
+        return self.players == other.players and self.data == other.data
+
+    def __hash__(self):
+        return hash((self.players, bytes(self.data)))
+
+    def __getstate__(self):
+        return self.players, bytes(self.data)
+
+    def __setstate__(self, state):
+        self.players = state[0]
+        self.data = bytearray(state[1])
+
+    def __repr__(self):
+        return f"SearchState(players={self.players}, data={self.data.hex()})"
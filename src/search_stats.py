@@ -0,0 +1,138 @@
+"""
+Search Stats
+Counters for the MiniMax search, kept for each search and added together over a match
+Used to size the search depth and time limit for the hardware the games are run on
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+
+class search_stats:
+    """
+    Counters for one or more searches
+    Times are in nanoseconds, and nodes are counted by their distance from the top level of the search
+    """
+
+    __slots__ = (
+        "searches",
+        "nodes_per_depth",
+        "leaf_evaluations",
+        "expanded_nodes",
+        "children",
+        "cutoffs",
+        "table_hits",
+        "table_cutoffs",
+        "move_generation_time",
+        "move_application_time",
+        "evaluation_time",
+        "clone_time",
+        "total_time",
+        "completed_depth",
+        "timeouts",
+    )
+
+    def __init__(self):
+        """
+        Initialises the counters at zero
+        """
+        self.searches = 0
+        self.nodes_per_depth = []
+        self.leaf_evaluations = 0
+        # Nodes whose moves were generated, and the number of moves they had, for the branching factor
+        self.expanded_nodes = 0
+        self.children = 0
+        self.cutoffs = 0
+        self.table_hits = 0
+        self.table_cutoffs = 0
+        self.move_generation_time = 0
+        self.move_application_time = 0
+        self.evaluation_time = 0
+        self.clone_time = 0
+        self.total_time = 0
+        # The deepest iteration to finish, the highest of any search once added together
+        self.completed_depth = 0
+        self.timeouts = 0
+
+    def count_node(self, depth) -> None:
+        """
+        Counts a node visited by the search
+        :param depth: The distance of the node from the top level
+        :return: None
+        """
+        if depth >= len(self.nodes_per_depth):
+            self.nodes_per_depth.extend([0] * (depth + 1 - len(self.nodes_per_depth)))
+        self.nodes_per_depth[depth] += 1
+
+    def merge(self, other) -> None:
+        """
+        Adds the counters of another stats object to this one
+        Used to add the stats from worker processes to a search, and searches to a match
+        :param other: The other stats object
+        :return: None
+        """
+        missing = len(other.nodes_per_depth) - len(self.nodes_per_depth)
+        if missing > 0:
+            self.nodes_per_depth.extend([0] * missing)
+        for depth, nodes in enumerate(other.nodes_per_depth):
+            self.nodes_per_depth[depth] += nodes
+        for name in self.__slots__:
+            if name not in ("nodes_per_depth", "completed_depth"):
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.completed_depth = max(self.completed_depth, other.completed_depth)
+
+    @property
+    def nodes(self) -> int:
+        """
+        :return: The total number of nodes visited
+        """
+        return sum(self.nodes_per_depth)
+
+    @property
+    def nodes_per_second(self) -> float:
+        """
+        :return: The number of nodes visited per second of search
+        """
+        if not self.total_time:
+            return 0.0
+        return self.nodes * 1_000_000_000 / self.total_time
+
+    @property
+    def branching_factor(self) -> float:
+        """
+        :return: The average number of moves at each node whose moves were generated
+        """
+        if not self.expanded_nodes:
+            return 0.0
+        return self.children / self.expanded_nodes
+
+    def as_dict(self) -> dict:
+        """
+        Gets the counters as a dict, with the times in seconds
+        :return: The dict of counters
+        """
+        return {
+            "searches": self.searches,
+            "nodes": self.nodes,
+            "nodes_per_depth": list(self.nodes_per_depth),
+            "nodes_per_second": round(self.nodes_per_second, 2),
+            "leaf_evaluations": self.leaf_evaluations,
+            "branching_factor": round(self.branching_factor, 3),
+            "cutoffs": self.cutoffs,
+            "table_hits": self.table_hits,
+            "table_cutoffs": self.table_cutoffs,
+            "move_generation_time": self.move_generation_time / 1_000_000_000,
+            "move_application_time": self.move_application_time / 1_000_000_000,
+            "evaluation_time": self.evaluation_time / 1_000_000_000,
+            "clone_time": self.clone_time / 1_000_000_000,
+            "total_time": self.total_time / 1_000_000_000,
+            "completed_depth": self.completed_depth,
+            "timeouts": self.timeouts,
+        }
+
+    def __repr__(self):
+        return (
+            f"{self.searches} searches, {self.nodes} nodes {self.nodes_per_depth}, "
+            f"{self.nodes_per_second:.0f} nodes/s, {self.leaf_evaluations} evaluations, "
+            f"branching factor {self.branching_factor:.2f}, {self.cutoffs} cutoffs, "
+            f"{self.table_hits} table hits, completed depth {self.completed_depth}, {self.timeouts} timeouts"
+        )
@@ -0,0 +1,59 @@
+"""
+Shared setup for the tests
+The modules are imported the same way __main__ imports them, from the src directory, and every test runs in its own
+directory, as games write their logs to the working directory
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import os
+import sys
+
+import pytest
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from game import CONFIG, ai_random, game
+from game_record import read_game_records
+
+
+@pytest.fixture(autouse=True)
+def game_directory(tmp_path, monkeypatch):
+    """
+    Runs a test in an empty directory with the log directories a game needs
+    :param tmp_path: The directory, from pytest
+    :param monkeypatch: Used to change the working directory back after the test
+    :return: The directory
+    """
+    os.makedirs(tmp_path / "logs" / "players")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def record_games(seeds, target_score=10) -> list:
+    """
+    Plays and records a seeded game between three random players for each seed
+    :param seeds: The game seeds
+    :param target_score: The target score of the games
+    :return: The games, in the format returned by game_record.read_game_records
+    """
+    if os.path.exists("games.rec"):
+        os.remove("games.rec")
+    config = CONFIG.copy()
+    CONFIG["headless_mode"] = True
+    CONFIG["game_record_file"] = "games.rec"
+    CONFIG["target_score"] = target_score
+    try:
+        for seed in seeds:
+            players = [
+                ai_random(1, "green"),
+                ai_random(2, "yellow"),
+                ai_random(3, "red"),
+            ]
+            match = game(players, [seed, len(seeds)], seed)
+            match.initial_placement()
+            match.play()
+    finally:
+        CONFIG.update(config)
+    return list(read_game_records("games.rec"))
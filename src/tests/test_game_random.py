@@ -0,0 +1,94 @@
+"""
+Tests that a seeded game is played the same way every time, including in processes with different string hashing
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import os
+import subprocess
+import sys
+
+from conftest import SRC
+
+# Plays a seeded game between two random players and a MiniMax player, and prints how it went
+GAME_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[2])
+from game import *
+CONFIG["headless_mode"] = True
+CONFIG["game_record_file"] = None
+CONFIG["minimax_search_processes"] = int(sys.argv[3])
+CONFIG["target_score"] = 10
+players = [
+    ai_random(1, "green"),
+    ai_minimax(2, "yellow", max_depth=int(sys.argv[4]), time_limit=600),
+    ai_random(3, "red"),
+]
+match = game(players, [1, 1], int(sys.argv[1]))
+match.initial_placement()
+match.play()
+print(match.results, match.turn, match.player_num_turns, file=sys.__stdout__)
+"""
+
+
+def play_seeded_game(seed, hash_seed, processes=1, max_depth=1) -> str:
+    """
+    Plays a seeded game in a new process
+    :param seed: The game seed
+    :param hash_seed: The PYTHONHASHSEED of the process, which changes the order of sets of strings
+    :param processes: The number of processes the MiniMax player searches with
+    :param max_depth: The depth the MiniMax player searches to
+    :return: The results printed by the game
+    """
+    environment = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            GAME_SCRIPT,
+            str(seed),
+            SRC,
+            str(processes),
+            str(max_depth),
+        ],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=600,
+    )
+    return completed.stdout.strip().splitlines()[-1]
+
+
+def test_same_seed_plays_the_same_game():
+    for seed in (5, 7):
+        assert play_seeded_game(seed, 1) == play_seeded_game(seed, 2)
+
+
+def test_parallel_search_plays_the_same_game():
+    assert play_seeded_game(5, 1, processes=3) == play_seeded_game(5, 2, processes=3)
+    # Searching deeper than the top level, so that the workers search moves below the ones they were sent
+    for seed in (5, 7):
+        assert play_seeded_game(seed, 1, processes=3, max_depth=2) == play_seeded_game(
+            seed, 1, processes=1, max_depth=2
+        )
+
+
+def test_different_seeds_play_different_games():
+    from game_random import game_random
+
+    first, second = game_random(1), game_random(2)
+    assert [first.dice.random() for _ in range(5)] != [
+        second.dice.random() for _ in range(5)
+    ]
+
+
+def test_streams_are_independent():
+    from game_random import game_random
+
+    plain, busy = game_random(3), game_random(3)
+    # A player drawing numbers does not change the dice
+    for _ in range(100):
+        busy.player(1).random()
+    assert [plain.dice.randint(1, 6) for _ in range(20)] == [
+        busy.dice.randint(1, 6) for _ in range(20)
+    ]
@@ -0,0 +1,44 @@
+"""
+Tests that the score of a board matches its explanation, for every combination of the heuristic modifiers
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import itertools
+
+import pytest
+
+from conftest import record_games
+from ai_minimax import *
+from replay import replay_engine
+
+MODIFIERS = [
+    HMIgnorePorts,
+    HMEarlyExpansion,
+    lambda: HMFavourResources(["wood", "clay"]),
+    HMDevelopmentCardSpam,
+]
+
+
+def test_score_matches_explanation():
+    record = record_games([2])[0]
+    engine = replay_engine(record)
+    combinations = [
+        combination
+        for size in range(len(MODIFIERS) + 1)
+        for combination in itertools.combinations(MODIFIERS, size)
+    ]
+    players = [
+        ai_minimax(
+            2, "blue", heuristic_modifiers=[modifier() for modifier in combination]
+        )
+        for combination in combinations
+    ]
+
+    for turn in range(1, engine.turns + 1, 5):
+        interface = engine.seek(turn)
+        for player_ in players:
+            for number in (1, 2, 3):
+                evaluated = interface.get_player(number)
+                score = player_.evaluate_board(interface, evaluated)
+                explanation = player_.evaluate_board(interface, evaluated, explain=True)
+                assert score == pytest.approx(sum(explanation.values()))
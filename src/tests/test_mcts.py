@@ -0,0 +1,77 @@
+"""
+Tests for the MCTS player's search
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import copy
+import random
+
+from conftest import record_games
+from ai_mcts import *
+from replay import replay_engine
+
+PLAYOUTS = 60
+
+
+def search_position():
+    """
+    Gets a position part way through a recorded game, in minimax mode as the search expects
+    :return: The interface, the player to move, and an MCTS player with the same number
+    """
+    interface = copy.deepcopy(replay_engine(record_games([4])[0]).seek(20))
+    interface.set_minimax(True)
+    current_player = interface.get_players_list()[0]
+    for card in ("wheat", "sheep", "rock", "wood", "clay"):
+        interface.give_player_card(current_player, "resource", card, 2)
+    player_ = ai_mcts(current_player.number, current_player.colour, playouts=PLAYOUTS)
+    player_.search_stats = search_stats()
+    return interface, current_player, player_
+
+
+def test_search_chooses_a_legal_move():
+    interface, current_player, player_ = search_position()
+    moves = player_.get_move_combinations(interface, current_player)
+    root = player_.grow_tree(
+        interface, current_player, None, PLAYOUTS, random.Random(1)
+    )
+
+    assert root.visits == PLAYOUTS
+    summary = player_.summarise_root(root)
+    assert sum(visits for _, visits, _ in summary.values()) == PLAYOUTS
+    for move, visits, reward in summary.values():
+        assert move in moves
+        assert 0 <= reward <= visits
+    best_move = max(summary.values(), key=lambda item: (item[1], item[2] / item[1]))
+    assert best_move[0] in moves
+
+
+def test_search_repeats_with_the_same_seed():
+    summaries = []
+    for _ in range(2):
+        interface, current_player, player_ = search_position()
+        root = player_.grow_tree(
+            interface, current_player, None, PLAYOUTS, random.Random(2)
+        )
+        summaries.append(player_.summarise_root(root))
+    assert summaries[0] == summaries[1]
+
+
+def test_parallel_search_repeats_with_the_same_seed():
+    config = CONFIG.copy()
+    CONFIG["minimax_search_processes"] = 2
+    try:
+        summaries = []
+        for _ in range(2):
+            interface, current_player, player_ = search_position()
+            summaries.append(
+                player_.parallel_search(interface, current_player, None, 3)
+            )
+    finally:
+        CONFIG.update(config)
+
+    assert summaries[0] == summaries[1]
+    # Each process plays its share of the playouts
+    assert sum(visits for _, visits, _ in summaries[0].values()) == PLAYOUTS
+    moves = player_.get_move_combinations(interface, current_player)
+    for move, _, _ in summaries[0].values():
+        assert move in moves
@@ -0,0 +1,34 @@
+"""
+Tests for the MiniMax player's search
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+from conftest import record_games
+from ai_minimax import *
+from replay import replay_engine
+
+
+def test_parallel_search_learns_move_ordering():
+    record = record_games([6])[0]
+    players = [
+        ai_minimax(details["number"], details["colour"], max_depth=2, time_limit=600)
+        for details in record["players"]
+    ]
+    interface = replay_engine(record, players).seek(40)
+    player_ = interface.get_players_list()[0]
+    for card in ("wheat", "sheep", "rock", "wood", "clay"):
+        interface.give_player_card(player_, "resource", card, 2)
+
+    config = CONFIG.copy()
+    CONFIG["minimax_search_processes"] = 3
+    try:
+        player_.turn_actions(interface)
+    except endOfTurnException:
+        pass
+    finally:
+        CONFIG.update(config)
+
+    # The cutoffs found by the workers are kept for the next iteration of the search
+    assert player_.search_stats.cutoffs > 0
+    assert player_.move_history
+    assert any(player_.killer_moves)
@@ -0,0 +1,56 @@
+"""
+Tests for the node economics of a layout, and the port values that the heuristics read from them
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+from conftest import record_games
+from ai_minimax import *
+from board_interface import *
+from replay import replay_engine
+
+
+def test_nearest_ports():
+    players = [ai_random(1, "green"), ai_random(2, "yellow"), ai_random(3, "red")]
+    interface = board_interface(players, [1, 1], 5)
+    economics = interface.get_node_economics()
+    ports = interface.get_ports_list()
+
+    for node, name in enumerate(TOPOLOGY.node_names):
+        distances = {
+            edge: min(interface.get_distance_between_nodes(name, end) for end in edge)
+            for edge, port in ports.items()
+            if port is not None
+        }
+        distance, symbol, resource = economics.nearest_ports[node]
+        assert distance == min(distances.values())
+        assert any(
+            distances[edge] == distance
+            and ports[edge]["symbol"] == symbol
+            and ports[edge]["resource"] == resource
+            for edge in distances
+        )
+        assert economics.port_values[node] >= 0
+        # A node on a 3:1 port is worth twice the pips of its best resource
+        if distance == 0 and symbol == "3:1":
+            pips = economics.resource_pips[node]
+            assert economics.port_values[node] == 2 * max(pips)
+
+
+def test_port_values_are_scored_unless_ports_are_ignored():
+    record = record_games([2])[0]
+    interface = replay_engine(record).seek(30)
+    default = ai_minimax(1, "green")
+    ignore_ports = ai_minimax(1, "green", heuristic_modifiers=[HMIgnorePorts()])
+
+    evaluated = interface.get_player(1)
+    explanation = default.evaluate_board(interface, evaluated, explain=True)
+    port_values = [
+        value for key, value in explanation.items() if key.startswith("port value@")
+    ]
+    assert port_values
+    assert all(value > 0 for value in port_values)
+
+    explanation = ignore_ports.evaluate_board(interface, evaluated, explain=True)
+    assert [
+        value for key, value in explanation.items() if key.startswith("port value@")
+    ] == [0] * len(port_values)
@@ -0,0 +1,84 @@
+"""
+Tests for the playout engine
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import copy
+import random
+
+from conftest import record_games
+from board_interface import *
+from playout import playout_engine
+from replay import replay_engine
+from search_state import SearchState
+
+
+def start_position():
+    """
+    Gets a position just after the initial placement of a recorded game
+    :return: The interface, and the player to move
+    """
+    interface = copy.deepcopy(replay_engine(record_games([3])[0]).seek(1))
+    return interface, interface.get_players_list()[0]
+
+
+def test_playouts_draw_from_a_shuffled_deck():
+    players = [ai_random(1, "green"), ai_random(2, "yellow"), ai_random(3, "red")]
+    interface = board_interface(players, [1, 1], 1)
+    engine = playout_engine(interface, rng=random.Random(1))
+    deck = interface.board.development_card_deck
+    starting_deck = deck.copy()
+
+    # Each playout should start from a new order of the same cards
+    orders = set()
+    for _ in range(5):
+        engine.shuffle_deck()
+        assert sorted(deck) == sorted(starting_deck)
+        orders.add(tuple(deck))
+    assert len(orders) == 5
+
+
+def test_seeded_playouts_repeat():
+    results = []
+    for _ in range(2):
+        interface, player_ = start_position()
+        engine = playout_engine(interface, rng=random.Random(7))
+        engine.shuffle_deck()
+        winner, turns = engine.play(player_)
+        results.append((winner.number, turns, SearchState.from_interface(interface)))
+    assert results[0] == results[1]
+
+
+def test_playouts_end_with_a_winner_or_at_the_turn_limit():
+    interface, player_ = start_position()
+    engine = playout_engine(interface, rng=random.Random(1))
+    start_state = SearchState.from_interface(interface)
+
+    winner, turns = engine.play(player_)
+    assert winner is not None
+    assert winner.calculateVictoryPoints(interface) >= CONFIG["target_score"]
+
+    for max_turns in (0, 1, 5):
+        start_state.apply_to(interface)
+        winner, turns = engine.play(interface.get_player(player_.number), 0, max_turns)
+        assert winner is None
+        assert turns == max_turns
+
+
+def test_play_games_restores_the_start_position():
+    interface, player_ = start_position()
+    start_state = SearchState.from_interface(interface)
+    engine = playout_engine(interface, rng=random.Random(2))
+
+    results = engine.play_games(player_, 20)
+    assert results["games"] == 20
+    assert sum(results["wins"].values()) == 20
+    assert results["wins"][None] == 0
+    assert results["average_turns"] > 0
+    assert SearchState.from_interface(interface) == start_state
+
+    # With a turn limit too short to win in, no one wins
+    results = engine.play_games(player_, 5, max_turns=1)
+    assert results["wins"][None] == 5
+    assert results["average_turns"] == 1
+    assert SearchState.from_interface(interface) == start_state
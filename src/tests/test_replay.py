@@ -0,0 +1,17 @@
+"""
+Tests that recorded games can be replayed to the end
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+from conftest import record_games
+from replay import replay_engine
+
+
+def test_replay_to_the_end():
+    # No one can reach a target score of 20 before the turn limit, so the second game is given to the leader
+    records = record_games([1]) + record_games([1], target_score=20)
+    assert [record["events"][-1][3] for record in records] == [True, False]
+    for record in records:
+        engine = replay_engine(record)
+        engine.seek_event(len(engine.events))
+        assert engine.turn == engine.turns
@@ -0,0 +1,75 @@
+"""
+Tests that a search state sets an interface to the position it was taken from, whatever the interface held before
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import copy
+
+from conftest import record_games
+from board_interface import *
+from replay import replay_engine
+from search_state import SearchState
+
+
+def assert_same_position(interface, expected):
+    assert interface.board.development_card_deck == expected.board.development_card_deck
+    for player_ in expected.get_players_list():
+        assert interface.get_position_hash(
+            interface.get_player(player_.number)
+        ) == expected.get_position_hash(player_)
+    assert SearchState.from_interface(interface) == SearchState.from_interface(expected)
+
+
+def test_apply_after_buying_a_development_card():
+    players = [ai_random(1, "green"), ai_random(2, "yellow"), ai_random(3, "red")]
+    interface = board_interface(players, [1, 1], 4)
+    interface.set_minimax(True)
+    player_ = interface.get_player(1)
+    for card in ("wheat", "sheep", "rock"):
+        interface.give_player_card(player_, "resource", card, 2)
+
+    before = copy.deepcopy(interface)
+    state_before = SearchState.from_interface(interface)
+    interface.apply_move(player_, ["buy development card"])
+    after = copy.deepcopy(interface)
+    interface.apply_move(player_, ["buy development card"])
+    state_after = SearchState.from_interface(interface)
+
+    # Applying a later state to an earlier position, and the other way around
+    target = copy.deepcopy(before)
+    state_after.apply_to(target)
+    assert_same_position(target, interface)
+    target = copy.deepcopy(after)
+    state_after.apply_to(target)
+    assert_same_position(target, interface)
+    state_before.apply_to(target)
+    assert_same_position(target, before)
+
+    # Applying one state and then another is the same as only applying the second
+    target = copy.deepcopy(after)
+    state_before.apply_to(target)
+    state_after.apply_to(target)
+    assert_same_position(target, interface)
+
+
+def test_apply_onto_other_turns():
+    record = record_games([6])[0]
+    engine = replay_engine(record)
+    turns = list(range(1, engine.turns + 1, 7))
+    states = {}
+    for turn in turns:
+        interface = copy.deepcopy(engine.seek(turn))
+        # The position hash is kept up to date from when the interface enters minimax mode
+        interface.set_minimax(True)
+        states[turn] = (SearchState.from_interface(interface), interface)
+
+    # Apply each state onto an interface at every other turn, later and earlier
+    for turn, (state, expected) in states.items():
+        for other in turns:
+            target = copy.deepcopy(states[other][1])
+            target.get_players_list().sort(
+                key=lambda player_: state.players.index(player_.number)
+            )
+            target.turn_number = expected.turn_number
+            state.apply_to(target)
+            assert_same_position(target, expected)
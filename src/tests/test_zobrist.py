@@ -0,0 +1,49 @@
+"""
+Tests that the hashes kept up to date during a search match the hashes computed from scratch
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+import copy
+
+from conftest import record_games
+from ai_minimax import *
+from replay import replay_engine
+
+
+def assert_hashes_match(interface):
+    board_ = interface.board
+    assert board_.zobrist == board_.compute_zobrist()
+    assert board_.hand_keys == board_.compute_hand_keys()
+
+
+def test_hashes_follow_search_moves():
+    record = record_games([6])[0]
+    players = [
+        ai_minimax(details["number"], details["colour"], max_depth=1)
+        for details in record["players"]
+    ]
+    engine = replay_engine(record, players)
+
+    for turn in range(10, engine.turns, 20):
+        interface = copy.deepcopy(engine.seek(turn))
+        player_ = interface.get_players_list()[0]
+        opponent = interface.get_next_player(player_)
+        # Cards for every kind of move, including playing each development card
+        for card in RESOURCES:
+            interface.give_player_card(player_, "resource", card, 3)
+        player_.development_cards.extend(
+            ["soldier", "monopoly", "year of plenty", "road building"]
+        )
+        interface.set_minimax(True)
+        assert_hashes_match(interface)
+        position = interface.get_position_hash(player_)
+
+        for move in player_.get_move_combinations(interface, player_):
+            token = player_.make_wishful_move(interface, player_, move)
+            assert_hashes_match(interface)
+            for reply in player_.get_move_combinations(interface, opponent):
+                reply_token = interface.apply_move(opponent, reply)
+                assert_hashes_match(interface)
+                interface.undo_move(reply_token)
+            interface.undo_move(token)
+            assert interface.get_position_hash(player_) == position
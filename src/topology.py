@@ -0,0 +1,287 @@
+"""
+Board Topology
+Contains the fixed graph of the board - the nodes that buildings are placed on, the edges that roads are placed on,
+and which tiles and ports they touch - as lookup tables keyed by small integer IDs.
+Only the tiles and ports are shuffled between games, so the graph itself is built once when the module is imported
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+# Tiles are lettered from top to bottom, left to right, and the board keeps them sorted in this order
+# The ID of a tile is therefore its position in this string
+TILE_LETTERS = "abcdefghijklmnopqrs"
+
+# Nodes are the corners of the tiles that buildings can be placed on
+# They are named after the tiles they touch, or the tile letter and a number for corners in the ocean
+NODE_NAMES = [
+    "a1",
+    "a2",
+    "b1",
+    "a,b",
+    "a,c",
+    "c1",
+    "d2",
+    "b,d",
+    "a,b,e",
+    "a,c,e",
+    "c,f",
+    "f1",
+    "d1",
+    "b,d,g",
+    "b,e,g",
+    "c,e,h",
+    "c,f,h",
+    "f2",
+    "d,i",
+    "d,g,i",
+    "e,g,j",
+    "e,h,j",
+    "f,h,k",
+    "f,k",
+    "i1",
+    "g,i,l",
+    "g,j,l",
+    "h,j,m",
+    "h,k,m",
+    "k1",
+    "i,n",
+    "i,l,n",
+    "j,l,o",
+    "j,m,o",
+    "k,m,p",
+    "k,p",
+    "n2",
+    "l,n,q",
+    "l,o,q",
+    "m,o,r",
+    "m,p,r",
+    "p1",
+    "n1",
+    "n,q",
+    "o,q,s",
+    "o,r,s",
+    "p,r",
+    "p2",
+    "q1",
+    "q,s",
+    "r,s",
+    "r1",
+    "s2",
+    "s1",
+]
+
+# Edges are the sides of the tiles that roads can be placed on
+# Each edge is stored with the symbol that needs to be printed to form the hexagons correctly
+ROAD_LAYOUT = [
+    # Hex a
+    (("a1", "a2"), r"-"),
+    (("a2", "a,c"), r"\ "),
+    (("a,c", "a,c,e"), r"/ "),
+    (("a,c,e", "a,b,e"), r"-"),
+    (("a,b,e", "a,b"), r"\ "),
+    (("a,b", "a1"), r"/ "),
+    # Hex b
+    (("a,b", "b1"), r"-"),
+    (("b1", "b,d"), r"/"),
+    (("b,d", "b,d,g"), r"\ "),
+    (("b,d,g", "b,e,g"), r"-"),
+    (("b,e,g", "a,b,e"), r"/"),
+    # Hex c
+    (("a,c", "c1"), r"-"),
+    (("c1", "c,f"), r"\ "),
+    (("c,f", "c,f,h"), r"/"),
+    (("c,f,h", "c,e,h"), r"-"),
+    (("c,e,h", "a,c,e"), r"\ "),
+    # Hex d
+    (("b,d,g", "d,g,i"), r"/"),
+    (("d,g,i", "d,i"), r"-"),
+    (("d,i", "d1"), r"\ "),
+    (("d1", "d2"), r"/"),
+    (("d2", "b,d"), r"-"),
+    # Hex e
+    (("c,e,h", "e,h,j"), r"/"),
+    (("e,h,j", "e,g,j"), r"-"),
+    (("e,g,j", "b,e,g"), r"\ "),
+    # Hex f
+    (("c,f", "f1"), r"-"),
+    (("f1", "f2"), r"\ "),
+    (("f2", "f,k"), r"/"),
+    (("f,k", "f,h,k"), r"-"),
+    (("f,h,k", "c,f,h"), r"\ "),
+    # Hex g
+    (("e,g,j", "g,j,l"), r"/"),
+    (("g,j,l", "g,i,l"), r"-"),
+    (("g,i,l", "d,g,i"), r"\ "),
+    # Hex h
+    (("f,h,k", "h,k,m"), r"/"),
+    (("h,k,m", "h,j,m"), r"-"),
+    (("h,j,m", "e,h,j"), r"\ "),
+    # Hex i
+    (("g,i,l", "i,l,n"), r"/"),
+    (("i,l,n", "i,n"), r"-"),
+    (("i,n", "i1"), r"\ "),
+    (("i1", "d,i"), r"/"),
+    # Hex j
+    (("h,j,m", "j,m,o"), r"/"),
+    (("j,m,o", "j,l,o"), r"-"),
+    (("j,l,o", "g,j,l"), r"\ "),
+    # Hex k
+    (("f,k", "k1"), r"\ "),
+    (("k1", "k,p"), r"/"),
+    (("k,p", "k,m,p"), r"-"),
+    (("k,m,p", "h,k,m"), r"\ "),
+    # Hex l
+    (("j,l,o", "l,o,q"), r"/"),
+    (("l,o,q", "l,n,q"), r"-"),
+    (("l,n,q", "i,l,n"), r"\ "),
+    # Hex m
+    (("k,m,p", "m,p,r"), r"/"),
+    (("m,p,r", "m,o,r"), r"-"),
+    (("m,o,r", "j,m,o"), r"\ "),
+    # Hex n
+    (("l,n,q", "n,q"), r"/"),
+    (("n,q", "n1"), r"-"),
+    (("n1", "n2"), r"\ "),
+    (("n2", "i,n"), r"/"),
+    # Hex o
+    (("m,o,r", "o,r,s"), r"/"),
+    (("o,r,s", "o,q,s"), r"-"),
+    (("o,q,s", "l,o,q"), r"\ "),
+    # Hex p
+    (("k,p", "p1"), r"\ "),
+    (("p1", "p2"), r"/"),
+    (("p2", "p,r"), r"-"),
+    (("p,r", "m,p,r"), r"\ "),
+    # Hex q
+    (("o,q,s", "q,s"), r"/"),
+    (("q,s", "q1"), r"-"),
+    (("q1", "n,q"), r"\ "),
+    # Hex r
+    (("p,r", "r1"), r"/"),
+    (("r1", "r,s"), r"-"),
+    (("r,s", "o,r,s"), r"\ "),
+    # Hex s
+    (("r,s", "s1"), r"/"),
+    (("s1", "s2"), r"-"),
+    (("s2", "q,s"), r"\ "),
+]
+
+# Ports are only ever on the edges listed below. The type of port on each edge is shuffled for random layouts
+PORT_EDGES = [
+    ("a,c", "c1"),
+    ("f1", "f2"),
+    ("k1", "k,p"),
+    ("p,r", "r1"),
+    ("s1", "s2"),
+    ("q1", "n,q"),
+    ("i,n", "i1"),
+    ("d1", "d2"),
+    ("b1", "a,b"),
+]
+
+
+def node_tile_letters(node) -> list[str]:
+    """
+    Gets the letters of the tiles that a node touches, from the name of the node
+    :param node: The name of the node, e.g. 'a,b,e' or 'a1'
+    :return: The list of tile letters
+    """
+    if "," in node:
+        return node.split(",")
+    return [node[0]]
+
+
+class board_topology:
+    """
+    Immutable lookup tables describing the board graph
+    Nodes, edges, tiles and ports are all referred to by their position in the lists above
+    """
+
+    def __init__(self):
+        """
+        Builds the lookup tables from the layout lists
+        """
+
+        # Names and IDs
+        self.node_names = tuple(NODE_NAMES)
+        self.node_ids = {name: i for i, name in enumerate(self.node_names)}
+        self.edge_names = tuple(edge for edge, symbol in ROAD_LAYOUT)
+        self.edge_nodes = tuple(
+            (self.node_ids[a], self.node_ids[b]) for a, b in self.edge_names
+        )
+
+        # Edges can be looked up in either direction, as ports and players do not always use the same order
+        self.edge_ids = {}
+        for i, (a, b) in enumerate(self.edge_names):
+            self.edge_ids[(a, b)] = i
+            self.edge_ids[(b, a)] = i
+
+        # Node -> adjacent nodes, and node -> incident edges
+        adjacent = [[] for _ in self.node_names]
+        incident = [[] for _ in self.node_names]
+        for i, (a, b) in enumerate(self.edge_nodes):
+            adjacent[a].append(b)
+            adjacent[b].append(a)
+            incident[a].append(i)
+            incident[b].append(i)
+        self.node_adjacent = tuple(tuple(nodes) for nodes in adjacent)
+        self.node_edges = tuple(tuple(edges) for edges in incident)
+
+        # Node -> node distance table, in number of edges, found with a breadth first search from every node
+        distances = []
+        for start in range(len(self.node_names)):
+            row = [None] * len(self.node_names)
+            row[start] = 0
+            queue = [start]
+            for current in queue:
+                for neighbour in self.node_adjacent[current]:
+                    if row[neighbour] is None:
+                        row[neighbour] = row[current] + 1
+                        queue.append(neighbour)
+            distances.append(tuple(row))
+        self.node_distances = tuple(distances)
+
+        # Node -> tiles, and tile -> corner nodes
+        self.node_tiles = tuple(
+            tuple(
+                sorted(TILE_LETTERS.index(letter) for letter in node_tile_letters(name))
+            )
+            for name in self.node_names
+        )
+        corners = [[] for _ in TILE_LETTERS]
+        for node, tiles in enumerate(self.node_tiles):
+            for tile_id in tiles:
+                corners[tile_id].append(node)
+        self.tile_nodes = tuple(tuple(nodes) for nodes in corners)
+
+        # Edge -> port slot, and node -> port slots
+        # A port slot is the position of the port in PORT_EDGES
+        self.port_edges = tuple(self.edge_ids[edge] for edge in PORT_EDGES)
+        edge_port = [None for _ in self.edge_names]
+        node_ports = [[] for _ in self.node_names]
+        for slot, edge in enumerate(self.port_edges):
+            edge_port[edge] = slot
+            for node in self.edge_nodes[edge]:
+                node_ports[node].append(slot)
+        self.edge_port = tuple(edge_port)
+        self.node_ports = tuple(tuple(slots) for slots in node_ports)
+
+    def node_id(self, node) -> int:
+        """
+        Gets the ID of a node from its name
+        :param node: The name of the node
+        :return: The ID of the node
+        """
+        return self.node_ids[node]
+
+    def edge_id(self, edge) -> int:
+        """
+        Gets the ID of an edge from the names of the two nodes it connects, in either order
+        :param edge: The tuple of node names
+        :return: The ID of the edge
+        """
+        return self.edge_ids[tuple(edge)]
+
+
+# The topology is the same for every board, so it is only built once
+TOPOLOGY = board_topology()
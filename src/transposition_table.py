@@ -0,0 +1,85 @@
+"""
+Transposition Table
+A bounded table of positions that the minimax search has already scored, keyed by their Zobrist hash
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+# Bound types
+# Exact scores come from a full search of the position, lower and upper bounds come from a search that was pruned
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Replacement policies
+REPLACEMENT_POLICIES = ("depth", "always")
+
+
+class transposition_table:
+    """
+    Fixed size table, where each position can only be stored in the slot given by its hash
+    Entries are tuples of (hash, depth, score, bound, move, search number)
+    """
+
+    def __init__(self, size, replacement="depth"):
+        """
+        Initialises the table
+        :param size: The number of slots in the table
+        :param replacement: The replacement policy, either 'depth' or 'always'
+        'depth' keeps an entry from the current search if it was searched deeper than the new one
+        'always' replaces the entry every time
+        """
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(
+                f"Unknown transposition table replacement policy '{replacement}'"
+            )
+        self.size = size
+        self.replacement = replacement
+        self.entries = [None] * size
+        self.search_number = 0
+
+    def new_search(self) -> None:
+        """
+        Marks the start of a new search, so that entries from older searches can always be replaced
+        :return: None
+        """
+        self.search_number += 1
+
+    def probe(self, key) -> tuple | None:
+        """
+        Looks up a position
+        :param key: The hash of the position
+        :return: The entry for the position, or None if it is not in the table
+        """
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, move) -> None:
+        """
+        Stores a position, following the replacement policy if its slot is already taken
+        :param key: The hash of the position
+        :param depth: The depth the position was searched to
+        :param score: The score of the position
+        :param bound: Whether the score is EXACT, a LOWER_BOUND or an UPPER_BOUND
+        :param move: The best move found from the position
+        :return: None
+        """
+        index = key % self.size
+        entry = self.entries[index]
+        if (
+            entry is not None
+            and self.replacement == "depth"
+            and entry[5] == self.search_number
+            and entry[1] > depth
+        ):
+            return
+        self.entries[index] = (key, depth, score, bound, move, self.search_number)
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the table
+        :return: None
+        """
+        self.entries = [None] * self.size
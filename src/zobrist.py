@@ -0,0 +1,57 @@
+"""
+Zobrist Keys
+Random 64-bit keys for each part of a position, which are combined with XOR to give the position's hash
+The board keeps its part of the hash and a hash of each player's hand up to date as buildings, roads, the robber and
+cards move, so they never have to be recomputed during a search
+
+© 2023 HARRISON PHILLINGHAM, mailto:harrison@phillingham.com.
+"""
+
+import random
+
+
+class zobrist_keys:
+    """
+    Generates the keys on first use
+    Each key is seeded from the item it is for, rather than from the order keys are asked for, so every process
+    generates the same key for the same item, and hashes can be sent between processes
+    """
+
+    def __init__(self, seed="zobrist"):
+        """
+        Initialises the keys
+        :param seed: Mixed into the seed of every key
+        """
+        self.seed = seed
+        self.keys = {}
+
+    def key(self, *item) -> int:
+        """
+        Gets the key for a part of a position, e.g. key("edge", 12, 3) for player 3 owning edge 12
+        :param item: Describes the part of the position
+        :return: The 64-bit key
+        """
+        try:
+            return self.keys[item]
+        except KeyError:
+            value = random.Random(f"{self.seed}{item}").getrandbits(64)
+            self.keys[item] = value
+            return value
+
+
+ZOBRIST = zobrist_keys()
+
+
+def hand_card_key(kind, number, card, amount) -> int:
+    """
+    Gets the key for a player holding a number of one card
+    Holding none of a card has no key, so that a hand's hash only depends on the cards in it
+    :param kind: The kind of card - resource, development card or gained development card
+    :param number: The player number
+    :param card: The card
+    :param amount: The number of the card the player holds
+    :return: The 64-bit key, or 0 if the amount is 0
+    """
+    if not amount:
+        return 0
+    return ZOBRIST.key(kind, number, card, amount)